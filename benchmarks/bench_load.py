@@ -0,0 +1,409 @@
+"""
+Load test: the driver's websocket API under bursts from several Remotes.
+
+The integration runs in-process with its Xbox Live client replaced by a
+simulated backend that answers after a fixed latency. Simulated Remotes
+connect over the ucapi websocket, subscribe to every console and send mixed
+bursts of remote commands, browse and search requests. The harness reports
+latency percentiles of ``_handle_command``, ``browse`` and ``search`` (time
+in the handler and websocket round trip), request throughput and the cost
+of fanning one state change out to every subscribed Remote, for each
+console count and library size. Every scenario runs in its own process.
+
+Run from the repository root:
+
+    python benchmarks/bench_load.py [--consoles 1 8 32] [--games 100 1000] [--remotes 2] \
+        [--requests 200] [--in-flight 4]
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+XUID = "2533274800000000"
+REMOTE_COMMANDS = ["DPAD_UP", "DPAD_DOWN", "DPAD_LEFT", "DPAD_RIGHT", "A", "B", "HOME", "PLAY_PAUSE"]
+SEARCH_TERMS = ["forza", "halo", "game 1", "edition", "zzz"]
+FANOUT_ROUNDS = 20
+
+
+class SimulatedXboxClient:
+    """Stands in for XboxClient: every Xbox Live call answers after ``LATENCY`` seconds."""
+
+    LATENCY = 0.04
+    GAMES = 100
+
+    def __init__(self, client_id: str, client_secret: str = "") -> None:
+        self.gamertag = "Load Test"
+        self.is_connected = False
+        self.last_transport = "cloud"
+        self.transport_stats = {}
+
+    async def _call(self, *_args) -> None:
+        await asyncio.sleep(self.LATENCY)
+
+    turn_on = turn_off = press_button = show_guide = go_back = _call
+    play = pause = next_track = previous_track = change_volume = mute = launch_app = _call
+
+    def enable_local_transport(self, liveid: str, ip_address: str) -> None:
+        pass
+
+    def set_household(self, xuids: list[str]) -> None:
+        pass
+
+    def keep_warm(self) -> None:
+        pass
+
+    def start_prefetch(self) -> None:
+        pass
+
+    async def connect(self, tokens: dict) -> dict:
+        await self._call()
+        self.is_connected = True
+        return tokens or {"access_token": "simulated"}
+
+    async def close(self) -> None:
+        self.is_connected = False
+
+    async def refresh_tokens(self) -> dict | None:
+        return None
+
+    def create_presence_subscription(self, callback) -> "_IdleSubscription":
+        return _IdleSubscription()
+
+    async def get_presence(self, liveid: str) -> dict:
+        await self._call()
+        return {"state": "PLAYING", "title": "Forza Horizon 5", "image": "", "title_id": "2030093255"}
+
+    async def get_console_power(self, liveid: str) -> str:
+        return "On"
+
+    async def get_focus_app(self, liveid: str) -> str:
+        return ""
+
+    async def get_installed_apps(self, liveid: str):
+        from uc_intg_xbox.library import GameLibrary, shared_store
+
+        await self._call()
+        store = shared_store(XUID)
+        names = itertools.cycle(["Forza Horizon", "Halo Infinite", "Starfield", "Sea of Thieves"])
+        return GameLibrary(
+            store.get(f"9P{index:010d}", str(1_000_000 + index), f"{next(names)} {index} Edition")
+            for index in range(self.GAMES)
+        )
+
+    async def refresh_installed_apps(self, liveid: str, current):
+        return None
+
+    async def enrich_games(self, games: list) -> None:
+        await self._call()
+        for game in games:
+            game.image = f"https://store-images.s-microsoft.com/image/{game.title_id}"
+            game.enriched = True
+
+
+class _IdleSubscription:
+    connected = False
+
+    def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class Timings:
+    """Collects handler durations by operation, in milliseconds."""
+
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    def wrap(self, cls: type, method: str, operation: str) -> None:
+        original = getattr(cls, method)
+        samples = self.samples[operation]
+
+        @functools.wraps(original)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                samples.append((time.perf_counter() - started) * 1000)
+
+        setattr(cls, method, timed)
+
+
+def _percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"n": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]  # noqa: E731
+    return {"n": len(ordered), "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+class SimulatedRemote:
+    """A websocket client speaking the Remote's side of the integration API."""
+
+    def __init__(self, port: int) -> None:
+        self._port = port
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._reader: asyncio.Task | None = None
+        self._ws = None
+        self.entity_changes = 0
+
+    async def connect(self) -> None:
+        from websockets.asyncio.client import connect
+
+        self._ws = await connect(f"ws://127.0.0.1:{self._port}", max_size=None)
+        json.loads(await self._ws.recv())  # authentication
+        self._reader = asyncio.create_task(self._read())
+
+    async def close(self) -> None:
+        if self._reader:
+            self._reader.cancel()
+        if self._ws:
+            await self._ws.close()
+
+    async def _read(self) -> None:
+        async for raw in self._ws:
+            message = json.loads(raw)
+            if message.get("kind") == "resp":
+                future = self._pending.pop(message.get("req_id"), None)
+                if future and not future.done():
+                    future.set_result(message)
+            elif message.get("msg") == "entity_change" and "media_title" in message["msg_data"]["attributes"]:
+                self.entity_changes += 1
+
+    async def request(self, msg: str, msg_data: dict | None = None) -> tuple[dict, float]:
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        started = time.perf_counter()
+        await self._ws.send(json.dumps({"kind": "req", "id": request_id, "msg": msg, "msg_data": msg_data or {}}))
+        response = await asyncio.wait_for(future, 30)
+        return response, (time.perf_counter() - started) * 1000
+
+
+async def _wait_connected(driver, device_ids: list[str], timeout: float = 30) -> None:
+    async with asyncio.timeout(timeout):
+        while not all(
+            driver._device_instances.get(device_id) is not None
+            and driver._device_instances[device_id].state == "ON"
+            for device_id in device_ids
+        ):
+            await asyncio.sleep(0.05)
+
+
+async def scenario(consoles: int, games: int, remotes: int, requests: int, in_flight: int, latency: float) -> dict:
+    """Run one load scenario in this process and return its measurements."""
+    from ucapi_framework import BaseConfigManager, get_config_path
+
+    import uc_intg_xbox.device as device_module
+    from uc_intg_xbox import _get_driver_json_path
+    from uc_intg_xbox.config import XboxConfig
+    from uc_intg_xbox.driver import XboxDriver
+    from uc_intg_xbox.media_player_entity import XboxMediaPlayer
+    from uc_intg_xbox.remote_entity import XboxRemote
+
+    SimulatedXboxClient.LATENCY = latency
+    SimulatedXboxClient.GAMES = games
+    device_module.XboxClient = SimulatedXboxClient
+
+    timings = Timings()
+    timings.wrap(XboxRemote, "_handle_command", "command")
+    timings.wrap(XboxMediaPlayer, "browse", "browse")
+    timings.wrap(XboxMediaPlayer, "search", "search")
+
+    device_ids = [f"xbox_load{index:04d}" for index in range(consoles)]
+    config_dir = os.environ["UC_CONFIG_HOME"]
+    Path(config_dir, "config.json").write_text(json.dumps([
+        {**XboxConfig(identifier=device_id, name=f"Console {index}", liveid=f"F4{index:014X}",
+                      client_id="load-test").__dict__}
+        for index, device_id in enumerate(device_ids)
+    ]))
+
+    driver = XboxDriver()
+    driver.config_manager = BaseConfigManager(
+        get_config_path(driver.api.config_dir_path or ""),
+        add_handler=driver.on_device_added,
+        remove_handler=driver.on_device_removed,
+        config_class=XboxConfig,
+    )
+    await driver.api.init(_get_driver_json_path(), None)
+    await driver.register_all_device_instances(connect=False)
+
+    port = int(os.environ["UC_INTEGRATION_HTTP_PORT"])
+    clients = [SimulatedRemote(port) for _ in range(remotes)]
+    for client in clients:
+        for _ in range(100):
+            try:
+                await client.connect()
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+
+    entity_ids = [f"{kind}.{device_id}" for device_id in device_ids for kind in ("media_player", "remote")]
+    started = time.perf_counter()
+    for client in clients:
+        await client.request("subscribe_events", {"entity_ids": entity_ids})
+    await _wait_connected(driver, device_ids)
+    subscribe_ms = (time.perf_counter() - started) * 1000
+
+    round_trips: dict[str, list[float]] = defaultdict(list)
+    rng = random.Random(consoles * 1000 + games)
+
+    async def burst(client: SimulatedRemote, count: int) -> None:
+        for _ in range(count):
+            device_id = rng.choice(device_ids)
+            kind = rng.choices(["command", "browse", "search"], weights=[6, 3, 1])[0]
+            if kind == "command":
+                msg, data = "entity_command", {
+                    "entity_id": f"remote.{device_id}", "cmd_id": "send_cmd",
+                    "params": {"command": rng.choice(REMOTE_COMMANDS)},
+                }
+            elif kind == "browse":
+                pages = max((games + 49) // 50, 1)
+                msg, data = "browse_media", {
+                    "entity_id": f"media_player.{device_id}", "paging": {"page": rng.randint(1, pages), "limit": 50},
+                }
+            else:
+                msg, data = "search_media", {
+                    "entity_id": f"media_player.{device_id}",
+                    "query": rng.choice(SEARCH_TERMS),
+                }
+            _, elapsed = await client.request(msg, data)
+            round_trips[kind].append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        burst(client, len(range(worker, requests, in_flight)))
+        for client in clients for worker in range(in_flight)
+    ))
+    wall = time.perf_counter() - started
+
+    # Fan-out: every console changes title at once; a round ends when every Remote has every change.
+    devices = [driver._device_instances[device_id] for device_id in device_ids]
+    push_ms: list[float] = []
+    delivered_ms: list[float] = []
+    for round_index in range(FANOUT_ROUNDS):
+        targets = [client.entity_changes + consoles for client in clients]
+        for device in devices:
+            device._media_title = f"Title {round_index}"
+        started = time.perf_counter()
+        for device in devices:
+            device.push_update()
+        push_ms.append((time.perf_counter() - started) * 1000)
+        async with asyncio.timeout(30):
+            while any(client.entity_changes < target for client, target in zip(clients, targets)):
+                await asyncio.sleep(0.001)
+        delivered_ms.append((time.perf_counter() - started) * 1000)
+
+    for client in clients:
+        await client.close()
+    for device in devices:
+        await device.disconnect()
+
+    return {
+        "consoles": consoles,
+        "games": games,
+        "subscribe_ms": subscribe_ms,
+        "throughput": sum(len(samples) for samples in round_trips.values()) / wall,
+        "handler": {operation: _percentiles(samples) for operation, samples in timings.samples.items()},
+        "round_trip": {operation: _percentiles(samples) for operation, samples in round_trips.items()},
+        "fanout": {
+            "rounds": FANOUT_ROUNDS,
+            "push": _percentiles(push_ms),
+            "delivered": _percentiles(delivered_ms),
+            "events_per_round": consoles * remotes,
+        },
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _run_isolated(args: argparse.Namespace, consoles: int, games: int) -> dict:
+    with tempfile.TemporaryDirectory() as config_dir:
+        env = {
+            **os.environ,
+            "UC_CONFIG_HOME": config_dir,
+            "UC_INTEGRATION_HTTP_PORT": str(_free_port()),
+            "UC_INTEGRATION_INTERFACE": "127.0.0.1",
+            "UC_DISABLE_MDNS_PUBLISH": "true",
+            "UC_XBOX_WORKERS": "0",
+            "UC_XBOX_LOOP_WATCHDOG": "false",
+            "UC_LOG_LEVEL": "WARNING",
+        }
+        command = [
+            sys.executable, __file__, "--scenario", str(consoles), str(games),
+            "--remotes", str(args.remotes), "--requests", str(args.requests), "--in-flight", str(args.in_flight),
+            "--latency-ms", str(args.latency_ms),
+        ]
+        process = subprocess.run(command, env=env, capture_output=True, text=True)
+        if process.returncode:
+            raise SystemExit(f"Scenario {consoles} console(s), {games} games failed:\n{process.stderr}")
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def _print(result: dict) -> None:
+    print(f"\n{result['consoles']} console(s), {result['games']} games: "
+          f"{result['throughput']:.0f} req/s, subscribe {result['subscribe_ms']:.0f} ms")
+    print(f"  {'operation':<10} {'n':>5} {'handler p50':>12} {'p95':>8} {'p99':>8}"
+          f" {'round trip p50':>15} {'p95':>8} {'p99':>8}")
+    for operation in ("command", "browse", "search"):
+        handler = result["handler"].get(operation) or _percentiles([])
+        trip = result["round_trip"].get(operation) or _percentiles([])
+        print(f"  {operation:<10} {trip['n']:>5}"
+              f" {handler['p50']:>9.1f} ms {handler['p95']:>5.1f} ms {handler['p99']:>5.1f} ms"
+              f" {trip['p50']:>12.1f} ms {trip['p95']:>5.1f} ms {trip['p99']:>5.1f} ms")
+    fanout = result["fanout"]
+    print(f"  fan-out of {fanout['events_per_round']} entity changes per round: "
+          f"push p50 {fanout['push']['p50']:.2f} ms, every Remote updated p50 {fanout['delivered']['p50']:.1f} ms"
+          f" / p95 {fanout['delivered']['p95']:.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--consoles", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--games", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--remotes", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=200, help="requests per Remote")
+    parser.add_argument("--in-flight", type=int, default=4, help="concurrent requests per Remote")
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="simulated Xbox Live latency")
+    parser.add_argument("--scenario", type=int, nargs=2, metavar=("CONSOLES", "GAMES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        result = asyncio.run(scenario(
+            *args.scenario, args.remotes, args.requests, args.in_flight, args.latency_ms / 1000
+        ))
+        print(json.dumps(result))
+        return
+
+    print(f"{args.remotes} Remote(s), {args.requests} requests each with {args.in_flight} in flight, "
+          f"{args.latency_ms:.0f} ms simulated Xbox Live latency")
+    for consoles, games in itertools.product(args.consoles, args.games):
+        _print(_run_isolated(args, consoles, games))
+
+
+if __name__ == "__main__":
+    main()
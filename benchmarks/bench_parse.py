@@ -0,0 +1,183 @@
+"""
+Micro-benchmark: pythonxbox model validation vs. fast-path parsing.
+
+Run from the repository root:
+
+    python benchmarks/bench_parse.py
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pythonxbox.api.provider.people.models import PeopleResponse  # noqa: E402
+from pythonxbox.api.provider.smartglass.models import InstalledPackagesList  # noqa: E402
+from pythonxbox.api.provider.titlehub.models import TitleHubResponse  # noqa: E402
+
+from uc_intg_xbox.fastparse import (  # noqa: E402
+    loads,
+    parse_installed_games,
+    parse_people_presence,
+    parse_title,
+)
+
+XUID = "2533274800000000"
+ITERATIONS = 2000
+
+
+def _person() -> dict:
+    return {
+        "xuid": XUID,
+        "isFavorite": False,
+        "isFollowingCaller": False,
+        "isFollowedByCaller": False,
+        "isIdentityShared": False,
+        "displayName": "Player One",
+        "realName": "",
+        "displayPicRaw": "https://images-eds-ssl.xboxlive.com/image?url=abcdef&format=png",
+        "showUserAsAvatar": "1",
+        "gamertag": "Player One",
+        "gamerScore": "48210",
+        "modernGamertag": "Player One",
+        "modernGamertagSuffix": "",
+        "uniqueModernGamertag": "Player One",
+        "xboxOneRep": "GoodPlayer",
+        "presenceState": "Online",
+        "presenceText": "Playing Forza Horizon 5",
+        "isBroadcasting": False,
+        "isQuarantined": False,
+        "colorTheme": "gamerpicblur",
+        "preferredFlag": "",
+        "preferredPlatforms": [],
+        "isFriend": False,
+        "isFriendRequestReceived": False,
+        "isFriendRequestSent": False,
+        "isXbox360Gamerpic": False,
+        "lastSeenDateTimeUtc": "2025-01-01T12:00:00Z",
+        "presenceDetails": [
+            {
+                "IsBroadcasting": False,
+                "Device": "Scarlett",
+                "PresenceText": "Playing Forza Horizon 5",
+                "State": "Active",
+                "TitleId": "2030093255",
+                "IsPrimary": True,
+                "IsGame": True,
+                "RichPresenceText": "Cruising in Guanajuato",
+            },
+            {
+                "IsBroadcasting": False,
+                "Device": "Android",
+                "PresenceText": "Xbox App",
+                "State": "Active",
+                "TitleId": "328178078",
+                "IsPrimary": False,
+                "IsGame": False,
+            },
+        ],
+        "multiplayerSummary": {"inMultiplayerSession": 0, "inParty": 0},
+        "preferredColor": {"primaryColor": "107c10", "secondaryColor": "102b14", "tertiaryColor": "155715"},
+        "detail": {
+            "accountTier": "Gold",
+            "bio": "",
+            "isVerified": False,
+            "location": "",
+            "tenure": "12",
+            "watermarks": ["launch_team"],
+            "blocked": False,
+            "mute": False,
+            "followerCount": 120,
+            "followingCount": 80,
+            "hasGamePass": True,
+            "canBeFriended": True,
+            "canBeFollowed": True,
+            "isFriend": False,
+            "friendCount": 60,
+            "isFriendRequestReceived": False,
+            "isFriendRequestSent": False,
+            "isFriendListShared": True,
+            "isFollowingCaller": False,
+            "isFollowedByCaller": False,
+            "isFavorite": False,
+        },
+    }
+
+
+def _title() -> dict:
+    return {
+        "xuid": XUID,
+        "titles": [{
+            "titleId": "2030093255",
+            "pfn": "Microsoft.SunriseBaseGame_8wekyb3d8bbwe",
+            "name": "Forza Horizon 5",
+            "type": "Game",
+            "devices": ["XboxOne", "XboxSeries", "PC"],
+            "displayImage": "http://store-images.s-microsoft.com/image/apps.1234.png",
+            "mediaItemType": "Application",
+            "isBundle": False,
+            "images": [{"url": "http://store-images.s-microsoft.com/image/apps.5678.png", "type": "BoxArt"}],
+        }],
+    }
+
+
+def _installed_apps(count: int = 300) -> dict:
+    return {
+        "result": [
+            {
+                "oneStoreProductId": f"9N{index:010d}",
+                "titleId": 100000 + index,
+                "aumid": f"Game{index}_8wekyb3d8bbwe!App",
+                "lastActiveTime": "2025-01-01T12:00:00Z",
+                "name": f"Game {index}",
+                "contentType": "Game" if index % 5 else "App",
+                "storageDeviceId": "1",
+                "uniqueId": f"unique-{index}",
+                "version": 1,
+                "sizeInBytes": 50_000_000_000,
+                "installTime": "2024-06-01T12:00:00Z",
+                "updateTime": "2024-12-01T12:00:00Z",
+            }
+            for index in range(count)
+        ],
+        "status": {"errorCode": "OK"},
+    }
+
+
+def _model_presence(body: bytes):
+    batch = PeopleResponse.model_validate_json(body)
+    profile = next(p for p in batch.people if p.xuid == XUID)
+    return profile.presence_state, [(d.state, d.title_id) for d in profile.presence_details]
+
+
+def _run(label: str, func, body: bytes) -> float:
+    seconds = timeit.timeit(lambda: func(body), number=ITERATIONS)
+    per_call = seconds / ITERATIONS * 1e6
+    print(f"  {label:<10} {per_call:9.1f} us/call")
+    return per_call
+
+
+def main() -> None:
+    cases = [
+        ("peoplehub", json.dumps({"people": [_person()]}).encode(),
+         _model_presence, lambda body: parse_people_presence(body, XUID)),
+        ("titlehub", json.dumps(_title()).encode(),
+         TitleHubResponse.model_validate_json, parse_title),
+        ("installedApps", json.dumps(_installed_apps()).encode(),
+         InstalledPackagesList.model_validate_json, parse_installed_games),
+    ]
+    print(f"JSON decoder: {loads.__module__}, {ITERATIONS} iterations")
+    for name, body, model_path, fast_path in cases:
+        print(f"{name} ({len(body)} bytes)")
+        model = _run("pydantic", model_path, body)
+        fast = _run("fast path", fast_path, body)
+        print(f"  speedup    {model / fast:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: peoplehub batch vs. userpresence for reading presence.
+
+Compares payload size and parse time on representative responses. With
+``--config`` pointing at the integration's config.json, it also times real
+requests against both services using the stored tokens.
+
+Run from the repository root:
+
+    python benchmarks/bench_presence.py [--config ~/.config/uc-intg-xbox/config.json] [--requests 20]
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_parse import ITERATIONS, XUID, _person  # noqa: E402
+from pythonxbox.api.provider.people import PeopleProvider  # noqa: E402
+from pythonxbox.api.provider.people.models import PeopleDecoration, PeopleResponse  # noqa: E402
+from pythonxbox.api.provider.presence import PresenceProvider  # noqa: E402
+from pythonxbox.api.provider.presence.models import PresenceBatchResponse, PresenceLevel  # noqa: E402
+
+from uc_intg_xbox.client import XboxClient  # noqa: E402
+from uc_intg_xbox.fastparse import parse_people_presences, parse_user_presences  # noqa: E402
+
+
+def _user_presence() -> list:
+    return [{
+        "xuid": XUID,
+        "state": "Online",
+        "devices": [
+            {
+                "type": "Scarlett",
+                "titles": [
+                    {"id": "750323071", "name": "Home", "placement": "Background", "state": "Active",
+                     "lastModified": "2025-01-01T12:00:00Z"},
+                    {"id": "2030093255", "name": "Forza Horizon 5", "placement": "Full", "state": "Active",
+                     "lastModified": "2025-01-01T12:00:00Z"},
+                ],
+            },
+            {
+                "type": "Android",
+                "titles": [
+                    {"id": "328178078", "name": "Xbox App", "placement": "Background", "state": "Active",
+                     "lastModified": "2025-01-01T11:00:00Z"},
+                ],
+            },
+        ],
+    }]
+
+
+def _time(func, body: bytes) -> float:
+    return timeit.timeit(lambda: func(body), number=ITERATIONS) / ITERATIONS * 1e6
+
+
+def offline() -> None:
+    cases = [
+        ("peoplehub", json.dumps({"people": [_person()]}).encode(),
+         PeopleResponse.model_validate_json, parse_people_presences),
+        ("userpresence", json.dumps(_user_presence()).encode(),
+         PresenceBatchResponse.model_validate_json, parse_user_presences),
+    ]
+    print(f"Representative responses, {ITERATIONS} parses each")
+    print(f"  {'endpoint':<14} {'bytes':>7} {'pydantic':>11} {'fast path':>11}")
+    for name, body, model_path, fast_path in cases:
+        print(f"  {name:<14} {len(body):>7} {_time(model_path, body):>8.1f} us {_time(fast_path, body):>8.1f} us")
+
+
+async def live(config_path: Path, requests: int) -> None:
+    device = json.loads(config_path.read_text())[0]
+    client = XboxClient(device["client_id"], device.get("client_secret", ""))
+    if not await client.connect(device["tokens"]):
+        raise SystemExit("Could not authenticate with the stored tokens")
+    session = client._client.session
+    decoration = PeopleProvider.SEPERATOR.join([
+        PeopleDecoration.PREFERRED_COLOR,
+        PeopleDecoration.DETAIL,
+        PeopleDecoration.MULTIPLAYER_SUMMARY,
+        PeopleDecoration.PRESENCE_DETAIL,
+    ])
+    endpoints = {
+        "peoplehub": lambda: session.post(
+            f"{PeopleProvider.PEOPLE_URL}/users/me/people/batch/decoration/{decoration}",
+            json={"xuids": [client.xuid]}, headers=dict(client._client.people._headers)),
+        "userpresence": lambda: session.post(
+            f"{PresenceProvider.PRESENCE_URL}/users/batch",
+            json={"users": [client.xuid], "onlineOnly": False, "level": PresenceLevel.TITLE},
+            headers=dict(PresenceProvider.HEADERS_PRESENCE)),
+    }
+    print(f"Live requests, {requests} each (first request per endpoint discarded)")
+    print(f"  {'endpoint':<14} {'bytes':>7} {'p50':>9} {'p95':>9}")
+    try:
+        for name, request in endpoints.items():
+            (await request()).raise_for_status()
+            latencies, size = [], 0
+            for _ in range(requests):
+                started = time.perf_counter()
+                resp = await request()
+                latencies.append((time.perf_counter() - started) * 1000)
+                resp.raise_for_status()
+                size = len(resp.content)
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+            print(f"  {name:<14} {size:>7} {statistics.median(latencies):>6.1f} ms {p95:>6.1f} ms")
+    finally:
+        await client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--config", type=Path, help="integration config.json with stored tokens")
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+    offline()
+    if args.config:
+        asyncio.run(live(args.config.expanduser(), args.requests))
+
+
+if __name__ == "__main__":
+    main()
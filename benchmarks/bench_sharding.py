@@ -0,0 +1,118 @@
+"""
+Benchmark: poll throughput of the sharded driver mode by worker count.
+
+Simulated consoles run in shard workers. Each poll parses a peoplehub
+presence payload and publishes a snapshot to the coordinator, which is the
+same per-poll work and IPC path a real console takes. Run from the
+repository root:
+
+    python benchmarks/bench_sharding.py [--devices 256] [--seconds 5] [--workers 1 2 4]
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from uc_intg_xbox.config import XboxConfig  # noqa: E402
+from uc_intg_xbox.fastparse import parse_people_presence  # noqa: E402
+from uc_intg_xbox.sharding import ShardCoordinator  # noqa: E402
+
+XUID = "2533274800000000"
+PARSES_PER_POLL = 20
+
+BODY = json.dumps({
+    "people": [
+        {
+            "xuid": XUID,
+            "gamertag": "Player One",
+            "presenceState": "Online",
+            "presenceText": "Playing Forza Horizon 5",
+            "presenceDetails": [
+                {"Device": "Scarlett", "State": "Active", "TitleId": "2030093255",
+                 "IsPrimary": True, "IsGame": True, "PresenceText": "Forza Horizon 5"},
+                {"Device": "Android", "State": "Active", "TitleId": "328178078",
+                 "IsPrimary": False, "IsGame": False, "PresenceText": "Xbox App"},
+            ],
+        }
+        for _ in range(8)
+    ]
+}).encode()
+
+
+class BenchDevice:
+    """Polls as fast as it can and publishes a snapshot after every poll."""
+
+    def __init__(self, device_config: XboxConfig, publish):
+        self._publish = publish
+        self._task: asyncio.Task | None = None
+
+    async def connect(self) -> bool:
+        self._task = asyncio.create_task(self._poll_loop())
+        return True
+
+    async def disconnect(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+    async def _poll_loop(self) -> None:
+        while True:
+            for _ in range(PARSES_PER_POLL):
+                presence = parse_people_presence(BODY, XUID)
+            self._publish("state", {"state": "ON", "presence_state": presence["state"]})
+            await asyncio.sleep(0)
+
+
+def bench_device(device_config: XboxConfig, publish) -> BenchDevice:
+    return BenchDevice(device_config, publish)
+
+
+async def run(workers: int, devices: int, seconds: float) -> float:
+    loop = asyncio.get_running_loop()
+    coordinator = ShardCoordinator(workers, factory=bench_device)
+    updates = 0
+
+    def on_message(kind, _payload):
+        nonlocal updates
+        if kind == "state":
+            updates += 1
+
+    for index in range(devices):
+        device_id = f"xbox_bench_{index}"
+        coordinator.attach(device_id, XboxConfig(identifier=device_id, name=device_id), on_message, loop)
+    await asyncio.gather(*(coordinator.call(device_id, "connect") for device_id in coordinator.device_ids))
+
+    updates = 0
+    started = time.perf_counter()
+    await asyncio.sleep(seconds)
+    rate = updates / (time.perf_counter() - started)
+    await coordinator.stop()
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", type=int, default=256)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"{args.devices} simulated consoles, {os.cpu_count()} CPU(s)")
+    print(f"{'workers':>8} {'polls/s':>12} {'scaling':>8}")
+    baseline = None
+    for workers in args.workers:
+        rate = asyncio.run(run(workers, args.devices, args.seconds))
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>12.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
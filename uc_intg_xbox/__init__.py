@@ -8,6 +8,7 @@ Xbox Integration for Unfolded Circle Remote Two/3.
 import asyncio
 import json
 import logging
+import multiprocessing
 import os
 import sys
 from pathlib import Path
@@ -30,23 +31,46 @@ async def main():
     from ucapi import DeviceStates
     from ucapi_framework import BaseConfigManager, get_config_path
 
+    from uc_intg_xbox import diagnostics
     from uc_intg_xbox.config import XboxConfig
+    from uc_intg_xbox.const import (
+        DIAGNOSTICS_HOST,
+        DIAGNOSTICS_PORT,
+        FAILOVER,
+        HISTORY_RETENTION_DAYS,
+        HTTP_API_HOST,
+        HTTP_API_PORT,
+        HTTP_API_TOKEN,
+        LOG_FORMAT,
+        LOG_RATE_LIMIT,
+        LOG_RING_SIZE,
+        LOOP_WATCHDOG,
+    )
     from uc_intg_xbox.driver import XboxDriver
+    from uc_intg_xbox.failover import stand_by, warm_standby
+    from uc_intg_xbox.history import session_history
+    from uc_intg_xbox.http_api import HttpApiServer
+    from uc_intg_xbox.logs import configure_logging
+    from uc_intg_xbox.prefetch import artwork_cache
     from uc_intg_xbox.setup_flow import XboxSetupFlow
-
-    level = os.getenv("UC_LOG_LEVEL", "DEBUG").upper()
-    logging.basicConfig(
-        level=getattr(logging, level, logging.DEBUG),
-        format="%(asctime)s | %(levelname)-8s | %(name)-25s | %(message)s",
+    from uc_intg_xbox.watchdog import LoopWatchdog
+
+    level = os.getenv("UC_LOG_LEVEL", "INFO").upper()
+    configure_logging(
+        getattr(logging, level, logging.INFO),
+        fmt=LOG_FORMAT,
+        rate_limit=LOG_RATE_LIMIT,
+        ring_size=LOG_RING_SIZE,
     )
-    logging.getLogger("aiohttp").setLevel(logging.WARNING)
-    logging.getLogger("websockets.server").setLevel(logging.CRITICAL)
-    logging.getLogger("httpx").setLevel(logging.WARNING)
-    logging.getLogger("httpcore").setLevel(logging.WARNING)
 
     _LOG = logging.getLogger(__name__)
     _LOG.info("Starting Xbox Integration v%s", __version__)
 
+    if LOOP_WATCHDOG:
+        watchdog = LoopWatchdog()
+        watchdog.start()
+        diagnostics.register("loop", watchdog.report)
+
     driver = XboxDriver()
     config_path = get_config_path(driver.api.config_dir_path or "")
     config_manager = BaseConfigManager(
@@ -56,18 +80,41 @@ async def main():
         config_class=XboxConfig,
     )
     driver.config_manager = config_manager
+    if FAILOVER:
+        await stand_by(config_path, config_manager)
+
+    if DIAGNOSTICS_PORT:
+        await diagnostics.DiagnosticsServer(DIAGNOSTICS_PORT, host=DIAGNOSTICS_HOST, token=HTTP_API_TOKEN).start()
+
+    artwork_cache().configure(os.path.join(config_path, "artwork"))
+    if HISTORY_RETENTION_DAYS:
+        await session_history().start(os.path.join(config_path, "history.db"))
 
     setup_handler = XboxSetupFlow.create_handler(driver)
     await driver.api.init(_get_driver_json_path(), setup_handler)
-    await driver.register_all_device_instances(connect=False)
+    # After a takeover the warm clients are waiting, so polling resumes without waiting for the Remote.
+    await driver.register_all_device_instances(connect=bool(warm_standby().promoted_at))
+
+    if HTTP_API_PORT:
+        await HttpApiServer(
+            driver.xbox_devices, driver.state_feed, HTTP_API_PORT, host=HTTP_API_HOST, token=HTTP_API_TOKEN
+        ).start()
 
     device_count = len(list(config_manager.all()))
     await driver.api.set_device_state(
         DeviceStates.CONNECTED if device_count > 0 else DeviceStates.DISCONNECTED
     )
     _LOG.info("Xbox Integration started - %d device(s) configured", device_count)
-    await asyncio.Future()
+    try:
+        await asyncio.Future()
+    finally:
+        # Sessions still running at shutdown end now rather than being lost.
+        for device in driver.xbox_devices().values():
+            device.end_session()
+        await session_history().stop()
 
 
 if __name__ == "__main__":
+    # Shard workers are spawned from the frozen driver binary.
+    multiprocessing.freeze_support()
     asyncio.run(main())
@@ -1,8 +1,11 @@
 """Xbox Integration entry point."""
 
 import asyncio
+import multiprocessing
 
 from uc_intg_xbox import main
 
 if __name__ == "__main__":
+    # Shard workers are spawned from the frozen driver binary.
+    multiprocessing.freeze_support()
     asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Concurrent command broadcast to a group of consoles.
+
+Every console gets the command at the same time, up to a concurrency limit,
+and each one has its own deadline, so a group action takes as long as the
+slowest console rather than the sum of all of them.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+from uc_intg_xbox import diagnostics
+from uc_intg_xbox.const import BROADCAST_CONCURRENCY, BROADCAST_TIMEOUT
+
+if TYPE_CHECKING:
+    from uc_intg_xbox.device import XboxDevice
+
+_LOG = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class BroadcastResult:
+    device_id: str
+    name: str
+    ok: bool
+    elapsed_ms: float
+    error: str = ""
+
+
+async def broadcast(
+    devices: Mapping[str, "XboxDevice"],
+    command: str,
+    concurrency: int = BROADCAST_CONCURRENCY,
+    timeout: float = BROADCAST_TIMEOUT,
+) -> list[BroadcastResult]:
+    """Send ``command`` to every device; returns one result per device, in the given order."""
+    slots = asyncio.Semaphore(max(concurrency, 1))
+
+    async def send(device_id: str, device: "XboxDevice") -> BroadcastResult:
+        async with slots:
+            started = time.monotonic()
+            try:
+                async with asyncio.timeout(timeout):
+                    ok = await device.send_command(command)
+                error = "" if ok else "rejected"
+            except TimeoutError:
+                ok, error = False, f"timed out after {timeout:.0f}s"
+            except Exception as err:
+                ok, error = False, str(err) or type(err).__name__
+            return BroadcastResult(device_id, device.name, ok, (time.monotonic() - started) * 1000, error)
+
+    started = time.monotonic()
+    results = list(await asyncio.gather(*(send(device_id, device) for device_id, device in devices.items())))
+    _last.update(command=command, at=time.time(), elapsed_ms=round((time.monotonic() - started) * 1000, 1),
+                 results=[asdict(result) for result in results])
+    _LOG.info("Broadcast %s: %s", command, summarize(results))
+    return results
+
+
+def summarize(results: list[BroadcastResult]) -> str:
+    """One line for a sensor: success count, then each failure."""
+    if not results:
+        return "No consoles"
+    ok = sum(result.ok for result in results)
+    failures = [f"{result.name}: {result.error}" for result in results if not result.ok]
+    return "; ".join([f"{ok}/{len(results)} OK", *failures])
+
+
+_last: dict = {}
+
+diagnostics.register("broadcast", lambda: dict(_last))
@@ -5,36 +5,136 @@ Xbox Live API client.
 :license: MPL-2.0, see LICENSE for more details.
 """
 
+import asyncio
+import hashlib
 import logging
 import ssl
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
 
 import certifi
 import httpx
 from pythonxbox.api.client import XboxLiveClient
+from pythonxbox.api.provider.people import PeopleProvider
+from pythonxbox.api.provider.people.models import PeopleDecoration
+from pythonxbox.api.provider.presence import PresenceProvider
+from pythonxbox.api.provider.presence.models import PresenceLevel
+from pythonxbox.api.provider.smartglass import SmartglassProvider
 from pythonxbox.api.provider.smartglass.models import (
     GuideTab,
     InputKeyType,
+    InstalledPackagesList,
+    SmartglassConsoleList,
+    SmartglassConsoleStatus,
     VolumeDirection,
 )
+from pythonxbox.api.provider.titlehub import TitlehubProvider
+from pythonxbox.api.provider.titlehub.models import TitleFields
 from pythonxbox.authentication.manager import AuthenticationManager
 from pythonxbox.authentication.models import OAuth2TokenResponse
 
-from uc_intg_xbox.const import OAUTH_REDIRECT_URI
+from uc_intg_xbox.const import (
+    CONSOLE_PRESENCE_DEVICES,
+    CONSOLE_STATUS_TTL,
+    ENRICH_CONCURRENCY,
+    FAST_PARSE,
+    LOCAL_DEADLINE_SHARE,
+    LOCAL_RETRY_INTERVAL,
+    OAUTH_REDIRECT_URI,
+    RTA_URL,
+    SOCIAL_REFRESH_INTERVAL,
+    WARM_IDLE_TIMEOUT,
+    WARM_KEEPALIVE_EXPIRY,
+    WARM_PING_INTERVAL,
+    WARM_TIMEOUT,
+)
+from uc_intg_xbox.deadlines import (
+    apply_deadline,
+    deadline,
+    deadline_share,
+    hedged,
+)
+from uc_intg_xbox.fastparse import (
+    PRIMARY_PLACEMENTS,
+    parse_console_list,
+    parse_console_status,
+    parse_installed_games,
+    parse_people_presences,
+    parse_title,
+    parse_title_history,
+    parse_user_presences,
+)
+from uc_intg_xbox.library import Game, GameLibrary, GameStore, shared_store
+from uc_intg_xbox.local_smartglass import LocalSmartGlass
+from uc_intg_xbox.prefetch import (
+    artwork_cache,
+    release_title_prefetcher,
+    title_prefetcher,
+)
+from uc_intg_xbox.rta import EventCallback, RtaSubscription
+from uc_intg_xbox.tracing import httpx_event_hooks, span
 
 _LOG = logging.getLogger(__name__)
 
 
+@dataclass
+class TransportStats:
+    count: int = 0
+    total_ms: float = 0.0
+    last_ms: float = 0.0
+
+    @property
+    def average_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+def _event_hooks() -> dict[str, list]:
+    tracing_hooks = httpx_event_hooks()
+    return {
+        "request": [apply_deadline, *tracing_hooks.get("request", ())],
+        "response": list(tracing_hooks.get("response", ())),
+    }
+
+
+@dataclass
+class _ConsoleList:
+    fetched_at: float = 0.0
+    power: dict[str, str] | None = None
+    fetch: asyncio.Future | None = None
+
+
+# One console list answers for every console of an account.
+_CONSOLE_LISTS: dict[str, _ConsoleList] = {}
+
+
 class XboxClient:
     """Xbox Live API client wrapper."""
 
-    def __init__(self, client_id: str, client_secret: str = ""):
+    def __init__(self, client_id: str, client_secret: str = "", rta_url: str = RTA_URL):
         self._client_id = client_id
         self._client_secret = client_secret
+        self._rta_url = rta_url
         self._session: httpx.AsyncClient | None = None
         self._auth_mgr: AuthenticationManager | None = None
         self._client: XboxLiveClient | None = None
         self._xuid: str | None = None
         self._gamertag: str = "Xbox User"
+        self._household: tuple[str, ...] = ()
+        self._social: dict[str, dict] = {}
+        self._social_at: float = 0.0
+        self._title_is_game: dict[str, bool] = {}
+        self._local: LocalSmartGlass | None = None
+        self._local_retry_at: float = 0.0
+        self._transport_stats: dict[str, TransportStats] = {}
+        self._last_transport: str = ""
+        self._apps_validators: dict[str, tuple[str, str]] = {}
+        self._focus_apps: dict[str, tuple[float, str]] = {}
+        self._enrichments: dict[str, asyncio.Task] = {}
+        self._enrich_slots = asyncio.Semaphore(ENRICH_CONCURRENCY)
+        self._games: GameStore | None = None
+        self._warm_until: float = 0.0
+        self._warm_task: asyncio.Task | None = None
 
     @property
     def xuid(self) -> str | None:
@@ -48,9 +148,28 @@ class XboxClient:
     def is_connected(self) -> bool:
         return self._client is not None
 
+    @property
+    def last_transport(self) -> str:
+        return self._last_transport
+
+    @property
+    def transport_stats(self) -> dict[str, TransportStats]:
+        return self._transport_stats
+
+    def set_household(self, xuids: list[str]) -> None:
+        """Also resolve presence for these users, who may be the ones playing on this console."""
+        self._household = tuple(dict.fromkeys(x for x in xuids if x))
+
+    def enable_local_transport(self, liveid: str, address: str = "") -> None:
+        self._local = LocalSmartGlass(liveid, address)
+
     async def connect(self, tokens: dict) -> dict | None:
         ssl_context = ssl.create_default_context(cafile=certifi.where())
-        self._session = httpx.AsyncClient(verify=ssl_context)
+        self._session = httpx.AsyncClient(
+            verify=ssl_context,
+            event_hooks=_event_hooks(),
+            limits=httpx.Limits(keepalive_expiry=WARM_KEEPALIVE_EXPIRY),
+        )
 
         self._auth_mgr = AuthenticationManager(
             self._session, self._client_id, self._client_secret, OAUTH_REDIRECT_URI
@@ -62,6 +181,7 @@ class XboxClient:
 
         self._client = XboxLiveClient(self._auth_mgr)
         self._xuid = self._client.xuid
+        self._games = shared_store(self._xuid)
 
         try:
             profile = await self._client.profile.get_profile_by_xuid(self._xuid)
@@ -84,7 +204,59 @@ class XboxClient:
             _LOG.error("Token refresh failed: %s", err)
             return None
 
+    def create_presence_subscription(self, on_event: EventCallback) -> RtaSubscription:
+        base = f"https://userpresence.xboxlive.com/users/xuid({self._xuid})"
+        return RtaSubscription(
+            self._authorization_header,
+            [f"{base}/richpresence", f"{base}/devices"],
+            on_event,
+            url=self._rta_url,
+        )
+
+    async def _authorization_header(self) -> str:
+        await self._auth_mgr.refresh_tokens()
+        return self._auth_mgr.xsts_token.authorization_header_value
+
+    def keep_warm(self) -> None:
+        """Keep connections to the command and presence hosts open for the next WARM_IDLE_TIMEOUT."""
+        self._warm_until = time.monotonic() + WARM_IDLE_TIMEOUT
+        if self._warm_task is None or self._warm_task.done():
+            self._warm_task = asyncio.create_task(self._keep_warm())
+
+    async def _keep_warm(self) -> None:
+        _LOG.debug("Keeping Xbox Live connections warm")
+        while self._session and time.monotonic() < self._warm_until:
+            await asyncio.gather(
+                self._warm_local(),
+                *(self._warm_host(url) for url in (SmartglassProvider.SG_URL, PresenceProvider.PRESENCE_URL)),
+            )
+            await asyncio.sleep(WARM_PING_INTERVAL)
+        # Without further traffic the pool closes them after WARM_KEEPALIVE_EXPIRY.
+        _LOG.debug("No activity for %ds, letting warm connections expire", WARM_IDLE_TIMEOUT)
+
+    async def _warm_host(self, url: str) -> None:
+        try:
+            await self._session.head(f"{url}/", timeout=WARM_TIMEOUT)
+        except httpx.HTTPError as err:
+            _LOG.debug("Could not warm connection to %s: %s", url, err)
+
+    async def _warm_local(self) -> None:
+        if not self._local or time.monotonic() < self._local_retry_at:
+            return
+        try:
+            await self._local.ensure_connected()
+        except Exception as err:
+            _LOG.debug("Could not warm local connection: %s", err)
+
     async def close(self) -> None:
+        if self._warm_task and not self._warm_task.done():
+            self._warm_task.cancel()
+        self._warm_task = None
+        if self._xuid:
+            release_title_prefetcher(self._xuid, self)
+        if self._local:
+            await self._local.close()
+            self._local = None
         if self._session and not self._session.is_closed:
             await self._session.aclose()
         self._session = None
@@ -93,14 +265,15 @@ class XboxClient:
 
     async def test_connection(self) -> bool:
         try:
-            await self._client.people.get_friends_own_batch([self._xuid])
+            await self._client.presence.get_presence_own(PresenceLevel.USER)
             return True
         except Exception:
             return False
 
     async def turn_on(self, liveid: str) -> None:
         try:
-            await self._client.smartglass.wake_up(liveid)
+            async with deadline("command"):
+                await self._client.smartglass.wake_up(liveid)
         except httpx.HTTPStatusError as err:
             if err.response.status_code == 404:
                 raise ValueError(
@@ -109,133 +282,497 @@ class XboxClient:
             raise
 
     async def turn_off(self, liveid: str) -> None:
-        await self._client.smartglass.turn_off(liveid)
+        await self._dispatch(
+            "TurnOff",
+            lambda local: local.power_off(),
+            lambda: self._client.smartglass.turn_off(liveid),
+        )
 
     async def press_button(self, liveid: str, button: str) -> None:
         button_enum = InputKeyType(button)
-        await self._client.smartglass.press_button(liveid, button_enum)
+        await self._dispatch(
+            button,
+            lambda local: local.press_button(button),
+            lambda: self._client.smartglass.press_button(liveid, button_enum),
+        )
 
     async def change_volume(self, liveid: str, direction: str) -> None:
         direction_enum = VolumeDirection(direction)
-        await self._client.smartglass.volume(liveid, direction_enum)
+        async with deadline("command"):
+            await self._client.smartglass.volume(liveid, direction_enum)
 
     async def mute(self, liveid: str) -> None:
-        await self._client.smartglass.mute(liveid)
+        async with deadline("command"):
+            await self._client.smartglass.mute(liveid)
 
     async def show_guide(self, liveid: str) -> None:
-        await self._client.smartglass.show_guide_tab(liveid, GuideTab.Guide)
+        await self._dispatch(
+            "Guide",
+            lambda local: local.press_button("Guide"),
+            lambda: self._client.smartglass.show_guide_tab(liveid, GuideTab.Guide),
+        )
 
     async def go_home(self, liveid: str) -> None:
-        await self._client.smartglass.go_home(liveid)
+        async with deadline("command"):
+            await self._client.smartglass.go_home(liveid)
 
     async def go_back(self, liveid: str) -> None:
-        await self._client.smartglass.go_back(liveid)
+        await self._dispatch(
+            "Back",
+            lambda local: local.press_button("B"),
+            lambda: self._client.smartglass.go_back(liveid),
+        )
 
     async def play(self, liveid: str) -> None:
-        await self._client.smartglass.play(liveid)
+        await self._dispatch(
+            "Play",
+            lambda local: local.media_command("Play"),
+            lambda: self._client.smartglass.play(liveid),
+        )
 
     async def pause(self, liveid: str) -> None:
-        await self._client.smartglass.pause(liveid)
+        await self._dispatch(
+            "Pause",
+            lambda local: local.media_command("Pause"),
+            lambda: self._client.smartglass.pause(liveid),
+        )
 
     async def next_track(self, liveid: str) -> None:
-        await self._client.smartglass.next(liveid)
+        await self._dispatch(
+            "Next",
+            lambda local: local.media_command("Next"),
+            lambda: self._client.smartglass.next(liveid),
+        )
 
     async def previous_track(self, liveid: str) -> None:
-        await self._client.smartglass.previous(liveid)
+        await self._dispatch(
+            "Previous",
+            lambda local: local.media_command("Previous"),
+            lambda: self._client.smartglass.previous(liveid),
+        )
+
+    async def _dispatch(
+        self,
+        command: str,
+        local_call: Callable[[LocalSmartGlass], Awaitable],
+        cloud_call: Callable[[], Awaitable],
+    ) -> None:
+        async with deadline("command"):
+            await self._dispatch_within_deadline(command, local_call, cloud_call)
+
+    async def _dispatch_within_deadline(
+        self,
+        command: str,
+        local_call: Callable[[LocalSmartGlass], Awaitable],
+        cloud_call: Callable[[], Awaitable],
+    ) -> None:
+        if self._local and time.monotonic() >= self._local_retry_at:
+            start = time.perf_counter()
+            try:
+                with span("client.local", command=command):
+                    async with deadline_share(LOCAL_DEADLINE_SHARE):
+                        await local_call(self._local)
+                self._record_transport("local", command, start)
+                return
+            except Exception as err:
+                _LOG.debug("Local %s failed, falling back to cloud: %s", command, err)
+                self._local_retry_at = time.monotonic() + LOCAL_RETRY_INTERVAL
+        start = time.perf_counter()
+        with span("client.cloud", command=command):
+            await cloud_call()
+        self._record_transport("cloud", command, start)
+
+    def _record_transport(self, transport: str, command: str, start: float) -> None:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        stats = self._transport_stats.setdefault(transport, TransportStats())
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        stats.last_ms = elapsed_ms
+        self._last_transport = transport
+        _LOG.debug("Command %s via %s took %.0f ms (avg %.0f ms over %d)",
+                   command, transport, elapsed_ms, stats.average_ms, stats.count)
 
     async def get_presence(self, liveid: str) -> dict | None:
         try:
-            batch = await self._client.people.get_friends_own_batch([self._xuid])
-            people = getattr(batch, "people", None) or []
-            profile = next((p for p in people if getattr(p, "xuid", None) == self._xuid), None)
-
-            if not profile:
-                _LOG.debug("Presence: own XUID %s not found in %d people", self._xuid, len(people))
+            profiles = await hedged("presence", self._fetch_presence_profiles)
+            if not profiles.get(self._xuid):
+                _LOG.debug("Presence: own XUID %s not found", self._xuid)
                 return None
-
-            presence_state = getattr(profile, "presence_state", "Offline")
+            await self._classify_titles(profiles)
+
+            xuid, profile = self._active_player(profiles)
+            social = self._social.get(xuid, {})
+            presence_state = profile["state"]
+            # From the cached peoplehub profiles; surfaced for the supplementary sensors.
+            extras = {
+                "player": social.get("gamertag") or self._gamertag,
+                "player_xuid": xuid,
+                "gamerscore": self._social.get(self._xuid, {}).get("gamerscore", ""),
+                "status": profile["text"] or "",
+                "last_seen": profile.get("last_seen", ""),
+                "in_party": social.get("in_party", False),
+                "in_multiplayer": social.get("in_multiplayer", False),
+            }
 
             if presence_state == "Offline":
-                return {"state": "OFF", "title": "Offline", "image": ""}
+                return {"state": "OFF", "title": "Offline", "image": "", **extras}
 
-            presence_text = getattr(profile, "presence_text", None)
-            presence_details = getattr(profile, "presence_details", None) or []
-            _LOG.debug("Presence: state=%s, text=%s, details=%d",
-                       presence_state, presence_text, len(presence_details))
+            presence_text = profile["text"]
+            presence_details = profile["details"]
+            # One record per poll; the details list is only formatted if the record is written.
+            _LOG.debug("Presence: player=%s, state=%s, text=%s, details=%s",
+                       xuid, presence_state, presence_text, presence_details)
 
             for detail in presence_details:
-                detail_state = getattr(detail, "state", None)
-                is_primary = getattr(detail, "is_primary", False)
-                is_game = getattr(detail, "is_game", False)
-                title_id = getattr(detail, "title_id", None)
-                _LOG.debug("Presence detail: state=%s, is_game=%s, is_primary=%s, title_id=%s",
-                           detail_state, is_game, is_primary, title_id)
-
-                if detail_state == "Active" and title_id and is_game and is_primary:
+                title_id = detail["title_id"]
+                if detail["state"] == "Active" and title_id and detail["is_game"] and detail["is_primary"]:
                     try:
-                        title_response = await self._client.titlehub.get_title_info(title_id)
-                        titles = getattr(title_response, "titles", None) or []
-                        if titles:
-                            title_data = titles[0]
-                            image = getattr(title_data, "display_image", "") or ""
-                            if image.startswith("http://"):
-                                image = "https://" + image[7:]
-                            return {
-                                "state": "PLAYING",
-                                "title": title_data.name,
-                                "image": image,
-                            }
+                        title = await self._get_title_info(title_id)
+                        if title:
+                            image = artwork_cache().get(title_id) or title[1]
+                            return {"state": "PLAYING", "title": title[0], "image": image,
+                                    "title_id": title_id, **extras}
                     except Exception as err:
                         _LOG.error("Failed to fetch title info for %s: %s", title_id, err)
 
-            return {"state": "ON", "title": presence_text or "Online", "image": ""}
+            return {"state": "ON", "title": presence_text or "Online", "image": "", **extras}
 
         except Exception as err:
             _LOG.debug("Failed to get presence: %s (%s)", err, type(err).__name__)
             return None
 
-    async def get_installed_apps(self, liveid: str) -> list[dict]:
+    def _active_player(self, profiles: dict[str, dict]) -> tuple[str, dict]:
+        """Pick the user whose presence is on a console, preferring one in a game, then the owner.
+
+        Presence details only carry the device type, so any console counts, not just this one.
+        """
+        best: tuple[int, str, dict] | None = None
+        for xuid in (self._xuid, *self._household):
+            profile = profiles.get(xuid)
+            if not profile:
+                continue
+            on_console = [
+                detail for detail in profile["details"]
+                if detail["state"] == "Active" and detail.get("device") in CONSOLE_PRESENCE_DEVICES
+            ]
+            if not on_console:
+                continue
+            rank = 2 if any(detail["is_game"] and detail["is_primary"] for detail in on_console) else 1
+            if best is None or rank > best[0]:
+                best = (rank, xuid, profile)
+        if best is None:
+            return self._xuid, profiles[self._xuid]
+        return best[1], best[2]
+
+    async def _fetch_presence_profiles(self) -> dict[str, dict]:
+        xuids = [self._xuid, *(x for x in self._household if x != self._xuid)]
+        if FAST_PARSE:
+            resp = await self._client.session.post(
+                f"{PresenceProvider.PRESENCE_URL}/users/batch",
+                json={"users": xuids, "onlineOnly": False, "level": PresenceLevel.TITLE},
+                headers=dict(PresenceProvider.HEADERS_PRESENCE),
+            )
+            resp.raise_for_status()
+            return parse_user_presences(resp.content)
+
+        profiles = {}
+        for item in await self._client.presence.get_presence_batch(xuids, presence_level=PresenceLevel.TITLE):
+            titles = [
+                (device.type or "", title) for device in item.devices or () for title in device.titles or ()
+            ]
+            primary = next((title for _, title in titles if title.placement in PRIMARY_PLACEMENTS), None)
+            profiles[item.xuid] = {
+                "state": item.state or "Offline",
+                "text": primary.name if primary else None,
+                "last_seen": item.last_seen.timestamp if item.last_seen else "",
+                "details": [
+                    {
+                        "state": title.state,
+                        "device": device,
+                        "is_game": None,
+                        "is_primary": title.placement in PRIMARY_PLACEMENTS,
+                        "title_id": title.id,
+                    }
+                    for device, title in titles
+                ],
+            }
+        return profiles
+
+    async def _classify_titles(self, profiles: dict[str, dict]) -> None:
+        """Fill in ``is_game``, refreshing the peoplehub profiles when a title is new or they are stale."""
+        unknown = {
+            detail["title_id"]
+            for profile in profiles.values()
+            for detail in profile["details"]
+            if detail["is_primary"] and detail["title_id"] and detail["title_id"] not in self._title_is_game
+        }
+        if unknown or time.monotonic() - self._social_at >= SOCIAL_REFRESH_INTERVAL:
+            try:
+                await self._refresh_social()
+            except Exception as err:
+                _LOG.debug("Profile refresh failed: %s (%s)", err, type(err).__name__)
+            # Titles peoplehub could not classify count as games when they are in the library.
+            for title_id in unknown - self._title_is_game.keys():
+                self._title_is_game[title_id] = bool(self._games and self._games.by_title_id(title_id))
+        for profile in profiles.values():
+            for detail in profile["details"]:
+                detail["is_game"] = self._title_is_game.get(detail["title_id"], False)
+
+    async def _refresh_social(self) -> None:
+        async with deadline("presence"):
+            self._social = await self._fetch_social_profiles()
+        self._social_at = time.monotonic()
+        for profile in self._social.values():
+            for detail in profile["details"]:
+                if detail["title_id"]:
+                    self._title_is_game[detail["title_id"]] = bool(detail["is_game"])
+
+    async def _fetch_social_profiles(self) -> dict[str, dict]:
+        xuids = [self._xuid, *(x for x in self._household if x != self._xuid)]
+        if FAST_PARSE:
+            decoration = PeopleProvider.SEPERATOR.join([
+                PeopleDecoration.PREFERRED_COLOR,
+                PeopleDecoration.DETAIL,
+                PeopleDecoration.MULTIPLAYER_SUMMARY,
+                PeopleDecoration.PRESENCE_DETAIL,
+            ])
+            resp = await self._client.session.post(
+                f"{PeopleProvider.PEOPLE_URL}/users/me/people/batch/decoration/{decoration}",
+                json={"xuids": xuids},
+                headers=dict(self._client.people._headers),
+            )
+            resp.raise_for_status()
+            return parse_people_presences(resp.content)
+
+        batch = await self._client.people.get_friends_own_batch(xuids)
+        profiles = {}
+        for profile in getattr(batch, "people", None) or []:
+            last_seen = getattr(profile, "last_seen_date_time_utc", None)
+            multiplayer = getattr(profile, "multiplayer_summary", None)
+            profiles[getattr(profile, "xuid", None)] = {
+                "gamertag": getattr(profile, "gamertag", "") or "",
+                "state": getattr(profile, "presence_state", "Offline"),
+                "text": getattr(profile, "presence_text", None),
+                "gamerscore": getattr(profile, "gamer_score", "") or "",
+                "last_seen": last_seen.isoformat() if last_seen else "",
+                "in_party": bool(multiplayer and multiplayer.in_party),
+                "in_multiplayer": bool(multiplayer and multiplayer.in_multiplayer_session),
+                "details": [
+                    {
+                        "state": getattr(detail, "state", None),
+                        "device": getattr(detail, "device", "") or "",
+                        "is_game": getattr(detail, "is_game", False),
+                        "is_primary": getattr(detail, "is_primary", False),
+                        "title_id": getattr(detail, "title_id", None),
+                    }
+                    for detail in getattr(profile, "presence_details", None) or []
+                ],
+            }
+        return profiles
+
+    async def get_console_power(self, liveid: str) -> str | None:
+        """Return the console's power state from the account's cached console list."""
+        entry = _CONSOLE_LISTS.setdefault(self._xuid, _ConsoleList())
+        if entry.power is None or time.monotonic() - entry.fetched_at >= CONSOLE_STATUS_TTL:
+            if entry.fetch is None or entry.fetch.done():
+                entry.fetch = asyncio.ensure_future(self._refresh_console_list(entry))
+            try:
+                await asyncio.shield(entry.fetch)
+            except Exception as err:
+                _LOG.debug("Console list unavailable: %s (%s)", err, type(err).__name__)
+                return None
+        return entry.power.get(liveid.upper()) if entry.power else None
+
+    async def _refresh_console_list(self, entry: _ConsoleList) -> None:
+        entry.power = await hedged("console", self._fetch_console_list)
+        entry.fetched_at = time.monotonic()
+
+    async def _fetch_console_list(self) -> dict[str, str]:
+        if FAST_PARSE:
+            resp = await self._client.session.get(
+                f"{SmartglassProvider.SG_URL}/lists/devices",
+                params={"queryCurrentDevice": "false", "includeStorageDevices": "false"},
+                headers=dict(SmartglassProvider.HEADERS_SG),
+            )
+            resp.raise_for_status()
+            return parse_console_list(resp.content)
+        result: SmartglassConsoleList = await self._client.smartglass.get_console_list(include_storage_devices=False)
+        return {console.id.upper(): str(console.power_state) for console in result.result}
+
+    async def get_focus_app(self, liveid: str) -> str:
+        """Return the AUMID of the app in focus on the console, cached for CONSOLE_STATUS_TTL."""
+        fetched_at, aumid = self._focus_apps.get(liveid, (0.0, ""))
+        if time.monotonic() - fetched_at < CONSOLE_STATUS_TTL:
+            return aumid
         try:
-            result = await self._client.smartglass.get_installed_apps(liveid)
-            apps = result.result if result else []
-            games = []
-            for app in apps:
-                if not app.one_store_product_id:
-                    continue
-                if app.content_type and app.content_type != "Game":
-                    continue
-                games.append({
-                    "one_store_product_id": app.one_store_product_id,
-                    "title_id": str(app.title_id) if app.title_id else "",
-                    "name": app.name or f"Game {app.title_id or 'Unknown'}",
-                    "image": "",
-                })
-            return await self._enrich_game_images(games)
+            _, aumid = await hedged("console", lambda: self._fetch_console_status(liveid))
+        except Exception as err:
+            _LOG.debug("Console status unavailable: %s (%s)", err, type(err).__name__)
+            return ""
+        self._focus_apps[liveid] = (time.monotonic(), aumid)
+        return aumid
+
+    async def _fetch_console_status(self, liveid: str) -> tuple[str, str]:
+        if FAST_PARSE:
+            resp = await self._client.session.get(
+                f"{SmartglassProvider.SG_URL}/consoles/{liveid}", headers=dict(SmartglassProvider.HEADERS_SG)
+            )
+            resp.raise_for_status()
+            return parse_console_status(resp.content)
+        status: SmartglassConsoleStatus = await self._client.smartglass.get_console_status(liveid)
+        return str(status.power_state), status.focus_app_aumid
+
+    async def _get_title_info(self, title_id: str) -> tuple[str, str] | None:
+        """Return ``(name, https image URL)`` for a title, from the account's store when it is known."""
+        known = self._games.title_info(title_id) if self._games else None
+        if known:
+            return known
+        title = await hedged("title", lambda: self._fetch_title_info(title_id))
+        if title and self._games:
+            self._games.remember_title(title_id, *title)
+        return title
+
+    async def _fetch_title_info(self, title_id: str) -> tuple[str, str] | None:
+        if FAST_PARSE:
+            resp = await self._client.session.get(
+                f"{TitlehubProvider.TITLEHUB_URL}/users/xuid({self._xuid})/titles/titleid({title_id})"
+                f"/decoration/{TitleFields.IMAGE}",
+                headers=dict(self._client.titlehub._headers),
+            )
+            resp.raise_for_status()
+            title = parse_title(resp.content)
+        else:
+            title_response = await self._client.titlehub.get_title_info(title_id)
+            titles = getattr(title_response, "titles", None) or []
+            title = (titles[0].name, getattr(titles[0], "display_image", "") or "") if titles else None
+
+        if not title:
+            return None
+        name, image = title
+        if image.startswith("http://"):
+            image = "https://" + image[7:]
+        return name, image
+
+    async def get_title_history(self, max_items: int) -> list[tuple[str, str, str]]:
+        """Return ``(title_id, name, https image URL)`` of recently played titles, most recent first."""
+        async with deadline("library"):
+            if FAST_PARSE:
+                resp = await self._client.session.get(
+                    f"{TitlehubProvider.TITLEHUB_URL}/users/xuid({self._xuid})/titles/titlehistory"
+                    f"/decoration/{TitleFields.IMAGE}",
+                    params={"maxItems": max_items},
+                    headers=dict(self._client.titlehub._headers),
+                )
+                resp.raise_for_status()
+                history = parse_title_history(resp.content)
+            else:
+                result = await self._client.titlehub.get_title_history(self._xuid, [TitleFields.IMAGE], max_items)
+                history = [(title.title_id, title.name, title.display_image or "") for title in result.titles]
+        return [
+            (title_id, name, "https://" + image[7:] if image.startswith("http://") else image)
+            for title_id, name, image in history
+        ]
+
+    async def fetch_artwork(self, url: str) -> tuple[bytes, str]:
+        """Download an image; returns the body and its content type."""
+        async with deadline("title"):
+            resp = await self._session.get(url)
+            resp.raise_for_status()
+        return resp.content, resp.headers.get("Content-Type", "").split(";")[0]
+
+    def start_prefetch(self) -> None:
+        if self._games is not None:
+            title_prefetcher(self._xuid, self._games).start(self)
+
+    async def get_installed_apps(self, liveid: str) -> GameLibrary:
+        self._apps_validators.pop(liveid, None)
+        try:
+            return await self.refresh_installed_apps(liveid, GameLibrary()) or GameLibrary()
         except Exception as err:
             _LOG.debug("Failed to get installed apps: %s", err)
-            return []
+            return GameLibrary()
+
+    async def refresh_installed_apps(self, liveid: str, current: GameLibrary) -> GameLibrary | None:
+        """Return the updated library, or None when it matches ``current``.
+
+        New titles keep their raw names until enriched; see ``enrich_games``.
+        """
+        async with deadline("library"):
+            entries = await self._fetch_installed_games(liveid)
+        if entries is None:
+            return None
+
+        games = [self._games.get(product_id, title_id, name) for product_id, title_id, name in entries]
+        added = [game for game in games if game not in current]
+        removed = len(current) - (len(games) - len(added))
+        if not added and not removed:
+            return None
+
+        _LOG.debug("Installed apps changed: %d added, %d removed", len(added), removed)
+        return GameLibrary(games)
 
-    async def _enrich_game_images(self, games: list[dict]) -> list[dict]:
+    async def _fetch_installed_games(self, liveid: str) -> list[tuple[str, str, str]] | None:
+        url = f"{SmartglassProvider.SG_URL}/lists/installedApps"
+        headers = dict(SmartglassProvider.HEADERS_SG)
+        etag, digest = self._apps_validators.get(liveid, ("", ""))
+        if etag:
+            headers["If-None-Match"] = etag
+
+        resp = await self._client.session.get(url, params={"deviceId": liveid}, headers=headers)
+        if resp.status_code == 304:
+            return None
+        resp.raise_for_status()
+
+        # Not every deployment sends an ETag, so also skip parsing when the body is identical.
+        new_digest = hashlib.sha1(resp.content).hexdigest()
+        self._apps_validators[liveid] = (resp.headers.get("ETag", ""), new_digest)
+        if new_digest == digest:
+            return None
+
+        if FAST_PARSE:
+            return parse_installed_games(resp.content)
+
+        result = InstalledPackagesList.model_validate_json(resp.text)
+        return [
+            (
+                app.one_store_product_id,
+                str(app.title_id) if app.title_id else "",
+                app.name or f"Game {app.title_id or 'Unknown'}",
+            )
+            for app in result.result
+            if app.one_store_product_id and (not app.content_type or app.content_type == "Game")
+        ]
+
+    async def enrich_games(self, games: list[Game]) -> None:
+        """Fill in name and artwork of ``games``; lookups already running for a game are shared."""
+        tasks = []
         for game in games:
-            if not game.get("title_id"):
+            if game.enriched or not game.title_id:
                 continue
-            try:
-                title_response = await self._client.titlehub.get_title_info(game["title_id"])
-                titles = getattr(title_response, "titles", None) or []
-                if titles:
-                    image = getattr(titles[0], "display_image", "") or ""
-                    if image.startswith("http://"):
-                        image = "https://" + image[7:]
-                    game["image"] = image
-                    name = getattr(titles[0], "name", None)
-                    if name:
-                        game["name"] = name
-            except Exception:
-                pass
-        return games
+            task = self._enrichments.get(game.product_id)
+            if task is None:
+                task = self._enrichments[game.product_id] = asyncio.create_task(self._enrich_game(game))
+            tasks.append(task)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def _enrich_game(self, game: Game) -> None:
+        try:
+            async with self._enrich_slots:
+                title = await self._get_title_info(game.title_id)
+            if title:
+                name, game.image = title
+                if name:
+                    game.name = name
+                game.enriched = True
+        except Exception as err:
+            _LOG.debug("Could not enrich %s: %s", game.title_id, err)
+        finally:
+            self._enrichments.pop(game.product_id, None)
 
     async def launch_app(self, liveid: str, one_store_product_id: str) -> None:
-        await self._client.smartglass.launch_app(liveid, one_store_product_id)
+        async with deadline("command"):
+            await self._client.smartglass.launch_app(liveid, one_store_product_id)
 
     def generate_auth_url(self) -> str:
         query_params = {
@@ -263,4 +800,5 @@ class XboxClient:
             raise
         self._client = XboxLiveClient(self._auth_mgr)
         self._xuid = self._client.xuid
+        self._games = shared_store(self._xuid)
         return self._auth_mgr.oauth.model_dump(mode="json")
@@ -0,0 +1,97 @@
+"""
+Asynchronous command acknowledgement.
+
+With ``UC_XBOX_ASYNC_ACK`` enabled, entity handlers answer the Remote as
+soon as a command is validated and queued. Each console runs its queued
+commands in order in the background; a failure is published through the
+device's ``command_error`` and the time from acknowledgement to completion
+is recorded for diagnostics.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING
+
+from uc_intg_xbox import diagnostics
+from uc_intg_xbox.const import COMMAND_QUEUE_SIZE, COMMAND_SAMPLES
+from uc_intg_xbox.watchdog import percentile
+
+if TYPE_CHECKING:
+    from uc_intg_xbox.device import XboxDevice
+
+_LOG = logging.getLogger(__name__)
+
+
+class CommandQueue:
+    """Runs one device's acknowledged commands in order, in the background."""
+
+    def __init__(self, device: "XboxDevice", size: int = COMMAND_QUEUE_SIZE) -> None:
+        self._device = device
+        self._queue: asyncio.Queue[tuple[str, float]] = asyncio.Queue(size)
+        self._task: asyncio.Task | None = None
+        self.last_error = ""
+
+    def submit(self, command: str) -> bool:
+        """Queue ``command``; False when the console already has a full backlog."""
+        try:
+            self._queue.put_nowait((command, time.monotonic()))
+        except asyncio.QueueFull:
+            _stats["rejected"] += 1
+            _LOG.warning("[%s] Command queue full, dropping %s", self._device.log_id, command)
+            return False
+        _stats["acknowledged"] += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return True
+
+    def stop(self) -> None:
+        """Cancel the running command and drop the ones still waiting."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    async def _run(self) -> None:
+        while True:
+            command, acknowledged = await self._queue.get()
+            try:
+                success = await self._device.send_command(command)
+            except Exception as err:
+                _LOG.error("[%s] Queued command %s failed: %s", self._device.log_id, command, err)
+                success = False
+            elapsed = time.monotonic() - acknowledged
+            _completions.append(elapsed)
+            if not success:
+                _stats["failed"] += 1
+            _LOG.debug("[%s] %s completed %.0f ms after acknowledgement (%s)",
+                       self._device.log_id, command, elapsed * 1000, "ok" if success else "failed")
+            error = "" if success else f"{command} failed"
+            if error != self.last_error:
+                self.last_error = error
+                self._device.push_update()
+
+
+_stats = {"acknowledged": 0, "rejected": 0, "failed": 0}
+_completions: deque[float] = deque(maxlen=COMMAND_SAMPLES)
+
+
+def report() -> dict:
+    completions = list(_completions)
+    return {
+        **_stats,
+        "ack_to_completion_ms": {
+            "p50": round(percentile(completions, 0.50) * 1000, 1),
+            "p95": round(percentile(completions, 0.95) * 1000, 1),
+            "p99": round(percentile(completions, 0.99) * 1000, 1),
+            "max": round(max(completions, default=0.0) * 1000, 1),
+        },
+    }
+
+
+diagnostics.register("commands", report)
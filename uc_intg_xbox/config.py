@@ -15,6 +15,10 @@ class XboxConfig:
     identifier: str = ""
     name: str = ""
     liveid: str = ""
+    ip_address: str = ""
+    lan_probe: bool = False
+    lan_control: bool = False
+    household_xuids: list[str] = field(default_factory=list)
     client_id: str = ""
     client_secret: str = ""
     access_token: str = ""
@@ -5,6 +5,8 @@ Constants for Xbox integration.
 :license: MPL-2.0, see LICENSE for more details.
 """
 
+import os
+
 POLL_INTERVAL = 60
 POLL_INTERVAL_OFF = 90
 MAX_CONSECUTIVE_FAILURES = 5
@@ -12,3 +14,93 @@ RECONNECT_INTERVAL = 30
 TOKEN_REFRESH_INTERVAL = 12 * 60 * 60
 OAUTH_CALLBACK_PORT = 8765
 OAUTH_REDIRECT_URI = "http://localhost:8765/callback"
+POLL_INTERVAL_PUSH = 180
+RTA_URL = "wss://rta.xboxlive.com/connect"
+RTA_PROTOCOL = "rta.xboxlive.com.V2"
+RTA_RECONNECT_INTERVAL = 30
+RTA_DEBOUNCE = 1.0
+SMARTGLASS_PORT = 5050
+LAN_PROBE_INTERVAL = 5
+LAN_PROBE_TIMEOUT = 0.6
+LAN_PROBE_MISSES = 2
+LOCAL_CONNECT_TIMEOUT = 2.0
+LOCAL_HEARTBEAT_INTERVAL = 3.0
+LOCAL_HEARTBEAT_MISSES = 3
+LOCAL_ACK_TIMEOUT = 1.0
+LOCAL_RETRY_INTERVAL = 60
+# Share of a command's remaining deadline the LAN attempt may use, leaving the rest for the cloud fallback.
+LOCAL_DEADLINE_SHARE = 0.4
+LIBRARY_REFRESH_INTERVAL = 6 * 60 * 60
+FAST_PARSE = os.getenv("UC_XBOX_FAST_PARSE", "false").lower() == "true"
+SHARD_WORKERS = int(os.getenv("UC_XBOX_WORKERS", "0") or 0)
+SHARD_CALL_TIMEOUT = 120
+TRACE_EXPORT = os.getenv("UC_XBOX_TRACE", "")
+TRACE_FLUSH_INTERVAL = 5
+LOOP_WATCHDOG = os.getenv("UC_XBOX_LOOP_WATCHDOG", "false").lower() == "true"
+LOOP_LAG_INTERVAL = 0.25
+LOOP_LAG_SAMPLES = 2400
+LOOP_LAG_REPORT_INTERVAL = 300
+SLOW_CALLBACK_THRESHOLD = int(os.getenv("UC_XBOX_SLOW_CALLBACK_MS", "100") or 100) / 1000
+SLOW_CALLBACK_HISTORY = 20
+DEADLINES = {"command": 5.0, "presence": 8.0, "title": 6.0, "library": 30.0, "console": 5.0}
+HEDGE_SAMPLES = 200
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.05
+HEDGE_MAX_RATIO = 0.1
+LOG_FORMAT = os.getenv("UC_LOG_FORMAT", "text").lower()
+LOG_RATE_LIMIT = int(os.getenv("UC_XBOX_LOG_RATE_LIMIT", "20") or 0)
+LOG_RING_SIZE = int(os.getenv("UC_XBOX_LOG_RING", "500") or 0)
+DIAGNOSTICS_PORT = int(os.getenv("UC_XBOX_DIAGNOSTICS_PORT", "0") or 0)
+DIAGNOSTICS_HOST = os.getenv("UC_XBOX_DIAGNOSTICS_HOST", "127.0.0.1")
+WARM_IDLE_TIMEOUT = 10 * 60
+WARM_PING_INTERVAL = 45
+WARM_KEEPALIVE_EXPIRY = 60
+WARM_TIMEOUT = 5.0
+# peoplehub presence detail "Device" values reported by Xbox One and Series consoles.
+CONSOLE_PRESENCE_DEVICES = frozenset({"XboxOne", "Durango", "Scarlett"})
+# Console list and console status answers are reused by every poll within this window.
+CONSOLE_STATUS_TTL = 50
+CONSOLE_OFF_STATES = frozenset({"Off", "ConnectedStandby"})
+# Commands the remote entity advertises; XboxDevice.send_command also accepts "OK" for DPAD_CENTER.
+SIMPLE_COMMANDS = [
+    "POWER_ON", "POWER_OFF", "POWER_TOGGLE",
+    "DPAD_UP", "DPAD_DOWN", "DPAD_LEFT", "DPAD_RIGHT", "DPAD_CENTER",
+    "A", "B", "X", "Y",
+    "BACK", "HOME", "MENU", "CONTEXT_MENU", "NEXUS",
+    "PLAY", "PAUSE", "PLAY_PAUSE", "NEXT", "PREVIOUS", "FAST_FORWARD", "REWIND",
+    "VOLUME_UP", "VOLUME_DOWN", "MUTE_TOGGLE",
+]
+# Peoplehub profiles (gamerscore, party, game/app kind of titles) are refetched at most this often.
+SOCIAL_REFRESH_INTERVAL = 5 * 60
+POLL_MAX_IN_FLIGHT = int(os.getenv("UC_XBOX_POLL_CONCURRENCY", "4") or 4)
+POLL_LAG_SAMPLES = 1000
+PREFETCH_INTERVAL = 6 * 60 * 60
+PREFETCH_HISTORY = 25
+PREFETCH_TITLES = 12
+PREFETCH_ART_SIZE = 480
+PREFETCH_BUDGET_BYTES = 4 * 1024 * 1024
+PREFETCH_MAX_IMAGE_BYTES = 256 * 1024
+PREFETCH_SPACING = 2.0
+ENRICH_CONCURRENCY = 4
+# How long a browse or search waits for its own page to be enriched before answering with raw names.
+BROWSE_ENRICH_WAIT = 1.5
+# Identifier of the entities that broadcast to every console; console Live IDs are hex, so it never clashes.
+GROUP_IDENTIFIER = "xbox_group"
+BROADCAST_CONCURRENCY = int(os.getenv("UC_XBOX_BROADCAST_CONCURRENCY", "8") or 8)
+BROADCAST_TIMEOUT = float(os.getenv("UC_XBOX_BROADCAST_TIMEOUT", "10") or 10)
+# Acknowledge Remote commands once queued and run them in the background.
+ASYNC_ACK = os.getenv("UC_XBOX_ASYNC_ACK", "false").lower() == "true"
+COMMAND_QUEUE_SIZE = 16
+COMMAND_SAMPLES = 1000
+HTTP_API_PORT = int(os.getenv("UC_XBOX_HTTP_PORT", "0") or 0)
+HTTP_API_TOKEN = os.getenv("UC_XBOX_HTTP_TOKEN", "")
+HTTP_API_HOST = os.getenv("UC_XBOX_HTTP_HOST", "127.0.0.1")
+SSE_KEEPALIVE = 15
+HISTORY_RETENTION_DAYS = int(os.getenv("UC_XBOX_HISTORY_DAYS", "365") or 0)
+HISTORY_FLUSH_INTERVAL = 60
+HISTORY_BATCH = 50
+# Days of rollups mirrored in memory for the play-time sensors.
+HISTORY_WINDOW_DAYS = 7
+FAILOVER = os.getenv("UC_XBOX_FAILOVER", "false").lower() == "true"
+FAILOVER_PUBLISH_INTERVAL = 1.0
+FAILOVER_REFRESH_INTERVAL = 5 * 60
@@ -0,0 +1,198 @@
+"""
+Deadlines and hedging for Xbox Live calls.
+
+Each operation type has a time budget. The budget bounds the whole operation
+and is applied to every HTTP request made inside it, including the ones
+python-xbox makes on our behalf. Idempotent reads can be hedged: when the
+first request is slower than the observed p95, a second one is sent and
+whichever answers first wins.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+import httpx
+
+from uc_intg_xbox import diagnostics
+from uc_intg_xbox.const import (
+    DEADLINES,
+    HEDGE_MAX_RATIO,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_SAMPLES,
+)
+from uc_intg_xbox.watchdog import percentile
+
+_LOG = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_deadline: ContextVar[float | None] = ContextVar("uc_intg_xbox_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """An operation ran past its deadline."""
+
+    def __init__(self, operation: str, budget: float):
+        super().__init__(f"{operation} exceeded its {budget:.1f}s deadline")
+        self.operation = operation
+
+
+@asynccontextmanager
+async def deadline(operation: str) -> AsyncIterator[None]:
+    """Bound the enclosed block by the operation's budget, or the caller's if tighter."""
+    budget = DEADLINES[operation]
+    at = asyncio.get_running_loop().time() + budget
+    outer = _deadline.get()
+    if outer is not None and outer < at:
+        at = outer
+    token = _deadline.set(at)
+    try:
+        async with asyncio.timeout_at(at):
+            yield
+    except TimeoutError as err:
+        if isinstance(err, DeadlineExceeded):
+            raise
+        raise DeadlineExceeded(operation, budget) from err
+    finally:
+        _deadline.reset(token)
+
+
+@asynccontextmanager
+async def deadline_share(share: float) -> AsyncIterator[None]:
+    """Bound the enclosed block by ``share`` of the caller's remaining budget; unbounded without one."""
+    outer = _deadline.get()
+    if outer is None:
+        yield
+        return
+    now = asyncio.get_running_loop().time()
+    at = now + max(outer - now, 0) * share
+    token = _deadline.set(at)
+    try:
+        async with asyncio.timeout_at(at):
+            yield
+    finally:
+        _deadline.reset(token)
+
+
+async def apply_deadline(request: httpx.Request) -> None:
+    """httpx request hook: cap every timeout of the request at the remaining budget."""
+    at = _deadline.get()
+    if at is None:
+        return
+    remaining = max(at - asyncio.get_running_loop().time(), 0.001)
+    timeouts = request.extensions.get("timeout") or {}
+    request.extensions["timeout"] = {
+        key: remaining if timeouts.get(key) is None else min(timeouts[key], remaining)
+        for key in ("connect", "read", "write", "pool")
+    }
+
+
+class Hedger:
+    """Hedges one operation type against its own observed p95 latency."""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self._latencies: deque[float] = deque(maxlen=HEDGE_SAMPLES)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.cancelled = 0
+
+    def hedge_delay(self) -> float | None:
+        if len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        if self.hedged >= HEDGE_MAX_RATIO * self.requests:
+            return None
+        return max(percentile(list(self._latencies), 0.95), HEDGE_MIN_DELAY)
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        self.requests += 1
+        started = time.monotonic()
+        delay = self.hedge_delay()
+        if delay is None:
+            result = await call()
+            self._latencies.append(time.monotonic() - started)
+            return result
+
+        first = asyncio.ensure_future(call())
+        tasks = [first]
+        hedge_started = started
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedged += 1
+                _LOG.debug("Hedging %s after %.0f ms", self.operation, delay * 1000)
+                hedge_started = time.monotonic()
+                tasks.append(asyncio.ensure_future(call()))
+
+            pending = set(tasks)
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is first:
+                        self._latencies.append(time.monotonic() - started)
+                    else:
+                        self.hedge_wins += 1
+                        self._latencies.append(time.monotonic() - hedge_started)
+                    return task.result()
+            raise error
+        finally:
+            # The losing request, or both if our caller was cancelled.
+            late = [task for task in tasks if not task.done()]
+            for task in late:
+                task.cancel()
+            if late:
+                self.cancelled += len(late)
+                await asyncio.gather(*late, return_exceptions=True)
+
+    def stats(self) -> dict:
+        latencies = list(self._latencies)
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "cancelled": self.cancelled,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        }
+
+
+_HEDGERS: dict[str, Hedger] = {}
+
+
+def hedger(operation: str) -> Hedger:
+    """Return the process-wide Hedger for ``operation``."""
+    instance = _HEDGERS.get(operation)
+    if instance is None:
+        instance = _HEDGERS[operation] = Hedger(operation)
+    return instance
+
+
+async def hedged(operation: str, call: Callable[[], Awaitable[T]]) -> T:
+    """Run an idempotent read under its deadline, hedging it when it is slow."""
+    async with deadline(operation):
+        return await hedger(operation).run(call)
+
+
+def report() -> dict:
+    return {
+        "deadlines_s": DEADLINES,
+        "hedging": {name: instance.stats() for name, instance in _HEDGERS.items()},
+    }
+
+
+diagnostics.register("requests", report)
@@ -5,17 +5,54 @@ Xbox device implementation using PollingDevice.
 :license: MPL-2.0, see LICENSE for more details.
 """
 
+import asyncio
 import logging
+import time
+from datetime import datetime, timezone
 from typing import Any
 
 from ucapi_framework import DeviceEvents, PollingDevice
 
-from uc_intg_xbox.client import XboxClient
+from uc_intg_xbox.client import TransportStats, XboxClient
+from uc_intg_xbox.commands import CommandQueue
 from uc_intg_xbox.config import XboxConfig
-from uc_intg_xbox.const import MAX_CONSECUTIVE_FAILURES, POLL_INTERVAL, POLL_INTERVAL_OFF, RECONNECT_INTERVAL
+from uc_intg_xbox.const import (
+    ASYNC_ACK,
+    CONSOLE_OFF_STATES,
+    FAILOVER,
+    LAN_PROBE_INTERVAL,
+    LAN_PROBE_MISSES,
+    LIBRARY_REFRESH_INTERVAL,
+    MAX_CONSECUTIVE_FAILURES,
+    POLL_INTERVAL,
+    POLL_INTERVAL_OFF,
+    POLL_INTERVAL_PUSH,
+    RECONNECT_INTERVAL,
+    RTA_DEBOUNCE,
+    SIMPLE_COMMANDS,
+)
+from uc_intg_xbox.failover import warm_standby
+from uc_intg_xbox.history import session_history
+from uc_intg_xbox.lan import probe_console
+from uc_intg_xbox.library import GameLibrary
+from uc_intg_xbox.rta import RtaSubscription
+from uc_intg_xbox.scheduler import poll_scheduler
+from uc_intg_xbox.tracing import span
 
 _LOG = logging.getLogger(__name__)
 
+FOCUS_APP_NAMES = {"Xbox.Dashboard": "Home"}
+
+DEVICE_COMMANDS = frozenset(SIMPLE_COMMANDS) | {"OK"}
+
+
+def _focus_app_name(aumid: str) -> str:
+    """Turn an AUMID like ``4DF9E0F8.Netflix_mcm4njqhnhss8!Netflix.App`` into ``Netflix``."""
+    if not aumid:
+        return ""
+    package, _, app = aumid.partition("!")
+    return FOCUS_APP_NAMES.get(app.rsplit(".", 1)[0]) or package.split("_", 1)[0].rsplit(".", 1)[-1]
+
 
 class XboxDevice(PollingDevice):
     """Xbox console device."""
@@ -27,12 +64,31 @@ class XboxDevice(PollingDevice):
         self._state: str = "UNAVAILABLE"
         self._consecutive_failures: int = 0
         self._reconnect_poll_count: int = 0
+        self._presence_subscription: RtaSubscription | None = None
+        self._push_refresh_task: asyncio.Task | None = None
+        self._lan_probe_task: asyncio.Task | None = None
+        self._lan_reachable: bool | None = None
+        self._lan_misses: int = 0
 
         self._presence_state: str = "OFF"
         self._media_title: str = "Offline"
         self._media_image: str = ""
         self._gamertag: str = "Xbox User"
-        self._installed_games: list[dict] = []
+        self._active_player: str = ""
+        self._gamerscore: str = ""
+        self._status_text: str = ""
+        self._last_seen: str = ""
+        self._in_party: bool = False
+        self._in_multiplayer: bool = False
+        self._session_title_id: str = ""
+        self._session_title: str = ""
+        self._session_xuid: str = ""
+        self._session_started: datetime | None = None
+        self._installed_games: GameLibrary = GameLibrary()
+        self._library_refreshed_at: float = 0.0
+        self._library_task: asyncio.Task | None = None
+        self._warm_on_connect: bool = False
+        self._commands: CommandQueue = CommandQueue(self)
 
     @property
     def identifier(self) -> str:
@@ -71,15 +127,78 @@ class XboxDevice(PollingDevice):
         return self._gamertag
 
     @property
-    def installed_games(self) -> list[dict]:
+    def active_player(self) -> str:
+        return self._active_player or self._gamertag
+
+    @property
+    def gamerscore(self) -> str:
+        return self._gamerscore
+
+    @property
+    def status_text(self) -> str:
+        return self._status_text
+
+    @property
+    def last_seen(self) -> str:
+        return self._last_seen
+
+    @property
+    def in_party(self) -> bool:
+        return self._in_party
+
+    @property
+    def in_multiplayer(self) -> bool:
+        return self._in_multiplayer
+
+    @property
+    def session_started(self) -> datetime | None:
+        return self._session_started
+
+    @property
+    def play_time_minutes(self) -> int:
+        if not self._session_started:
+            return 0
+        return int((datetime.now(timezone.utc) - self._session_started).total_seconds() // 60)
+
+    def played_minutes(self, days: int) -> int:
+        """Minutes played today and the ``days - 1`` days before, from the history rollups."""
+        return int(session_history().play_seconds(self.identifier, days, self._session_started) // 60)
+
+    @property
+    def command_error(self) -> str:
+        return self._commands.last_error
+
+    @property
+    def installed_games(self) -> GameLibrary:
         return self._installed_games
 
     @property
     def client(self) -> XboxClient | None:
         return self._client
 
+    @property
+    def client_connected(self) -> bool:
+        return self._client is not None and self._client.is_connected
+
+    @property
+    def last_transport(self) -> str:
+        return self._client.last_transport if self._client else ""
+
+    @property
+    def transport_stats(self) -> dict[str, TransportStats]:
+        return self._client.transport_stats if self._client else {}
+
     async def establish_connection(self) -> XboxClient:
+        # Reconnects land here too: release the previous client's sockets and tasks first.
+        await self._close_client()
+        warm = warm_standby().adopt(self._device_config) if FAILOVER else None
+        if warm:
+            return await self._resume_warm(*warm)
+
         self._client = XboxClient(self._device_config.client_id, self._device_config.client_secret)
+        if self._device_config.lan_control:
+            self._client.enable_local_transport(self._device_config.liveid, self._device_config.ip_address)
+        self._client.set_household(self._device_config.household_xuids)
 
         refreshed_tokens = await self._client.connect(self._device_config.tokens)
         if not refreshed_tokens:
@@ -87,6 +206,11 @@ class XboxDevice(PollingDevice):
 
         self._persist_tokens(refreshed_tokens)
         self._gamertag = self._client.gamertag
+        if self._warm_on_connect:
+            self._warm_on_connect = False
+            self._client.keep_warm()
+        await self._start_presence_subscription()
+        self._start_lan_probe()
 
         try:
             await self._update_state()
@@ -95,7 +219,9 @@ class XboxDevice(PollingDevice):
 
         try:
             self._installed_games = await self._client.get_installed_apps(self._device_config.liveid)
+            self._library_refreshed_at = time.monotonic()
             _LOG.info("[%s] Found %d installed games", self.log_id, len(self._installed_games))
+            self._client.start_prefetch()
         except Exception as err:
             _LOG.warning("[%s] Could not fetch game library: %s", self.log_id, err)
 
@@ -104,6 +230,83 @@ class XboxDevice(PollingDevice):
         self.push_update()
         return self._client
 
+    async def _resume_warm(self, client: XboxClient, games: GameLibrary, state: dict) -> XboxClient:
+        """Take over a client the standby kept authenticated and continue from the published state."""
+        self._client = client
+        self._installed_games = games
+        self._library_refreshed_at = time.monotonic()
+        self._restore_published_state(state)
+        refreshed_tokens = await client.refresh_tokens()
+        if refreshed_tokens:
+            self._persist_tokens(refreshed_tokens)
+        self._gamertag = client.gamertag
+        client.keep_warm()
+        await self._start_presence_subscription()
+        self._start_lan_probe()
+        client.start_prefetch()
+        _LOG.info("[%s] Resumed with the standby's client, %d installed games", self.log_id, len(games))
+
+        self._state = "ON"
+        self._consecutive_failures = 0
+        self.push_update()
+        # Catch up on anything that changed while no instance was polling.
+        self._on_presence_event("", None)
+        return client
+
+    def published_state(self) -> dict:
+        """Console state for the standby instance, JSON-serializable."""
+        state = {
+            "presence_state": self._presence_state,
+            "media_title": self._media_title,
+            "active_player": self._active_player,
+            "gamerscore": self._gamerscore,
+            "status_text": self._status_text,
+            "last_seen": self._last_seen,
+            "in_party": self._in_party,
+            "in_multiplayer": self._in_multiplayer,
+            "session_title_id": self._session_title_id,
+            "session_title": self._session_title,
+            "session_xuid": self._session_xuid,
+            "session_started": self._session_started.isoformat() if self._session_started else None,
+        }
+        # Prefetched artwork is an inline data URI far larger than the rest; the first poll after a takeover
+        # sets the image again.
+        if not self._media_image.startswith("data:"):
+            state["media_image"] = self._media_image
+        return state
+
+    def _restore_published_state(self, state: dict) -> None:
+        # Missing keys (a partial write or another version) keep the defaults.
+        if not state:
+            return
+        self._presence_state = state.get("presence_state", self._presence_state)
+        self._media_title = state.get("media_title", self._media_title)
+        self._media_image = state.get("media_image", self._media_image)
+        self._active_player = state.get("active_player", self._active_player)
+        self._gamerscore = state.get("gamerscore", self._gamerscore)
+        self._status_text = state.get("status_text", self._status_text)
+        self._last_seen = state.get("last_seen", self._last_seen)
+        self._in_party = state.get("in_party", self._in_party)
+        self._in_multiplayer = state.get("in_multiplayer", self._in_multiplayer)
+        # The session carries on: it is recorded by whichever instance sees it end.
+        self._session_title_id = state.get("session_title_id", "")
+        self._session_title = state.get("session_title", "")
+        self._session_xuid = state.get("session_xuid", "")
+        started = state.get("session_started")
+        try:
+            self._session_started = datetime.fromisoformat(started) if started and self._session_title_id else None
+        except (TypeError, ValueError):
+            self._session_started = None
+
+    async def _poll_loop(self) -> None:
+        # Polls are run by the integration-wide scheduler; this task only marks the device as polling.
+        scheduler = poll_scheduler()
+        scheduler.add(self)
+        try:
+            await self._stop_polling.wait()
+        finally:
+            scheduler.remove(self)
+
     async def poll_device(self) -> None:
         if self._state == "UNAVAILABLE":
             self._reconnect_poll_count += 1
@@ -120,12 +323,17 @@ class XboxDevice(PollingDevice):
             await self._update_state()
             self._consecutive_failures = 0
 
-            if self._presence_state == "OFF":
+            if self._presence_subscription and self._presence_subscription.connected:
+                self._poll_interval = POLL_INTERVAL_PUSH
+            elif self._presence_state == "OFF":
                 self._poll_interval = POLL_INTERVAL_OFF
             else:
                 self._poll_interval = POLL_INTERVAL
 
             self.push_update()
+
+            if time.monotonic() - self._library_refreshed_at >= LIBRARY_REFRESH_INTERVAL:
+                self._schedule_library_refresh()
         except Exception as err:
             self._consecutive_failures += 1
             _LOG.debug("[%s] Poll error (%d/%d): %s", self.log_id,
@@ -136,7 +344,10 @@ class XboxDevice(PollingDevice):
                 self._presence_state = "OFF"
                 self._media_title = "Offline"
                 self._media_image = ""
+                self._track_session("")
                 self._reconnect_poll_count = 0
+                # Reconnect attempts are counted in polls of POLL_INTERVAL, not the push or off interval.
+                self._poll_interval = POLL_INTERVAL
                 self.push_update()
                 self.events.emit(DeviceEvents.DISCONNECTED, self.identifier)
 
@@ -148,9 +359,154 @@ class XboxDevice(PollingDevice):
             _LOG.debug("[%s] Presence API returned None, keeping last-known state", self.log_id)
             return
 
+        was_off = self._presence_state == "OFF"
         self._presence_state = presence["state"]
         self._media_title = presence.get("title", "Unknown")
         self._media_image = presence.get("image", "")
+        self._active_player = presence.get("player", "")
+        self._gamerscore = presence.get("gamerscore", self._gamerscore)
+        self._status_text = presence.get("status", "")
+        self._last_seen = presence.get("last_seen", "")
+        self._in_party = presence.get("in_party", False)
+        self._in_multiplayer = presence.get("in_multiplayer", False)
+        await self._apply_console_status()
+        self._apply_lan_state()
+        self._track_session(
+            presence.get("title_id", "") if self._presence_state == "PLAYING" else "",
+            presence.get("player_xuid", ""),
+        )
+
+        if was_off and self._presence_state != "OFF" and self._state == "ON":
+            # New installs usually show up right after the console wakes.
+            self._schedule_library_refresh()
+
+    def end_session(self) -> None:
+        """Record the running game session, if any, as ended now."""
+        self._track_session("")
+
+    def _track_session(self, title_id: str, xuid: str = "") -> None:
+        if title_id == self._session_title_id:
+            return
+        now = datetime.now(timezone.utc)
+        if self._session_title_id and self._session_started:
+            session_history().record(self.identifier, self._session_xuid, self._session_title_id,
+                                     self._session_title, self._session_started, now)
+        self._session_title_id = title_id
+        self._session_title = self._media_title if title_id else ""
+        self._session_xuid = xuid
+        self._session_started = now if title_id else None
+
+    async def _apply_console_status(self) -> None:
+        # The LAN probe answers the same question locally and for free.
+        if self._lan_reachable is not None:
+            return
+        power = await self._client.get_console_power(self._device_config.liveid)
+        if power in CONSOLE_OFF_STATES:
+            if self._presence_state != "OFF":
+                self._presence_state = "OFF"
+                self._media_title = "Offline"
+                self._media_image = ""
+            return
+        if power != "On" or self._presence_state == "PLAYING":
+            return
+        # Presence is offline or only "Online", possibly from a phone: ask the console what it shows.
+        app = _focus_app_name(await self._client.get_focus_app(self._device_config.liveid))
+        if self._presence_state == "OFF":
+            self._presence_state = "ON"
+            self._media_title = app or "Online"
+            self._media_image = ""
+        elif app:
+            self._media_title = app
+
+    def _apply_lan_state(self) -> None:
+        # User presence also counts phone and PC sessions; the console itself is authoritative.
+        if self._lan_reachable is False and self._presence_state != "OFF":
+            self._presence_state = "OFF"
+            self._media_title = "Offline"
+            self._media_image = ""
+            self._track_session("")
+        elif self._lan_reachable and self._presence_state == "OFF":
+            self._presence_state = "ON"
+            self._media_title = "Online"
+            self._media_image = ""
+
+    def _start_lan_probe(self) -> None:
+        if not self._device_config.lan_probe:
+            return
+        if self._lan_probe_task and not self._lan_probe_task.done():
+            return
+        self._lan_probe_task = asyncio.create_task(self._lan_probe_loop())
+
+    async def _stop_lan_probe(self) -> None:
+        if self._lan_probe_task and not self._lan_probe_task.done():
+            self._lan_probe_task.cancel()
+            try:
+                await self._lan_probe_task
+            except asyncio.CancelledError:
+                pass
+        self._lan_probe_task = None
+        self._lan_reachable = None
+        self._lan_misses = 0
+
+    async def _lan_probe_loop(self) -> None:
+        while True:
+            try:
+                console = await probe_console(self._device_config.liveid, self._device_config.ip_address)
+            except OSError as err:
+                _LOG.debug("[%s] LAN probe failed: %s", self.log_id, err)
+                console = None
+
+            if console:
+                self._lan_misses = 0
+                reachable = True
+            else:
+                self._lan_misses += 1
+                reachable = self._lan_reachable if self._lan_misses < LAN_PROBE_MISSES else False
+
+            if reachable != self._lan_reachable:
+                _LOG.info("[%s] Console %s on local network", self.log_id,
+                          "answering" if reachable else "not answering")
+                was_unknown = self._lan_reachable is None
+                self._lan_reachable = reachable
+                if self._state != "UNAVAILABLE":
+                    self._apply_lan_state()
+                    self.push_update()
+                    if reachable and not was_unknown:
+                        # Just turned on: fetch what it's running.
+                        self._on_presence_event("", None)
+
+            await asyncio.sleep(LAN_PROBE_INTERVAL)
+
+    async def _start_presence_subscription(self) -> None:
+        await self._stop_presence_subscription()
+        self._presence_subscription = self._client.create_presence_subscription(self._on_presence_event)
+        self._presence_subscription.start()
+
+    async def _stop_presence_subscription(self) -> None:
+        if self._push_refresh_task and not self._push_refresh_task.done():
+            self._push_refresh_task.cancel()
+        self._push_refresh_task = None
+        if self._presence_subscription:
+            await self._presence_subscription.stop()
+            self._presence_subscription = None
+
+    def _on_presence_event(self, resource: str, data: Any) -> None:
+        _LOG.debug("[%s] Presence event from %s: %s", self.log_id, resource or "RTA", data)
+        if self._state == "UNAVAILABLE" or not self._client:
+            return
+        if self._push_refresh_task and not self._push_refresh_task.done():
+            return
+        self._push_refresh_task = asyncio.create_task(self._refresh_from_push())
+
+    async def _refresh_from_push(self) -> None:
+        # Events tend to arrive in bursts (device + title change), fetch once.
+        await asyncio.sleep(RTA_DEBOUNCE)
+        try:
+            await self._update_state()
+            self._consecutive_failures = 0
+            self.push_update()
+        except Exception as err:
+            _LOG.debug("[%s] Push-triggered refresh failed: %s", self.log_id, err)
 
     async def _try_reconnect(self) -> bool:
         _LOG.info("[%s] Attempting reconnection...", self.log_id)
@@ -165,18 +521,41 @@ class XboxDevice(PollingDevice):
             return False
 
     async def disconnect(self) -> None:
-        if self._client:
-            await self._client.close()
-            self._client = None
+        self._commands.stop()
+        self._track_session("")
+        await self._close_client()
+        if self._library_task and not self._library_task.done():
+            self._library_task.cancel()
+        self._library_task = None
         self._state = "UNAVAILABLE"
         await super().disconnect()
 
+    async def _close_client(self) -> None:
+        await self._stop_presence_subscription()
+        await self._stop_lan_probe()
+        if self._client:
+            client, self._client = self._client, None
+            await client.close()
+
     def _persist_tokens(self, tokens: dict) -> None:
         self.update_config(tokens=tokens)
 
+    async def submit_command(self, command: str) -> bool:
+        """Run ``command``, or with asynchronous acknowledgement only validate and queue it."""
+        if not ASYNC_ACK:
+            return await self.send_command(command)
+        if command not in DEVICE_COMMANDS or not self.client_connected:
+            return False
+        return self._commands.submit(command)
+
     async def send_command(self, command: str) -> bool:
+        with span("device.send_command", device=self.identifier, command=command):
+            return await self._send_command(command)
+
+    async def _send_command(self, command: str) -> bool:
         if not self._client or not self._client.is_connected:
             return False
+        self._client.keep_warm()
         liveid = self._device_config.liveid
         try:
             match command:
@@ -241,6 +620,13 @@ class XboxDevice(PollingDevice):
             _LOG.error("[%s] Command %s failed: %s", self.log_id, command, err)
             return False
 
+    async def prewarm(self) -> None:
+        """Open connections ahead of the first command; deferred until connected."""
+        if self._client and self._client.is_connected:
+            self._client.keep_warm()
+        else:
+            self._warm_on_connect = True
+
     async def power_on(self) -> None:
         await self._client.turn_on(self._device_config.liveid)
 
@@ -251,8 +637,43 @@ class XboxDevice(PollingDevice):
         await self._client.launch_app(self._device_config.liveid, one_store_product_id)
 
     async def refresh_game_library(self) -> None:
-        if self._client and self._client.is_connected:
-            self._installed_games = await self._client.get_installed_apps(self._device_config.liveid)
+        if not self._client or not self._client.is_connected:
+            return
+        self._library_refreshed_at = time.monotonic()
+        games = await self._client.refresh_installed_apps(self._device_config.liveid, self._installed_games)
+        if games is None:
+            _LOG.debug("[%s] Game library unchanged", self.log_id)
+            return
+        self._installed_games = games
+        _LOG.info("[%s] Game library updated, %d installed games", self.log_id, len(games))
+        self.push_update()
+
+    async def enrich_games(self, product_ids: list[str]) -> list[tuple[str, str, str]]:
+        """Enrich these installed games; returns ``(product_id, name, image)`` of the ones updated."""
+        if not self._client or not self._client.is_connected:
+            return []
+        games = [
+            game for game in map(self._installed_games.by_product_id, product_ids)
+            if game is not None and not game.enriched
+        ]
+        if not games:
+            return []
+        await self._client.enrich_games(games)
+        updated = [(game.product_id, game.name, game.image) for game in games if game.enriched]
+        if updated:
+            self.push_update()
+        return updated
+
+    def _schedule_library_refresh(self) -> None:
+        if self._library_task and not self._library_task.done():
+            return
+        self._library_task = asyncio.create_task(self._run_library_refresh())
+
+    async def _run_library_refresh(self) -> None:
+        try:
+            await self.refresh_game_library()
+        except Exception as err:
+            _LOG.debug("[%s] Game library refresh failed: %s", self.log_id, err)
 
     async def refresh_tokens(self) -> None:
         if not self._client:
@@ -0,0 +1,91 @@
+"""
+Local diagnostics endpoint.
+
+Modules register named providers returning JSON-serialisable dicts; the
+server exposes each one at ``/diagnostics/<name>``. It listens on loopback
+unless a token is configured.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import hmac
+import ipaddress
+import logging
+from typing import Callable
+
+from aiohttp import web
+
+_LOG = logging.getLogger(__name__)
+
+Provider = Callable[[], dict]
+
+_PROVIDERS: dict[str, Provider] = {}
+
+
+def register(name: str, provider: Provider) -> None:
+    _PROVIDERS[name] = provider
+
+
+def unregister(name: str) -> None:
+    _PROVIDERS.pop(name, None)
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def bearer_authorized(request: web.Request, token: str) -> bool:
+    """Whether ``request`` carries ``Authorization: Bearer <token>``; always true without a token."""
+    if not token:
+        return True
+    scheme, _, supplied = request.headers.get("Authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(supplied.strip(), token)
+
+
+class DiagnosticsServer:
+    """HTTP server for the registered diagnostics providers."""
+
+    def __init__(self, port: int, host: str = "127.0.0.1", token: str = ""):
+        self._port = port
+        self._host = host
+        self._token = token
+        self._app = web.Application(middlewares=[self._authorize])
+        self._app.router.add_get("/diagnostics", self._handle_index)
+        self._app.router.add_get("/diagnostics/{name}", self._handle_provider)
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        if not self._token and not is_loopback(self._host):
+            # Logs and provider output name consoles, accounts and network addresses.
+            _LOG.error("Not serving diagnostics on %s without UC_XBOX_HTTP_TOKEN", self._host)
+            return
+        self._runner = web.AppRunner(self._app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port, reuse_address=True).start()
+        _LOG.info("Diagnostics available on http://%s:%d/diagnostics", self._host, self._port)
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _authorize(self, request: web.Request, handler) -> web.StreamResponse:
+        if not bearer_authorized(request, self._token):
+            raise web.HTTPUnauthorized()
+        return await handler(request)
+
+    async def _handle_index(self, request: web.Request) -> web.Response:
+        return web.json_response({"providers": sorted(_PROVIDERS)})
+
+    async def _handle_provider(self, request: web.Request) -> web.Response:
+        provider = _PROVIDERS.get(request.match_info["name"])
+        if provider is None:
+            raise web.HTTPNotFound()
+        return web.json_response(provider())
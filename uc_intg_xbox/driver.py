@@ -6,15 +6,21 @@ Xbox integration driver.
 """
 
 import asyncio
+import functools
 import logging
 
-from ucapi_framework import BaseIntegrationDriver
+from ucapi_framework import BaseIntegrationDriver, DeviceEvents
 
+from uc_intg_xbox.broadcast import BroadcastResult, broadcast
 from uc_intg_xbox.config import XboxConfig
+from uc_intg_xbox.const import FAILOVER, GROUP_IDENTIFIER, SHARD_WORKERS
 from uc_intg_xbox.device import XboxDevice
+from uc_intg_xbox.failover import state_publisher
+from uc_intg_xbox.http_api import StateFeed
 from uc_intg_xbox.media_player_entity import XboxMediaPlayer
-from uc_intg_xbox.remote_entity import XboxRemote
-from uc_intg_xbox.sensor_entity import create_sensors
+from uc_intg_xbox.remote_entity import XboxGroupRemote, XboxRemote
+from uc_intg_xbox.sensor_entity import BroadcastSensor, create_sensors
+from uc_intg_xbox.sharding import ShardCoordinator, ShardedXboxDevice
 
 _LOG = logging.getLogger(__name__)
 
@@ -26,7 +32,7 @@ class XboxDriver(BaseIntegrationDriver[XboxDevice, XboxConfig]):
 
     def __init__(self):
         super().__init__(
-            device_class=XboxDevice,
+            device_class=ShardedXboxDevice if SHARD_WORKERS else XboxDevice,
             entity_classes=[
                 XboxMediaPlayer,
                 XboxRemote,
@@ -35,6 +41,13 @@ class XboxDriver(BaseIntegrationDriver[XboxDevice, XboxConfig]):
             driver_id="uc-intg-xbox",
         )
         self._token_refresh_task: asyncio.Task | None = None
+        self.shard_coordinator: ShardCoordinator | None = (
+            ShardCoordinator(SHARD_WORKERS) if SHARD_WORKERS else None
+        )
+        self._group_remote = XboxGroupRemote(self.broadcast)
+        self._group_sensor = BroadcastSensor()
+        self.state_feed = StateFeed()
+        self._prewarm_tasks: set[asyncio.Task] = set()
 
     def device_from_entity_id(self, entity_id: str) -> str | None:
         if not entity_id:
@@ -42,16 +55,79 @@ class XboxDriver(BaseIntegrationDriver[XboxDevice, XboxConfig]):
         prefix_end = entity_id.find(".")
         if prefix_end < 0:
             return None
-        suffix = entity_id[prefix_end + 1:]
-        for device_id in self._device_instances:
-            if suffix == device_id or suffix.startswith(device_id + "."):
-                return device_id
-        if self._config_manager:
-            for cfg in self._config_manager.all():
-                cfg_id = getattr(cfg, "identifier", None)
-                if cfg_id and (suffix == cfg_id or suffix.startswith(cfg_id + ".")):
-                    return cfg_id
-        return suffix.split(".")[0] if "." in suffix else suffix
+        # Entity ids are "<type>.<identifier>[.<suffix>]" and identifiers never contain a dot.
+        device_id = entity_id[prefix_end + 1:].partition(".")[0]
+        return None if device_id == GROUP_IDENTIFIER else device_id
+
+    async def register_all_device_instances(self, connect: bool = False) -> None:
+        await super().register_all_device_instances(connect)
+        self._sync_group_entities()
+
+    def on_device_added(self, device_config: XboxConfig | None) -> None:
+        super().on_device_added(device_config)
+        self._sync_group_entities()
+
+    def setup_device_event_handlers(self, device: XboxDevice) -> None:
+        super().setup_device_event_handlers(device)
+        device.events.on(DeviceEvents.UPDATE, functools.partial(self.state_feed.publish, device))
+        if FAILOVER:
+            device.events.on(DeviceEvents.UPDATE, functools.partial(state_publisher().publish, device))
+
+    def xbox_devices(self) -> dict[str, XboxDevice]:
+        return {
+            device_id: device for device_id, device in self._device_instances.items()
+            if isinstance(device, XboxDevice)
+        }
+
+    def on_device_removed(self, device_config: XboxConfig | None) -> None:
+        super().on_device_removed(device_config)
+        if device_config:
+            self.state_feed.forget(device_config.identifier)
+            state_publisher().forget(device_config.identifier)
+        self._sync_group_entities()
+        if self.shard_coordinator:
+            removed = [device_config.identifier] if device_config else self.shard_coordinator.device_ids
+            for device_id in removed:
+                self.shard_coordinator.detach(device_id)
+
+    def _sync_group_entities(self) -> None:
+        """Offer the all-consoles entities only while more than one console is configured."""
+        grouped = self.config_manager is not None and len(list(self.config_manager.all())) > 1
+        for entity in (self._group_remote, self._group_sensor):
+            if grouped and not self.api.available_entities.contains(entity.id):
+                self.add_entity(entity)
+            elif not grouped:
+                if self.api.available_entities.contains(entity.id):
+                    self.api.available_entities.remove(entity.id)
+                if self.api.configured_entities.contains(entity.id):
+                    self.api.configured_entities.remove(entity.id)
+
+    async def broadcast(self, command: str) -> list[BroadcastResult]:
+        """Send ``command`` to every console concurrently and publish the per-console outcome."""
+        results = await broadcast(self.xbox_devices(), command)
+        self._group_sensor.show(command, results)
+        return results
+
+    async def on_subscribe_entities(self, entity_ids: list[str]) -> None:
+        await super().on_subscribe_entities(entity_ids)
+        self._prewarm({self.device_from_entity_id(entity_id) for entity_id in entity_ids})
+
+    async def on_r2_exit_standby(self) -> None:
+        await super().on_r2_exit_standby()
+        self._prewarm(list(self._device_instances))
+
+    def _prewarm(self, device_ids) -> None:
+        for device_id in device_ids:
+            device = self._device_instances.get(device_id)
+            if isinstance(device, XboxDevice):
+                task = self._loop.create_task(device.prewarm())
+                self._prewarm_tasks.add(task)
+                task.add_done_callback(self._prewarm_done)
+
+    def _prewarm_done(self, task: asyncio.Task) -> None:
+        self._prewarm_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            _LOG.debug("Prewarm failed: %s", task.exception())
 
     async def on_device_connected(self, device_id: str) -> None:
         await super().on_device_connected(device_id)
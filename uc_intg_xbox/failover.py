@@ -0,0 +1,283 @@
+"""
+Warm-standby failover between two integration instances.
+
+With ``UC_XBOX_FAILOVER`` enabled, instances sharing a configuration
+directory compete for an exclusive lock on ``active.lock``. The holder runs
+the integration and writes every console's state to ``standby_state.json``
+as it changes. The other instance waits as a warm standby: it authenticates
+each console's Xbox Live client, keeps its connections open and fetches the
+game libraries. The kernel releases the lock as soon as the active process
+exits, the standby takes over, binds the Remote's port and hands its clients
+to the devices, which resume polling from the published state instead of
+authenticating again.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from ucapi_framework import BaseConfigManager
+
+from uc_intg_xbox import diagnostics
+from uc_intg_xbox.client import XboxClient
+from uc_intg_xbox.config import XboxConfig
+from uc_intg_xbox.const import (
+    FAILOVER_PUBLISH_INTERVAL,
+    FAILOVER_REFRESH_INTERVAL,
+    LIBRARY_REFRESH_INTERVAL,
+    SHARD_WORKERS,
+)
+from uc_intg_xbox.library import GameLibrary
+
+if TYPE_CHECKING:
+    from uc_intg_xbox.device import XboxDevice
+
+_LOG = logging.getLogger(__name__)
+
+LEASE_FILE = "active.lock"
+STATE_FILE = "standby_state.json"
+
+
+class Lease:
+    """Exclusive lock held by the active instance for as long as its process lives."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._fd: int | None = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._claim(fd)
+        return True
+
+    async def acquire(self) -> None:
+        """Wait until the active instance releases the lock, then hold it."""
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_EX)
+        self._claim(fd)
+
+    def holder(self) -> str:
+        try:
+            with open(self._path, encoding="utf-8") as file:
+                return file.read().strip()
+        except OSError:
+            return ""
+
+    def _claim(self, fd: int) -> None:
+        self._fd = fd
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{socket.gethostname()} pid {os.getpid()}\n".encode())
+
+
+class StatePublisher:
+    """Writes the active instance's console states for the standby, at most once per interval."""
+
+    def __init__(self) -> None:
+        self._path = ""
+        self._states: dict[str, dict] = {}
+        self._task: asyncio.Task | None = None
+        self.writes = 0
+
+    def configure(self, path: str) -> None:
+        self._path = path
+
+    def publish(self, device: "XboxDevice") -> None:
+        if not self._path:
+            return
+        state = device.published_state()
+        if self._states.get(device.identifier) == state:
+            return
+        self._states[device.identifier] = state
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._write_soon())
+
+    def forget(self, device_id: str) -> None:
+        self._states.pop(device_id, None)
+
+    async def _write_soon(self) -> None:
+        while True:
+            await asyncio.sleep(FAILOVER_PUBLISH_INTERVAL)
+            states = dict(self._states)
+            try:
+                await asyncio.to_thread(_write_json, self._path, states)
+                self.writes += 1
+            except OSError as err:
+                _LOG.warning("Could not publish state for the standby: %s", err)
+            # Changes published while the file was being written go out with the next write.
+            if self._states == states:
+                return
+
+
+@dataclass(slots=True)
+class _WarmClient:
+    key: tuple
+    client: XboxClient
+    games: GameLibrary
+    library_at: float
+
+
+class WarmStandby:
+    """Xbox Live clients authenticated ahead of a takeover, handed to devices as they connect."""
+
+    def __init__(self) -> None:
+        self._warm: dict[str, _WarmClient] = {}
+        self._states: dict[str, dict] = {}
+        self.lease: Lease | None = None
+        self.role = "active"
+        self.promoted_at = 0.0
+        self.adopted = 0
+
+    async def wait_for_lease(self, lease: Lease, config_manager: BaseConfigManager, state_path: str) -> None:
+        """Stay warm until ``lease`` is ours; returns with the published states loaded."""
+        if lease.try_acquire():
+            return
+        self.role = "standby"
+        _LOG.info("Standing by, %s is active", lease.holder() or "another instance")
+        keep_warm = asyncio.create_task(self._keep_warm(config_manager))
+        try:
+            await lease.acquire()
+        finally:
+            keep_warm.cancel()
+        started = time.monotonic()
+        config_manager.load()
+        self._states = await asyncio.to_thread(_read_json, state_path)
+        self.role = "active"
+        self.promoted_at = time.time()
+        _LOG.info("Took over as the active instance with %d warm client(s) in %.0f ms",
+                  len(self._warm), (time.monotonic() - started) * 1000)
+
+    def adopt(self, device_config: XboxConfig) -> tuple[XboxClient, GameLibrary, dict] | None:
+        """Hand over the warm client for ``device_config`` and its last published state, once."""
+        warm = self._warm.pop(device_config.identifier, None)
+        if warm is None:
+            return None
+        if warm.key != _warm_key(device_config):
+            asyncio.create_task(warm.client.close())
+            return None
+        self.adopted += 1
+        return warm.client, warm.games, self._states.pop(device_config.identifier, {})
+
+    async def _keep_warm(self, config_manager: BaseConfigManager) -> None:
+        while True:
+            try:
+                await self._refresh(config_manager)
+            except Exception as err:
+                _LOG.warning("Standby refresh failed: %s", err)
+            await asyncio.sleep(FAILOVER_REFRESH_INTERVAL)
+
+    async def _refresh(self, config_manager: BaseConfigManager) -> None:
+        # The active instance persists refreshed tokens and new consoles to the shared configuration.
+        config_manager.load()
+        configs = {config.identifier: config for config in config_manager.all()}
+        for device_id in [device_id for device_id in self._warm if device_id not in configs]:
+            await self._warm.pop(device_id).client.close()
+        for device_id, config in configs.items():
+            warm = self._warm.get(device_id)
+            if warm and warm.key == _warm_key(config) and await warm.client.refresh_tokens():
+                warm.client.keep_warm()
+                if time.monotonic() - warm.library_at >= LIBRARY_REFRESH_INTERVAL:
+                    games = await warm.client.refresh_installed_apps(config.liveid, warm.games)
+                    if games is not None:
+                        warm.games, warm.library_at = games, time.monotonic()
+                continue
+            if warm:
+                await self._warm.pop(device_id).client.close()
+            try:
+                self._warm[device_id] = await _connect(config)
+                _LOG.info("[%s] Client warm for takeover", config.name)
+            except Exception as err:
+                _LOG.warning("[%s] Could not warm client: %s", config.name, err)
+
+    def report(self) -> dict:
+        return {
+            "role": self.role,
+            "lease": self.lease.holder() if self.lease else "",
+            "warm_clients": sorted(self._warm),
+            "adopted": self.adopted,
+            "promoted_at": self.promoted_at,
+            "state_writes": _PUBLISHER.writes,
+        }
+
+
+def _warm_key(config: XboxConfig) -> tuple:
+    return (config.client_id, config.liveid, config.ip_address, config.lan_control, tuple(config.household_xuids))
+
+
+async def _connect(config: XboxConfig) -> _WarmClient:
+    client = XboxClient(config.client_id, config.client_secret)
+    if config.lan_control:
+        client.enable_local_transport(config.liveid, config.ip_address)
+    client.set_household(config.household_xuids)
+    try:
+        if not await client.connect(config.tokens):
+            raise ConnectionError("authentication failed")
+        games = await client.get_installed_apps(config.liveid)
+    except BaseException:
+        await client.close()
+        raise
+    client.keep_warm()
+    return _WarmClient(_warm_key(config), client, games, time.monotonic())
+
+
+def _write_json(path: str, data: dict) -> None:
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump(data, file, separators=(",", ":"))
+    os.replace(temp, path)
+
+
+def _read_json(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+_STANDBY = WarmStandby()
+_PUBLISHER = StatePublisher()
+
+diagnostics.register("failover", _STANDBY.report)
+
+
+def warm_standby() -> WarmStandby:
+    return _STANDBY
+
+
+def state_publisher() -> StatePublisher:
+    return _PUBLISHER
+
+
+async def stand_by(config_path: str, config_manager: BaseConfigManager) -> None:
+    """Return once this instance holds the lease, publishing its state from then on."""
+    # The lease is held until the process exits; the standby takes over when it does.
+    lease = _STANDBY.lease = Lease(os.path.join(config_path, LEASE_FILE))
+    state_path = os.path.join(config_path, STATE_FILE)
+    if SHARD_WORKERS:
+        # Devices connect inside the shard workers, which cannot adopt clients from this process.
+        if not lease.try_acquire():
+            _LOG.info("Standing by without warm clients, %s is active", lease.holder() or "another instance")
+            await lease.acquire()
+            # Pick up the tokens and consoles the active instance saved while we waited.
+            config_manager.load()
+    else:
+        await _STANDBY.wait_for_lease(lease, config_manager, state_path)
+    _PUBLISHER.configure(state_path)
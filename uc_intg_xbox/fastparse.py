@@ -0,0 +1,136 @@
+"""
+Fast-path parsing of hot Xbox Live responses.
+
+Reads only the fields the integration uses straight from the decoded JSON,
+skipping pydantic model validation. Uses orjson when it is installed.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+# userpresence title placements that mean the title has the screen.
+PRIMARY_PLACEMENTS = ("Full", "Fill")
+
+
+def parse_people_presence(body: bytes, xuid: str) -> dict[str, Any] | None:
+    """Extract presence for ``xuid`` from a peoplehub batch response."""
+    return parse_people_presences(body).get(xuid)
+
+
+def parse_people_presences(body: bytes) -> dict[str, dict[str, Any]]:
+    """Extract presence for every person in a peoplehub batch response, keyed by XUID."""
+    profiles = {}
+    for person in loads(body).get("people") or ():
+        multiplayer = person.get("multiplayerSummary") or {}
+        profiles[person.get("xuid")] = {
+            "gamertag": person.get("gamertag") or "",
+            "state": person.get("presenceState") or "Offline",
+            "text": person.get("presenceText"),
+            "gamerscore": person.get("gamerScore") or "",
+            "last_seen": person.get("lastSeenDateTimeUtc") or "",
+            "in_party": bool(multiplayer.get("inParty")),
+            "in_multiplayer": bool(multiplayer.get("inMultiplayerSession")),
+            "details": [
+                {
+                    "state": detail.get("State"),
+                    "device": detail.get("Device") or "",
+                    "is_game": bool(detail.get("IsGame")),
+                    "is_primary": bool(detail.get("IsPrimary")),
+                    "title_id": detail.get("TitleId"),
+                }
+                for detail in person.get("presenceDetails") or ()
+            ],
+        }
+    return profiles
+
+
+def parse_user_presences(body: bytes) -> dict[str, dict[str, Any]]:
+    """Extract presence for every user in a userpresence batch response, keyed by XUID.
+
+    The service does not say whether a title is a game; ``is_game`` is left as ``None``.
+    """
+    profiles = {}
+    for item in loads(body) or ():
+        titles = [
+            (device.get("type") or "", title)
+            for device in item.get("devices") or ()
+            for title in device.get("titles") or ()
+        ]
+        primary = next((title for _, title in titles if title.get("placement") in PRIMARY_PLACEMENTS), None)
+        profiles[item.get("xuid")] = {
+            "state": item.get("state") or "Offline",
+            "text": primary.get("name") if primary else None,
+            "last_seen": (item.get("lastSeen") or {}).get("timestamp") or "",
+            "details": [
+                {
+                    "state": title.get("state"),
+                    "device": device,
+                    "is_game": None,
+                    "is_primary": title.get("placement") in PRIMARY_PLACEMENTS,
+                    "title_id": title.get("id"),
+                }
+                for device, title in titles
+            ],
+        }
+    return profiles
+
+
+def parse_title(body: bytes) -> tuple[str, str] | None:
+    """Return ``(name, display_image)`` of the first title in a titlehub response."""
+    titles = loads(body).get("titles") or ()
+    if not titles:
+        return None
+    return titles[0].get("name") or "", titles[0].get("displayImage") or ""
+
+
+def parse_console_list(body: bytes) -> dict[str, str]:
+    """Return ``{console_id: power_state}`` from a SmartGlass devices list response."""
+    return {
+        console["id"].upper(): console.get("powerState") or "Unknown"
+        for console in loads(body).get("result") or ()
+        if console.get("id")
+    }
+
+
+def parse_console_status(body: bytes) -> tuple[str, str]:
+    """Return ``(power_state, focus_app_aumid)`` from a SmartGlass console status response."""
+    status = loads(body)
+    return status.get("powerState") or "Unknown", status.get("focusAppAumid") or ""
+
+
+def parse_title_history(body: bytes) -> list[tuple[str, str, str]]:
+    """Return ``(title_id, name, display_image)`` for each title in a titlehub history response."""
+    return [
+        (str(title.get("titleId")), title.get("name") or "", title.get("displayImage") or "")
+        for title in loads(body).get("titles") or ()
+        if title.get("titleId")
+    ]
+
+
+def parse_installed_games(body: bytes) -> list[tuple[str, str, str]]:
+    """Return ``(product_id, title_id, name)`` for installed games in an installedApps response."""
+    games = []
+    for app in loads(body).get("result") or ():
+        product_id = app.get("oneStoreProductId")
+        if not product_id:
+            continue
+        content_type = app.get("contentType")
+        if content_type and content_type != "Game":
+            continue
+        title_id = app.get("titleId")
+        games.append((
+            product_id,
+            str(title_id) if title_id else "",
+            app.get("name") or f"Game {title_id or 'Unknown'}",
+        ))
+    return games
@@ -0,0 +1,294 @@
+"""
+Play-session history.
+
+Every game session (console, XUID, title, start and end) is kept in an
+embedded SQLite database. Finished sessions are buffered and written in one
+transaction per batch on a dedicated thread, never on the event loop. The
+same transaction adds each session's duration to a per-day, per-console,
+per-title rollup; play-time sensors read those rollups, mirrored in memory
+for the last week, instead of the raw history. Sessions and rollups older
+than the retention period are deleted once a day.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+from uc_intg_xbox import diagnostics
+from uc_intg_xbox.const import (
+    HISTORY_BATCH,
+    HISTORY_FLUSH_INTERVAL,
+    HISTORY_RETENTION_DAYS,
+    HISTORY_WINDOW_DAYS,
+)
+
+_LOG = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    console TEXT NOT NULL,
+    xuid TEXT NOT NULL,
+    title_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    started REAL NOT NULL,
+    ended REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_console_started ON sessions (console, started);
+CREATE INDEX IF NOT EXISTS sessions_title_started ON sessions (title_id, started);
+CREATE INDEX IF NOT EXISTS sessions_ended ON sessions (ended);
+CREATE TABLE IF NOT EXISTS daily_play (
+    day TEXT NOT NULL,
+    console TEXT NOT NULL,
+    title_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (day, console, title_id)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass(slots=True)
+class Session:
+    console: str
+    xuid: str
+    title_id: str
+    title: str
+    started: datetime
+    ended: datetime
+
+
+def _days(started: datetime, ended: datetime) -> list[tuple[date, float]]:
+    """Split a session into seconds played per local calendar day."""
+    start, end = started.astimezone(), ended.astimezone()
+    parts = []
+    while start < end:
+        midnight = datetime.combine(start.date() + timedelta(days=1), datetime.min.time(), start.tzinfo)
+        part_end = min(end, midnight)
+        parts.append((start.date(), (part_end - start).total_seconds()))
+        start = part_end
+    return parts
+
+
+class SessionHistory:
+    """Buffered writer and rollup reader for the session database."""
+
+    def __init__(self) -> None:
+        self._path = ""
+        self._db: sqlite3.Connection | None = None
+        # One thread owns the connection; every query and write runs there in order.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+        self._buffer: list[Session] = []
+        self._daily: dict[tuple[str, date], float] = defaultdict(float)
+        self._flush_task: asyncio.Task | None = None
+        self._flushing: asyncio.Task | None = None
+        self._pruned_on: date | None = None
+        self.written = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._path)
+
+    async def start(self, path: str) -> None:
+        self._path = path
+        await self._run(self._open)
+        for console, day, seconds in await self._run(self._load_window):
+            self._daily[console, day] += seconds
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        _LOG.info("Session history in %s, kept for %d days", path, HISTORY_RETENTION_DAYS)
+
+    async def stop(self) -> None:
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        if self._db:
+            await self._run(self._db.close)
+            self._db = None
+
+    def record(self, console: str, xuid: str, title_id: str, title: str, started: datetime, ended: datetime) -> None:
+        if not self.enabled or ended <= started:
+            return
+        self._buffer.append(Session(console, xuid, title_id, title, started, ended))
+        for day, seconds in _days(started, ended):
+            self._daily[console, day] += seconds
+        if len(self._buffer) >= HISTORY_BATCH and (self._flushing is None or self._flushing.done()):
+            self._flushing = asyncio.create_task(self.flush())
+
+    def play_seconds(self, console: str, days: int = 1, playing_since: datetime | None = None) -> float:
+        """Seconds played on ``console`` today and the ``days - 1`` days before, including a running session."""
+        first = date.today() - timedelta(days=days - 1)
+        total = sum(self._daily.get((console, first + timedelta(days=offset)), 0.0) for offset in range(days))
+        if playing_since:
+            total += sum(
+                seconds for day, seconds in _days(playing_since, datetime.now(timezone.utc)) if day >= first
+            )
+        return total
+
+    async def flush(self) -> None:
+        if not self._buffer or self._db is None:
+            return
+        batch, self._buffer = self._buffer, []
+        started = time.perf_counter()
+        try:
+            await self._run(self._write, batch)
+        except sqlite3.Error as err:
+            _LOG.error("Could not write %d session(s) to history: %s", len(batch), err)
+            self._buffer[:0] = batch
+            return
+        self.flushes += 1
+        self.written += len(batch)
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        if self._pruned_on != date.today():
+            await self._run(self._prune)
+            self._pruned_on = date.today()
+            self._trim_window()
+
+    # Queries run after every write already queued on the history thread, so the written rows plus the
+    # buffer as it is when the query is queued cover every recorded session exactly once.
+
+    async def sessions(self, console: str | None = None, days: int = 7, limit: int = 100) -> list[dict]:
+        """Most recent sessions first, from the raw history and the sessions not yet written."""
+        since = time.time() - days * 86400
+        pending = [
+            (s.console, s.xuid, s.title_id, s.title, s.started.timestamp(), s.ended.timestamp())
+            for s in self._buffer
+            if s.started.timestamp() >= since and (not console or s.console == console)
+        ]
+        rows = await self._run(self._query_sessions, console, since, limit)
+        rows = sorted(rows + pending, key=lambda row: row[4], reverse=True)[:limit]
+        return [
+            {
+                "console": row[0],
+                "xuid": row[1],
+                "title_id": row[2],
+                "title": row[3],
+                "started": datetime.fromtimestamp(row[4], timezone.utc).isoformat(),
+                "ended": datetime.fromtimestamp(row[5], timezone.utc).isoformat(),
+            }
+            for row in rows
+        ]
+
+    async def totals(self, console: str | None = None, days: int = 7) -> list[dict]:
+        """Play time per title over the last ``days`` days, from the rollups and the sessions not yet written."""
+        first = date.today() - timedelta(days=days - 1)
+        titles: dict[str, list] = {}
+        for s in self._buffer:
+            if console and s.console != console:
+                continue
+            for day, seconds in _days(s.started, s.ended):
+                if day >= first:
+                    titles.setdefault(s.title_id, [s.title, 0.0])[1] += seconds
+        for title_id, title, seconds in await self._run(self._query_totals, console, first):
+            titles.setdefault(title_id, [title, 0.0])[1] += seconds
+        return [
+            {"title_id": title_id, "title": title, "minutes": round(seconds / 60)}
+            for title_id, (title, seconds) in sorted(titles.items(), key=lambda item: item[1][1], reverse=True)
+        ]
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(HISTORY_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as err:
+                _LOG.error("History flush failed: %s", err)
+
+    def _trim_window(self) -> None:
+        first = date.today() - timedelta(days=HISTORY_WINDOW_DAYS - 1)
+        for key in [key for key in self._daily if key[1] < first]:
+            del self._daily[key]
+
+    # Everything below runs on the history thread.
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self._path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def _load_window(self) -> list[tuple[str, date, float]]:
+        first = date.today() - timedelta(days=HISTORY_WINDOW_DAYS - 1)
+        rows = self._db.execute(
+            "SELECT console, day, SUM(seconds) FROM daily_play WHERE day >= ? GROUP BY console, day",
+            (first.isoformat(),),
+        )
+        return [(console, date.fromisoformat(day), seconds) for console, day, seconds in rows]
+
+    def _write(self, batch: list[Session]) -> None:
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO sessions (console, xuid, title_id, title, started, ended) VALUES (?, ?, ?, ?, ?, ?)",
+                [(s.console, s.xuid, s.title_id, s.title, s.started.timestamp(), s.ended.timestamp()) for s in batch],
+            )
+            self._db.executemany(
+                "INSERT INTO daily_play (day, console, title_id, title, seconds) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (day, console, title_id) DO UPDATE SET "
+                "seconds = seconds + excluded.seconds, title = excluded.title",
+                [
+                    (day.isoformat(), s.console, s.title_id, s.title, seconds)
+                    for s in batch for day, seconds in _days(s.started, s.ended)
+                ],
+            )
+
+    def _prune(self) -> None:
+        cutoff = date.today() - timedelta(days=HISTORY_RETENTION_DAYS)
+        cutoff_ts = datetime.combine(cutoff, datetime.min.time()).astimezone().timestamp()
+        with self._db:
+            sessions = self._db.execute("DELETE FROM sessions WHERE ended < ?", (cutoff_ts,)).rowcount
+            rollups = self._db.execute("DELETE FROM daily_play WHERE day < ?", (cutoff.isoformat(),)).rowcount
+        if sessions or rollups:
+            _LOG.info("Pruned %d session(s) and %d daily total(s) older than %s", sessions, rollups, cutoff)
+
+    def _query_sessions(self, console: str | None, since: float, limit: int) -> list[tuple]:
+        query = "SELECT console, xuid, title_id, title, started, ended FROM sessions WHERE started >= ?"
+        params: list = [since]
+        if console:
+            query += " AND console = ?"
+            params.append(console)
+        query += " ORDER BY started DESC LIMIT ?"
+        params.append(limit)
+        return self._db.execute(query, params).fetchall()
+
+    def _query_totals(self, console: str | None, first: date) -> list[tuple[str, str, float]]:
+        query = "SELECT title_id, MAX(title), SUM(seconds) FROM daily_play WHERE day >= ?"
+        params: list = [first.isoformat()]
+        if console:
+            query += " AND console = ?"
+            params.append(console)
+        query += " GROUP BY title_id"
+        return self._db.execute(query, params).fetchall()
+
+    def report(self) -> dict:
+        return {
+            "path": self._path,
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "retention_days": HISTORY_RETENTION_DAYS,
+        }
+
+
+_HISTORY = SessionHistory()
+
+diagnostics.register("history", _HISTORY.report)
+
+
+def session_history() -> SessionHistory:
+    return _HISTORY
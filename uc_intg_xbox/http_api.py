@@ -0,0 +1,241 @@
+"""
+Local HTTP API for dashboards and home automation.
+
+``GET /api/consoles`` returns every console's state in one response,
+``GET /api/events`` streams state changes as server-sent events and
+``POST /api/commands`` runs a batch of commands, consoles in parallel and
+each console's commands in order. ``GET /api/history`` returns recent play
+sessions and per-title totals. Changes come from the devices' own
+update events, so subscribers are told about a change the moment the
+Remote is. A slow subscriber only ever holds the latest state per console.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Callable
+
+from aiohttp import web
+
+from uc_intg_xbox.const import BROADCAST_TIMEOUT, SSE_KEEPALIVE
+from uc_intg_xbox.diagnostics import bearer_authorized, is_loopback
+from uc_intg_xbox.history import session_history
+
+if TYPE_CHECKING:
+    from uc_intg_xbox.device import XboxDevice
+
+_LOG = logging.getLogger(__name__)
+
+
+def console_state(device: "XboxDevice") -> dict:
+    started = device.session_started
+    return {
+        "id": device.identifier,
+        "name": device.name,
+        "state": device.state,
+        "presence_state": device.presence_state,
+        "media_title": device.media_title,
+        "media_image": device.media_image,
+        "gamertag": device.gamertag,
+        "active_player": device.active_player,
+        "gamerscore": device.gamerscore,
+        "status_text": device.status_text,
+        "in_party": device.in_party,
+        "in_multiplayer": device.in_multiplayer,
+        "session_started": started.isoformat() if started else None,
+        "last_transport": device.last_transport,
+        "command_error": device.command_error,
+    }
+
+
+class _Subscriber:
+    """Latest unsent state per console for one event stream."""
+
+    def __init__(self) -> None:
+        self.pending: dict[str, tuple[int, dict]] = {}
+        self.ready = asyncio.Event()
+
+
+class StateFeed:
+    """Fans console state changes out to event-stream subscribers."""
+
+    def __init__(self) -> None:
+        self._subscribers: set[_Subscriber] = set()
+        self._last: dict[str, dict] = {}
+        self._seq = itertools.count(1)
+
+    def publish(self, device: "XboxDevice") -> None:
+        # Polls push an update even when nothing changed; only real changes are sent.
+        if not self._subscribers:
+            self._last.pop(device.identifier, None)
+            return
+        state = console_state(device)
+        if self._last.get(device.identifier) == state:
+            return
+        self._last[device.identifier] = state
+        event = (next(self._seq), state)
+        for subscriber in self._subscribers:
+            subscriber.pending[device.identifier] = event
+            subscriber.ready.set()
+
+    def forget(self, device_id: str) -> None:
+        self._last.pop(device_id, None)
+
+    def subscribe(self) -> _Subscriber:
+        subscriber = _Subscriber()
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+
+class HttpApiServer:
+    """Serves console state, state changes and batch commands over local HTTP."""
+
+    def __init__(
+        self,
+        devices: Callable[[], dict[str, "XboxDevice"]],
+        feed: StateFeed,
+        port: int,
+        host: str = "127.0.0.1",
+        token: str = "",
+    ):
+        self._devices = devices
+        self._feed = feed
+        self._port = port
+        self._host = host
+        self._token = token
+        self._app = web.Application(middlewares=[self._authorize])
+        self._app.router.add_get("/api/consoles", self._handle_consoles)
+        self._app.router.add_get("/api/consoles/{id}", self._handle_console)
+        self._app.router.add_get("/api/events", self._handle_events)
+        self._app.router.add_post("/api/commands", self._handle_commands)
+        self._app.router.add_get("/api/history", self._handle_history)
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        if not self._token and not is_loopback(self._host):
+            # Anyone on the network could power consoles off.
+            _LOG.error("Not serving the HTTP API on %s without UC_XBOX_HTTP_TOKEN", self._host)
+            return
+        self._runner = web.AppRunner(self._app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port, reuse_address=True).start()
+        _LOG.info("HTTP API available on http://%s:%d/api/consoles", self._host, self._port)
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _authorize(self, request: web.Request, handler) -> web.StreamResponse:
+        if not bearer_authorized(request, self._token):
+            raise web.HTTPUnauthorized()
+        return await handler(request)
+
+    async def _handle_consoles(self, request: web.Request) -> web.Response:
+        return web.json_response({"consoles": [console_state(device) for device in self._devices().values()]})
+
+    async def _handle_console(self, request: web.Request) -> web.Response:
+        device = self._devices().get(request.match_info["id"])
+        if device is None:
+            raise web.HTTPNotFound()
+        return web.json_response(console_state(device))
+
+    async def _handle_events(self, request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+        await response.prepare(request)
+        subscriber = self._feed.subscribe()
+        try:
+            # Start from the full current state; changes follow as they happen.
+            for device in self._devices().values():
+                await response.write(_event("console", console_state(device)))
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), SSE_KEEPALIVE)
+                except TimeoutError:
+                    await response.write(b": keepalive\n\n")
+                    continue
+                subscriber.ready.clear()
+                pending, subscriber.pending = subscriber.pending, {}
+                for seq, state in sorted(pending.values(), key=lambda event: event[0]):
+                    await response.write(_event("console", state, seq))
+        except ConnectionResetError:
+            pass
+        finally:
+            self._feed.unsubscribe(subscriber)
+        return response
+
+    async def _handle_commands(self, request: web.Request) -> web.Response:
+        """Body: ``{"commands": [{"console": "<id>", "command": "HOME"}, ...]}``; no console means all."""
+        try:
+            body = await request.json()
+            items = [(str(item.get("console") or ""), str(item["command"])) for item in body["commands"]]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise web.HTTPBadRequest(text='Expected {"commands": [{"console": "<id>", "command": "<command>"}]}')
+
+        devices = self._devices()
+        results: list[dict[str, Any]] = []
+        by_console: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for console, command in items:
+            for device_id in [console] if console else list(devices):
+                result = {"console": device_id, "command": command, "ok": False, "error": ""}
+                results.append(result)
+                by_console[device_id].append(result)
+
+        async def run(device_id: str, queued: list[dict[str, Any]]) -> None:
+            device = devices.get(device_id)
+            for result in queued:
+                if device is None:
+                    result["error"] = "unknown console"
+                    continue
+                try:
+                    async with asyncio.timeout(BROADCAST_TIMEOUT):
+                        result["ok"] = await device.submit_command(result["command"])
+                    if not result["ok"]:
+                        result["error"] = "rejected"
+                except TimeoutError:
+                    result["error"] = f"timed out after {BROADCAST_TIMEOUT:.0f}s"
+                except Exception as err:
+                    result["error"] = str(err) or type(err).__name__
+
+        await asyncio.gather(*(run(device_id, queued) for device_id, queued in by_console.items()))
+        return web.json_response({"results": results})
+
+    async def _handle_history(self, request: web.Request) -> web.Response:
+        """Query: ``console`` (optional), ``days`` (default 7) and ``limit`` (default 100)."""
+        history = session_history()
+        if not history.enabled:
+            raise web.HTTPNotFound(text="Session history is disabled")
+        console = request.query.get("console") or None
+        try:
+            days = max(int(request.query.get("days", "7")), 1)
+            limit = max(int(request.query.get("limit", "100")), 1)
+        except ValueError:
+            raise web.HTTPBadRequest(text="days and limit must be integers")
+        return web.json_response({
+            "totals": await history.totals(console, days),
+            "sessions": await history.sessions(console, days, limit),
+        })
+
+
+def _event(kind: str, data: dict, seq: int | None = None) -> bytes:
+    lines = [f"event: {kind}", f"data: {json.dumps(data, separators=(',', ':'))}"]
+    if seq is not None:
+        lines.insert(0, f"id: {seq}")
+    return ("\n".join(lines) + "\n\n").encode()
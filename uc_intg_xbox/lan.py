@@ -0,0 +1,112 @@
+"""
+Local network SmartGlass discovery.
+
+Consoles answer SmartGlass discovery requests on UDP 5050 while they are on,
+which gives a cheap power-state probe that never touches Xbox Live.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+import struct
+from dataclasses import dataclass
+
+from uc_intg_xbox.const import LAN_PROBE_TIMEOUT, SMARTGLASS_PORT
+
+_LOG = logging.getLogger(__name__)
+
+BROADCAST_ADDRESS = "255.255.255.255"
+
+PACKET_DISCOVERY_REQUEST = 0xDD00
+PACKET_DISCOVERY_RESPONSE = 0xDD01
+
+CLIENT_TYPE_ANDROID = 8
+
+
+@dataclass
+class ConsoleInfo:
+    address: str
+    name: str
+    uuid: str
+    certificate: bytes
+
+
+def pack_sgstring(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return struct.pack(">H", len(data)) + data + b"\x00"
+
+
+def unpack_sgstring(data: bytes, offset: int) -> tuple[str, int]:
+    (length,) = struct.unpack_from(">H", data, offset)
+    start = offset + 2
+    return data[start:start + length].decode("utf-8", errors="replace"), start + length + 1
+
+
+def build_discovery_request() -> bytes:
+    payload = struct.pack(">IHHH", 0, CLIENT_TYPE_ANDROID, 0, 2)
+    return struct.pack(">HHH", PACKET_DISCOVERY_REQUEST, len(payload), 0) + payload
+
+
+def parse_discovery_response(data: bytes, address: str) -> ConsoleInfo | None:
+    try:
+        packet_type, _length, _version = struct.unpack_from(">HHH", data, 0)
+        if packet_type != PACKET_DISCOVERY_RESPONSE:
+            return None
+        offset = 6 + 4 + 2  # header, flags, client type
+        name, offset = unpack_sgstring(data, offset)
+        uuid, offset = unpack_sgstring(data, offset)
+        offset += 4  # last error
+        (cert_length,) = struct.unpack_from(">H", data, offset)
+        certificate = data[offset + 2:offset + 2 + cert_length]
+        return ConsoleInfo(address=address, name=name, uuid=uuid, certificate=certificate)
+    except (struct.error, UnicodeDecodeError):
+        _LOG.debug("Malformed discovery response from %s", address)
+        return None
+
+
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, liveid: str):
+        self._liveid = liveid.upper().encode("ascii", errors="ignore")
+        self.found: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        console = parse_discovery_response(data, addr[0])
+        if not console or self.found.done():
+            return
+        # The console certificate's subject is its Live ID.
+        if self._liveid and self._liveid not in console.certificate:
+            return
+        self.found.set_result(console)
+
+    def error_received(self, exc: Exception) -> None:
+        _LOG.debug("Discovery socket error: %s", exc)
+
+
+async def probe_console(
+    liveid: str,
+    address: str = "",
+    timeout: float = LAN_PROBE_TIMEOUT,
+    port: int = SMARTGLASS_PORT,
+    attempts: int = 3,
+) -> ConsoleInfo | None:
+    """Return the console's discovery answer, or None if it did not answer in time."""
+    loop = asyncio.get_running_loop()
+    target = address or BROADCAST_ADDRESS
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: _DiscoveryProtocol(liveid),
+        local_addr=("0.0.0.0", 0),
+        allow_broadcast=not address,
+    )
+    request = build_discovery_request()
+    try:
+        for _ in range(attempts):
+            transport.sendto(request, (target, port))
+            try:
+                return await asyncio.wait_for(asyncio.shield(protocol.found), timeout / attempts)
+            except asyncio.TimeoutError:
+                continue
+        return None
+    finally:
+        transport.close()
@@ -0,0 +1,113 @@
+"""
+Compact installed-game library.
+
+Game records are slotted and shared by every console signed in to the same
+account, so a title installed on several consoles is stored once.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import sys
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import overload
+
+
+@dataclass(slots=True, eq=False)
+class Game:
+    product_id: str
+    title_id: str
+    name: str
+    image: str = ""
+    enriched: bool = False
+
+
+class GameStore:
+    """Canonical Game records for one account, plus name and artwork of titles seen elsewhere."""
+
+    __slots__ = ("_by_product", "_by_title", "_titles")
+
+    def __init__(self) -> None:
+        self._by_product: dict[str, Game] = {}
+        self._by_title: dict[str, Game] = {}
+        self._titles: dict[str, tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_product)
+
+    def get(self, product_id: str, title_id: str, name: str) -> Game:
+        game = self._by_product.get(product_id)
+        if game is None:
+            game = Game(sys.intern(product_id), sys.intern(title_id), name)
+            known = self._titles.get(title_id)
+            if known:
+                game.name = known[0] or name
+                game.image = known[1]
+                game.enriched = True
+            self._by_product[game.product_id] = game
+            if game.title_id:
+                self._by_title[game.title_id] = game
+        return game
+
+    def by_product_id(self, product_id: str) -> Game | None:
+        return self._by_product.get(product_id)
+
+    def by_title_id(self, title_id: str) -> Game | None:
+        return self._by_title.get(title_id)
+
+    def remember_title(self, title_id: str, name: str, image: str) -> None:
+        self._titles[sys.intern(title_id)] = (name, image)
+
+    def title_info(self, title_id: str) -> tuple[str, str] | None:
+        """Return ``(name, image)`` for a title, from its Game record or a remembered lookup."""
+        game = self._by_title.get(title_id)
+        if game is not None and game.enriched:
+            return game.name, game.image
+        return self._titles.get(title_id)
+
+
+class GameLibrary(Sequence[Game]):
+    """Ordered, read-only list of one console's installed games."""
+
+    __slots__ = ("_games", "_by_product", "_by_title")
+
+    def __init__(self, games: Iterable[Game] = ()) -> None:
+        self._games: tuple[Game, ...] = tuple(games)
+        self._by_product: dict[str, Game] = {game.product_id: game for game in self._games}
+        self._by_title: dict[str, Game] = {game.title_id: game for game in self._games if game.title_id}
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    @overload
+    def __getitem__(self, index: int) -> Game: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> tuple[Game, ...]: ...
+
+    def __getitem__(self, index):
+        return self._games[index]
+
+    def __iter__(self) -> Iterator[Game]:
+        return iter(self._games)
+
+    def __contains__(self, game: object) -> bool:
+        return isinstance(game, Game) and self._by_product.get(game.product_id) is game
+
+    def by_product_id(self, product_id: str) -> Game | None:
+        return self._by_product.get(product_id)
+
+    def by_title_id(self, title_id: str) -> Game | None:
+        return self._by_title.get(title_id)
+
+
+_STORES: dict[str, GameStore] = {}
+
+
+def shared_store(xuid: str) -> GameStore:
+    """Return the GameStore shared by all consoles of ``xuid``."""
+    store = _STORES.get(xuid)
+    if store is None:
+        store = _STORES[xuid] = GameStore()
+    return store
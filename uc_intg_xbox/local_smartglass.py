@@ -0,0 +1,374 @@
+"""
+Local network SmartGlass command transport.
+
+Implements the subset of the SmartGlass protocol needed for input and media
+commands: discovery, the ECDH-keyed connect handshake, the encrypted message
+channel and the SystemInput / SystemMedia channels. Only anonymous
+connections are made, so the console must allow connections from any device.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import struct
+import time
+import uuid
+
+from cryptography import x509
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+from uc_intg_xbox.const import (
+    LOCAL_ACK_TIMEOUT,
+    LOCAL_CONNECT_TIMEOUT,
+    LOCAL_HEARTBEAT_INTERVAL,
+    LOCAL_HEARTBEAT_MISSES,
+    SMARTGLASS_PORT,
+)
+from uc_intg_xbox.lan import CLIENT_TYPE_ANDROID, pack_sgstring, probe_console
+
+_LOG = logging.getLogger(__name__)
+
+PACKET_CONNECT_REQUEST = 0xCC00
+PACKET_CONNECT_RESPONSE = 0xCC01
+PACKET_MESSAGE = 0xD00D
+
+MSG_ACK = 0x1
+MSG_LOCAL_JOIN = 0x3
+MSG_START_CHANNEL_REQUEST = 0x26
+MSG_START_CHANNEL_RESPONSE = 0x27
+MSG_DISCONNECT = 0x2A
+MSG_POWER_OFF = 0x39
+MSG_MEDIA_COMMAND = 0xF01
+MSG_GAMEPAD = 0xF0A
+
+CHANNEL_CORE = 0
+CHANNEL_ACK = 0x1000000000000000
+
+SERVICE_SYSTEM_INPUT = uuid.UUID("fa20b8ca-66fb-46e0-adb6-0b978a59d35f")
+SERVICE_SYSTEM_MEDIA = uuid.UUID("48a9ca24-eb6d-4e12-8c43-d57469edd3cd")
+
+KEY_PREFIX = bytes.fromhex("D637F1AAE2F0418C")
+KEY_SUFFIX = bytes.fromhex("A8F81A574E228AB7")
+
+PUBLIC_KEY_TYPES = {"secp256r1": 0, "secp384r1": 1, "secp521r1": 2}
+
+MESSAGE_HEADER = struct.Struct(">HHIIIHQ")
+HMAC_SIZE = 32
+
+GAMEPAD_BUTTONS = {
+    "Nexus": 0x2,
+    "Guide": 0x2,
+    "Menu": 0x4,
+    "View": 0x8,
+    "A": 0x10,
+    "B": 0x20,
+    "X": 0x40,
+    "Y": 0x80,
+    "Up": 0x100,
+    "Down": 0x200,
+    "Left": 0x400,
+    "Right": 0x800,
+}
+
+MEDIA_COMMANDS = {
+    "Play": 0x2,
+    "Pause": 0x4,
+    "PlayPause": 0x8,
+    "Next": 0x40,
+    "Previous": 0x80,
+}
+
+
+def _pad(data: bytes) -> bytes:
+    overlap = len(data) % 16
+    if not overlap:
+        return data
+    size = 16 - overlap
+    return data + bytes([size]) * size
+
+
+class SmartGlassCrypto:
+    """Session keys derived from an ECDH exchange with the console certificate key."""
+
+    def __init__(self, certificate: bytes):
+        console_key = x509.load_der_x509_certificate(certificate).public_key()
+        if not isinstance(console_key, ec.EllipticCurvePublicKey):
+            raise ValueError("Console certificate does not carry an EC public key")
+        private_key = ec.generate_private_key(console_key.curve)
+        self.public_key_type = PUBLIC_KEY_TYPES[console_key.curve.name]
+        # The protocol sends the raw point without the uncompressed marker byte.
+        self.public_key = private_key.public_key().public_bytes(
+            Encoding.X962, PublicFormat.UncompressedPoint
+        )[1:]
+        secret = hashlib.sha512(KEY_PREFIX + private_key.exchange(ec.ECDH(), console_key) + KEY_SUFFIX).digest()
+        self._aes_key = secret[:16]
+        self._iv_key = secret[16:32]
+        self._hash_key = secret[32:]
+
+    def encrypt(self, data: bytes, iv: bytes) -> bytes:
+        encryptor = Cipher(algorithms.AES(self._aes_key), modes.CBC(iv)).encryptor()
+        return encryptor.update(_pad(data)) + encryptor.finalize()
+
+    def decrypt(self, data: bytes, iv: bytes) -> bytes:
+        decryptor = Cipher(algorithms.AES(self._aes_key), modes.CBC(iv)).decryptor()
+        return decryptor.update(data) + decryptor.finalize()
+
+    def iv_from(self, seed: bytes) -> bytes:
+        encryptor = Cipher(algorithms.AES(self._iv_key), modes.ECB()).encryptor()
+        return encryptor.update(seed[:16]) + encryptor.finalize()
+
+    def sign(self, data: bytes) -> bytes:
+        return hmac.new(self._hash_key, data, hashlib.sha256).digest()
+
+    def verify(self, data: bytes) -> bool:
+        return hmac.compare_digest(self.sign(data[:-HMAC_SIZE]), data[-HMAC_SIZE:])
+
+
+class _SessionProtocol(asyncio.DatagramProtocol):
+    def __init__(self, session: "LocalSmartGlass"):
+        self._session = session
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        self._session._handle_packet(data)
+
+    def error_received(self, exc: Exception) -> None:
+        _LOG.debug("Local SmartGlass socket error: %s", exc)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._session._drop_session("socket closed")
+
+
+class LocalSmartGlass:
+    """Encrypted SmartGlass session with one console on the local network."""
+
+    def __init__(self, liveid: str, address: str = "", port: int = SMARTGLASS_PORT):
+        self._liveid = liveid
+        self._address = address
+        self._port = port
+        self._transport: asyncio.DatagramTransport | None = None
+        self._crypto: SmartGlassCrypto | None = None
+        self._connected = False
+        self._participant_id = 0
+        self._sequence = 0
+        self._channels: dict[uuid.UUID, int] = {}
+        self._connect_future: asyncio.Future | None = None
+        self._channel_futures: dict[int, asyncio.Future] = {}
+        self._ack_futures: dict[int, asyncio.Future] = {}
+        self._last_ack = 0.0
+        self._heartbeat_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    async def ensure_connected(self) -> None:
+        async with self._lock:
+            if not self._connected:
+                try:
+                    await asyncio.wait_for(self._connect(), LOCAL_CONNECT_TIMEOUT)
+                except BaseException:
+                    # A half-open session (no channels yet) must not be reused.
+                    await self._close_transport()
+                    raise
+
+    async def _connect(self) -> None:
+        await self._close_transport()
+        console = await probe_console(self._liveid, self._address, port=self._port)
+        if not console:
+            raise ConnectionError("Console did not answer discovery")
+
+        loop = asyncio.get_running_loop()
+        self._crypto = SmartGlassCrypto(console.certificate)
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _SessionProtocol(self), remote_addr=(console.address, self._port)
+        )
+        self._sequence = 0
+        self._channels.clear()
+
+        self._connect_future = loop.create_future()
+        self._transport.sendto(self._build_connect_request())
+        result, self._participant_id = await self._connect_future
+        if result != 0:
+            raise ConnectionError(f"Console refused connection (result {result})")
+
+        self._last_ack = time.monotonic()
+        self._send_message(MSG_LOCAL_JOIN, CHANNEL_CORE, self._local_join_payload(), need_ack=True)
+        for request_id, service in enumerate((SERVICE_SYSTEM_INPUT, SERVICE_SYSTEM_MEDIA), start=1):
+            self._channels[service] = await self._start_channel(request_id, service)
+        self._connected = True
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        _LOG.info("Local SmartGlass session established with %s", console.address)
+
+    async def _start_channel(self, request_id: int, service: uuid.UUID) -> int:
+        future = asyncio.get_running_loop().create_future()
+        self._channel_futures[request_id] = future
+        payload = struct.pack(">II", request_id, 0) + service.bytes + struct.pack(">I", 0)
+        self._send_message(MSG_START_CHANNEL_REQUEST, CHANNEL_CORE, payload, need_ack=True)
+        return await future
+
+    async def _heartbeat(self) -> None:
+        # UDP never reports a lost peer; a console in standby or off the network just stops acking.
+        while self._connected:
+            await asyncio.sleep(LOCAL_HEARTBEAT_INTERVAL)
+            if time.monotonic() - self._last_ack > LOCAL_HEARTBEAT_INTERVAL * LOCAL_HEARTBEAT_MISSES:
+                self._drop_session(f"no acknowledgement for {LOCAL_HEARTBEAT_MISSES} heartbeats")
+                return
+            self._send_message(MSG_ACK, CHANNEL_ACK, struct.pack(">III", 0, 0, 0), need_ack=True)
+
+    async def close(self) -> None:
+        if self._connected:
+            self._send_message(MSG_DISCONNECT, CHANNEL_CORE, struct.pack(">II", 0, 0))
+        await self._close_transport()
+
+    async def _close_transport(self) -> None:
+        self._drop_session("")
+
+    def _drop_session(self, reason: str) -> None:
+        if reason and self._connected:
+            _LOG.info("Local SmartGlass session lost: %s", reason)
+        self._connected = False
+        if self._heartbeat_task and self._heartbeat_task is not asyncio.current_task():
+            self._heartbeat_task.cancel()
+        self._heartbeat_task = None
+        for future in (*self._ack_futures.values(), *self._channel_futures.values()):
+            if not future.done():
+                future.set_exception(ConnectionError("Local SmartGlass session closed"))
+        self._ack_futures.clear()
+        self._channel_futures.clear()
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+
+    async def press_button(self, button: str) -> None:
+        flag = GAMEPAD_BUTTONS[button]
+        await self.ensure_connected()
+        channel = self._channels[SERVICE_SYSTEM_INPUT]
+        await self._send_acknowledged(MSG_GAMEPAD, channel, self._gamepad_payload(flag))
+        await asyncio.sleep(0.1)
+        await self._send_acknowledged(MSG_GAMEPAD, channel, self._gamepad_payload(0))
+
+    async def media_command(self, command: str) -> None:
+        value = MEDIA_COMMANDS[command]
+        await self.ensure_connected()
+        payload = struct.pack(">QII", int(time.time() * 1000), 0, value)
+        await self._send_acknowledged(MSG_MEDIA_COMMAND, self._channels[SERVICE_SYSTEM_MEDIA], payload)
+
+    async def power_off(self) -> None:
+        await self.ensure_connected()
+        await self._send_acknowledged(MSG_POWER_OFF, CHANNEL_CORE, pack_sgstring(self._liveid))
+
+    async def _send_acknowledged(self, msg_type: int, channel: int, payload: bytes) -> None:
+        """Send a message and wait for the console to acknowledge it; raises so the caller can fall back."""
+        sequence = self._send_message(msg_type, channel, payload, need_ack=True)
+        future = asyncio.get_running_loop().create_future()
+        self._ack_futures[sequence] = future
+        try:
+            await asyncio.wait_for(future, LOCAL_ACK_TIMEOUT)
+        except TimeoutError:
+            self._drop_session(f"message 0x{msg_type:X} not acknowledged")
+            raise ConnectionError("Console did not acknowledge the command") from None
+        finally:
+            self._ack_futures.pop(sequence, None)
+
+    def _build_connect_request(self) -> bytes:
+        iv = os.urandom(16)
+        unprotected = (
+            uuid.uuid4().bytes
+            + struct.pack(">H", self._crypto.public_key_type)
+            + self._crypto.public_key
+            + iv
+        )
+        # Anonymous connection: empty user hash and token, single request group.
+        protected = pack_sgstring("") + pack_sgstring("") + struct.pack(">III", 0, 0, 1)
+        header = struct.pack(">HHHH", PACKET_CONNECT_REQUEST, len(unprotected), len(protected), 2)
+        packet = header + unprotected + self._crypto.encrypt(protected, iv)
+        return packet + self._crypto.sign(packet)
+
+    def _local_join_payload(self) -> bytes:
+        return struct.pack(
+            ">HHHHHQIII", CLIENT_TYPE_ANDROID, 1080, 1920, 480, 480, 0xFFFFFFFFFFFFFFFF, 15, 6, 2
+        ) + pack_sgstring("Unfolded Circle Remote")
+
+    @staticmethod
+    def _gamepad_payload(buttons: int) -> bytes:
+        return struct.pack(">QH6f", int(time.time() * 1000), buttons, 0, 0, 0, 0, 0, 0)
+
+    def _send_message(self, msg_type: int, channel: int, payload: bytes, need_ack: bool = False) -> int:
+        if not self._transport:
+            raise ConnectionError("Local SmartGlass session is not open")
+        self._sequence += 1
+        flags = (2 << 14) | (int(need_ack) << 13) | msg_type
+        header = MESSAGE_HEADER.pack(
+            PACKET_MESSAGE, len(payload), self._sequence, 0, self._participant_id, flags, channel
+        )
+        packet = header + self._crypto.encrypt(payload, self._crypto.iv_from(header))
+        self._transport.sendto(packet + self._crypto.sign(packet))
+        return self._sequence
+
+    def _handle_packet(self, data: bytes) -> None:
+        if len(data) < 2 or not self._crypto:
+            return
+        (packet_type,) = struct.unpack_from(">H", data, 0)
+        if not self._crypto.verify(data):
+            _LOG.debug("Dropping local SmartGlass packet 0x%04X with bad signature", packet_type)
+            return
+        if packet_type == PACKET_CONNECT_RESPONSE:
+            self._handle_connect_response(data)
+        elif packet_type == PACKET_MESSAGE:
+            self._handle_message(data)
+
+    def _handle_connect_response(self, data: bytes) -> None:
+        _type, unprotected_length, protected_length, _version = struct.unpack_from(">HHHH", data, 0)
+        iv = data[8:8 + unprotected_length]
+        protected = self._crypto.decrypt(data[8 + unprotected_length:-HMAC_SIZE], iv)[:protected_length]
+        result, _pairing_state, participant_id = struct.unpack_from(">HHI", protected, 0)
+        if self._connect_future and not self._connect_future.done():
+            self._connect_future.set_result((result, participant_id))
+
+    def _handle_message(self, data: bytes) -> None:
+        header = data[:MESSAGE_HEADER.size]
+        _type, length, sequence, _target, _source, flags, _channel = MESSAGE_HEADER.unpack(header)
+        payload = self._crypto.decrypt(data[MESSAGE_HEADER.size:-HMAC_SIZE], self._crypto.iv_from(header))[:length]
+        msg_type = flags & 0xFFF
+
+        if flags & (1 << 13):
+            self._send_message(MSG_ACK, CHANNEL_ACK, struct.pack(">IIII", sequence, 1, sequence, 0))
+
+        if msg_type == MSG_ACK:
+            self._handle_ack(payload)
+        elif msg_type == MSG_START_CHANNEL_RESPONSE:
+            request_id, channel_id, result = struct.unpack_from(">IQI", payload, 0)
+            future = self._channel_futures.pop(request_id, None)
+            if future and not future.done():
+                if result == 0:
+                    future.set_result(channel_id)
+                else:
+                    future.set_exception(ConnectionError(f"Channel request {request_id} failed ({result})"))
+        elif msg_type == MSG_DISCONNECT:
+            self._drop_session("console closed the session")
+
+    def _handle_ack(self, payload: bytes) -> None:
+        self._last_ack = time.monotonic()
+        try:
+            low_watermark, processed_count = struct.unpack_from(">II", payload, 0)
+            processed = struct.unpack_from(f">{processed_count}I", payload, 8)
+            (rejected_count,) = struct.unpack_from(">I", payload, 8 + 4 * processed_count)
+            rejected = struct.unpack_from(f">{rejected_count}I", payload, 12 + 4 * processed_count)
+        except struct.error:
+            _LOG.debug("Malformed local SmartGlass acknowledgement")
+            return
+        for sequence, future in list(self._ack_futures.items()):
+            if future.done():
+                continue
+            if sequence in rejected:
+                future.set_exception(ConnectionError(f"Console rejected message {sequence}"))
+            elif sequence in processed or sequence <= low_watermark:
+                future.set_result(None)
@@ -0,0 +1,160 @@
+"""
+Logging setup for hot paths.
+
+This package's records below the configured level are kept in a ring buffer,
+their message rendered when captured, and only written out, oldest first, when
+an error is logged. Other libraries stay at the configured level, so their
+debug calls remain cheap no-ops. Records that are
+written are rate limited per message key, and can be emitted as JSON lines.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import json
+import logging
+from collections import deque
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)-25s | %(message)s"
+
+QUIET_LOGGERS = {
+    "aiohttp": logging.WARNING,
+    "websockets.server": logging.CRITICAL,
+    "httpx": logging.WARNING,
+    "httpcore": logging.WARNING,
+}
+
+PACKAGE_LOGGER = __name__.rpartition(".")[0]
+
+_configured_level = logging.INFO
+
+_RECORD_FIELDS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "log_key"}
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.processName,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Passes at most ``burst`` records per message key and window.
+
+    The key is ``extra={"log_key": ...}`` when given, otherwise the logger name
+    and unformatted message. Errors are never dropped.
+    """
+
+    def __init__(self, burst: int, window: float = 60.0):
+        super().__init__()
+        self._burst = burst
+        self._window = window
+        self._keys: dict[tuple, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self._burst <= 0 or record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, getattr(record, "log_key", None) or record.msg)
+        now = record.created
+        state = self._keys.get(key)
+        if state is None or now - state[0] >= self._window:
+            suppressed = state[2] if state else 0
+            self._keys[key] = [now, 1, 0]
+            if suppressed:
+                record.msg = f"{record.msg} [{suppressed} similar suppressed]"
+            if len(self._keys) > 4096:
+                self._prune(now)
+            return True
+        if state[1] < self._burst:
+            state[1] += 1
+            return True
+        state[2] += 1
+        return False
+
+    def _prune(self, now: float) -> None:
+        for key in [k for k, state in self._keys.items() if now - state[0] >= self._window]:
+            del self._keys[key]
+
+
+class RingBufferHandler(logging.Handler):
+    """Writes records at ``level`` or above to ``target``; keeps the rest for the next error."""
+
+    def __init__(self, target: logging.Handler, level: int, capacity: int, flush_level: int = logging.ERROR):
+        super().__init__(logging.NOTSET)
+        self._target = target
+        self._output_level = level
+        self._flush_level = flush_level
+        self._ring: deque[logging.LogRecord] = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.levelno < self._output_level:
+            # Render now: the arguments may be mutable objects that change before a dump.
+            record.msg = record.getMessage()
+            record.args = None
+            self._ring.append(record)
+            return
+        if record.levelno >= self._flush_level and self._ring:
+            self.dump()
+        self._target.handle(record)
+
+    def dump(self) -> None:
+        """Write out and clear the buffered records."""
+        records = list(self._ring)
+        self._ring.clear()
+        header = logging.makeLogRecord({
+            "name": __name__, "levelno": logging.INFO, "levelname": "INFO",
+            "msg": "Last %d buffered debug records follow", "args": (len(records),),
+        })
+        # Straight to emit: buffered context is not rate limited.
+        self._target.acquire()
+        try:
+            for record in [header, *records]:
+                self._target.emit(record)
+        finally:
+            self._target.release()
+
+    def close(self) -> None:
+        self._target.close()
+        super().close()
+
+
+def configured_level() -> int:
+    """Return the output level, which differs from the package logger level while debug records are buffered."""
+    return _configured_level
+
+
+def configure_logging(level: int, fmt: str = "text", rate_limit: int = 0, ring_size: int = 0,
+                      text_format: str = TEXT_FORMAT) -> None:
+    global _configured_level
+    _configured_level = level
+    output = logging.StreamHandler()
+    output.setFormatter(StructuredFormatter() if fmt == "json" else logging.Formatter(text_format))
+    if rate_limit:
+        output.addFilter(RateLimitFilter(rate_limit))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+    if ring_size and level > logging.DEBUG:
+        root.addHandler(RingBufferHandler(output, level, ring_size))
+        # Only this package's debug records are worth buffering.
+        logging.getLogger(PACKAGE_LOGGER).setLevel(logging.DEBUG)
+    else:
+        root.addHandler(output)
+        logging.getLogger(PACKAGE_LOGGER).setLevel(logging.NOTSET)
+
+    for name, quiet_level in QUIET_LOGGERS.items():
+        logging.getLogger(name).setLevel(quiet_level)
@@ -5,7 +5,9 @@ Xbox media player entity.
 :license: MPL-2.0, see LICENSE for more details.
 """
 
+import asyncio
 import logging
+from collections.abc import Sequence
 from typing import Any
 
 from ucapi import Pagination, StatusCodes, media_player
@@ -21,12 +23,42 @@ from ucapi.media_player import (
 from ucapi_framework import MediaPlayerEntity
 
 from uc_intg_xbox.config import XboxConfig
+from uc_intg_xbox.const import BROWSE_ENRICH_WAIT
 from uc_intg_xbox.device import XboxDevice
+from uc_intg_xbox.library import Game
+from uc_intg_xbox.tracing import span
 
 _LOG = logging.getLogger(__name__)
 
 PAGE_SIZE = 50
 
+COMMAND_MAP = {
+    media_player.Commands.ON: "POWER_ON",
+    media_player.Commands.OFF: "POWER_OFF",
+    media_player.Commands.TOGGLE: "POWER_TOGGLE",
+    media_player.Commands.PLAY_PAUSE: "PLAY_PAUSE",
+    media_player.Commands.NEXT: "NEXT",
+    media_player.Commands.PREVIOUS: "PREVIOUS",
+    media_player.Commands.FAST_FORWARD: "FAST_FORWARD",
+    media_player.Commands.REWIND: "REWIND",
+    media_player.Commands.VOLUME_UP: "VOLUME_UP",
+    media_player.Commands.VOLUME_DOWN: "VOLUME_DOWN",
+    media_player.Commands.MUTE_TOGGLE: "MUTE_TOGGLE",
+    media_player.Commands.HOME: "HOME",
+    media_player.Commands.MENU: "MENU",
+    media_player.Commands.CONTEXT_MENU: "CONTEXT_MENU",
+    media_player.Commands.CURSOR_UP: "DPAD_UP",
+    media_player.Commands.CURSOR_DOWN: "DPAD_DOWN",
+    media_player.Commands.CURSOR_LEFT: "DPAD_LEFT",
+    media_player.Commands.CURSOR_RIGHT: "DPAD_RIGHT",
+    media_player.Commands.CURSOR_ENTER: "A",
+    media_player.Commands.BACK: "BACK",
+    media_player.Commands.FUNCTION_RED: "B",
+    media_player.Commands.FUNCTION_GREEN: "A",
+    media_player.Commands.FUNCTION_YELLOW: "Y",
+    media_player.Commands.FUNCTION_BLUE: "X",
+}
+
 FEATURES = [
     media_player.Features.ON_OFF,
     media_player.Features.TOGGLE,
@@ -51,15 +83,15 @@ FEATURES = [
 ]
 
 
-def _game_to_browse_item(game: dict) -> BrowseMediaItem:
+def _game_to_browse_item(game: Game) -> BrowseMediaItem:
     return BrowseMediaItem(
-        media_id=game["one_store_product_id"],
-        title=game["name"],
+        media_id=game.product_id,
+        title=game.name,
         media_class=MediaClass.GAME,
         media_type=MediaContentType.GAME,
         can_browse=False,
         can_play=True,
-        thumbnail=game.get("image", ""),
+        thumbnail=game.image,
     )
 
 
@@ -82,6 +114,7 @@ class XboxMediaPlayer(MediaPlayerEntity):
             device_class=media_player.DeviceClasses.SET_TOP_BOX,
             cmd_handler=self._handle_command,
         )
+        self._enrich_tasks: set[asyncio.Task] = set()
         self.subscribe_to_device(device)
 
     async def sync_state(self) -> None:
@@ -105,7 +138,7 @@ class XboxMediaPlayer(MediaPlayerEntity):
         })
 
     async def browse(self, options: BrowseOptions) -> BrowseResults | StatusCodes:
-        if not self._device.client or not self._device.client.is_connected:
+        if not self._device.client_connected:
             return StatusCodes.SERVICE_UNAVAILABLE
 
         if self._device.state == "UNAVAILABLE":
@@ -119,6 +152,7 @@ class XboxMediaPlayer(MediaPlayerEntity):
         start = (page - 1) * limit
         end = min(start + limit, total)
 
+        await self._enrich_page(games[start:end], games[end:end + limit])
         items = [_game_to_browse_item(game) for game in games[start:end]]
 
         return BrowseResults(
@@ -135,87 +169,68 @@ class XboxMediaPlayer(MediaPlayerEntity):
         )
 
     async def search(self, options: SearchOptions) -> SearchResults | StatusCodes:
-        if not self._device.client or not self._device.client.is_connected:
+        if not self._device.client_connected:
             return StatusCodes.SERVICE_UNAVAILABLE
 
         query = options.query.lower() if options.query else ""
         if not query:
             return SearchResults(media=[], pagination=Pagination(page=1, limit=0, count=0))
 
-        matches = [
-            _game_to_browse_item(game)
-            for game in self._device.installed_games
-            if query in game["name"].lower()
-        ]
+        matches = [game for game in self._device.installed_games if query in game.name.lower()]
 
         page = options.paging.page if options.paging and options.paging.page else 1
         limit = options.paging.limit if options.paging and options.paging.limit else PAGE_SIZE
         start = (page - 1) * limit
         end = min(start + limit, len(matches))
 
+        await self._enrich_page(matches[start:end], matches[end:end + limit])
         return SearchResults(
-            media=matches[start:end],
+            media=[_game_to_browse_item(game) for game in matches[start:end]],
             pagination=Pagination(page=page, limit=end - start, count=len(matches)),
         )
 
+    async def _enrich_page(self, page: Sequence[Game], following: Sequence[Game]) -> None:
+        """Enrich the page being shown, waiting briefly for it, and the next page in the background."""
+        current = self._start_enrichment(page)
+        self._start_enrichment(following)
+        if current:
+            await asyncio.wait([current], timeout=BROWSE_ENRICH_WAIT)
+
+    def _start_enrichment(self, games: Sequence[Game]) -> asyncio.Task | None:
+        product_ids = [game.product_id for game in games if not game.enriched]
+        if not product_ids:
+            return None
+        # Kept running after a timeout; finished items are cached and pushed as they arrive.
+        task = asyncio.create_task(self._device.enrich_games(product_ids))
+        self._enrich_tasks.add(task)
+        task.add_done_callback(self._enrich_done)
+        return task
+
+    def _enrich_done(self, task: asyncio.Task) -> None:
+        self._enrich_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            _LOG.debug("[%s] Enrichment failed: %s", self.id, task.exception())
+
     async def _handle_command(
         self, entity: Any, cmd_id: str, params: dict[str, Any] | None
+    ) -> StatusCodes:
+        with span("media_player.command", entity=entity.id, command=cmd_id, params=str(params or "")) as trace:
+            status = await self._run_command(entity, cmd_id, params)
+            if trace:
+                trace.attributes["status"] = int(status)
+            return status
+
+    async def _run_command(
+        self, entity: Any, cmd_id: str, params: dict[str, Any] | None
     ) -> StatusCodes:
         try:
-            match cmd_id:
-                case media_player.Commands.ON:
-                    await self._device.power_on()
-                case media_player.Commands.OFF:
-                    await self._device.power_off()
-                case media_player.Commands.TOGGLE:
-                    await self._device.send_command("POWER_TOGGLE")
-                case media_player.Commands.PLAY_PAUSE:
-                    await self._device.send_command("PLAY_PAUSE")
-                case media_player.Commands.NEXT:
-                    await self._device.send_command("NEXT")
-                case media_player.Commands.PREVIOUS:
-                    await self._device.send_command("PREVIOUS")
-                case media_player.Commands.FAST_FORWARD:
-                    await self._device.send_command("FAST_FORWARD")
-                case media_player.Commands.REWIND:
-                    await self._device.send_command("REWIND")
-                case media_player.Commands.VOLUME_UP:
-                    await self._device.send_command("VOLUME_UP")
-                case media_player.Commands.VOLUME_DOWN:
-                    await self._device.send_command("VOLUME_DOWN")
-                case media_player.Commands.MUTE_TOGGLE:
-                    await self._device.send_command("MUTE_TOGGLE")
-                case media_player.Commands.HOME:
-                    await self._device.send_command("HOME")
-                case media_player.Commands.MENU:
-                    await self._device.send_command("MENU")
-                case media_player.Commands.CONTEXT_MENU:
-                    await self._device.send_command("CONTEXT_MENU")
-                case media_player.Commands.CURSOR_UP:
-                    await self._device.send_command("DPAD_UP")
-                case media_player.Commands.CURSOR_DOWN:
-                    await self._device.send_command("DPAD_DOWN")
-                case media_player.Commands.CURSOR_LEFT:
-                    await self._device.send_command("DPAD_LEFT")
-                case media_player.Commands.CURSOR_RIGHT:
-                    await self._device.send_command("DPAD_RIGHT")
-                case media_player.Commands.CURSOR_ENTER:
-                    await self._device.send_command("A")
-                case media_player.Commands.BACK:
-                    await self._device.send_command("BACK")
-                case media_player.Commands.FUNCTION_RED:
-                    await self._device.send_command("B")
-                case media_player.Commands.FUNCTION_GREEN:
-                    await self._device.send_command("A")
-                case media_player.Commands.FUNCTION_YELLOW:
-                    await self._device.send_command("Y")
-                case media_player.Commands.FUNCTION_BLUE:
-                    await self._device.send_command("X")
-                case media_player.Commands.PLAY_MEDIA:
-                    return await self._handle_play_media(params)
-                case _:
-                    return StatusCodes.NOT_IMPLEMENTED
-            return StatusCodes.OK
+            if cmd_id == media_player.Commands.PLAY_MEDIA:
+                return await self._handle_play_media(params)
+            command = COMMAND_MAP.get(cmd_id)
+            if command is None:
+                return StatusCodes.NOT_IMPLEMENTED
+            success = await self._device.submit_command(command)
+            return StatusCodes.OK if success else StatusCodes.SERVER_ERROR
         except Exception as err:
             _LOG.error("[%s] Command %s failed: %s", entity.id, cmd_id, err)
             return StatusCodes.SERVER_ERROR
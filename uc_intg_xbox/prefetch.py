@@ -0,0 +1,220 @@
+"""
+Predictive title metadata and artwork prefetch.
+
+One title-history request per account names the recently played titles and
+carries their metadata, which is remembered in the account's GameStore.
+The most likely next titles (recent, installed first) then have their
+artwork downloaded at a Remote-sized resolution into a local cache, one at
+a time, only while no polls are running and within a byte budget per cycle.
+A launch of one of those titles shows its name and art without any request.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import base64
+import logging
+import os
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from uc_intg_xbox.const import (
+    PREFETCH_ART_SIZE,
+    PREFETCH_BUDGET_BYTES,
+    PREFETCH_HISTORY,
+    PREFETCH_INTERVAL,
+    PREFETCH_MAX_IMAGE_BYTES,
+    PREFETCH_SPACING,
+    PREFETCH_TITLES,
+)
+from uc_intg_xbox.library import GameStore
+from uc_intg_xbox.scheduler import poll_scheduler
+
+if TYPE_CHECKING:
+    from uc_intg_xbox.client import XboxClient
+
+_LOG = logging.getLogger(__name__)
+
+# Hosts that resize images from query parameters.
+RESIZING_HOSTS = ("store-images.s-microsoft.com", "images-eds-ssl.xboxlive.com")
+
+
+def sized_image_url(url: str, size: int = PREFETCH_ART_SIZE) -> str:
+    """Ask the image CDN for a ``size`` pixel square instead of the full-size original."""
+    if urlsplit(url).hostname not in RESIZING_HOSTS:
+        return url
+    return f"{url}{'&' if '?' in url else '?'}w={size}&h={size}"
+
+
+class ArtworkCache:
+    """Title artwork as data URIs, kept in memory and optionally on disk."""
+
+    def __init__(self, capacity: int = PREFETCH_TITLES * 2) -> None:
+        self._capacity = capacity
+        self._images: OrderedDict[str, str] = OrderedDict()
+        self._directory = ""
+
+    def configure(self, directory: str) -> None:
+        self._directory = directory
+
+    def get(self, title_id: str) -> str:
+        uri = self._images.get(title_id, "")
+        if uri:
+            self._images.move_to_end(title_id)
+        return uri
+
+    def __contains__(self, title_id: str) -> bool:
+        return title_id in self._images
+
+    async def put(self, title_id: str, content: bytes, content_type: str) -> None:
+        self._remember(title_id, content, content_type)
+        if self._directory:
+            await asyncio.to_thread(self._write, title_id, content, content_type)
+
+    async def load(self, title_ids: list[str]) -> None:
+        """Fill memory from disk for any of ``title_ids`` saved by an earlier run."""
+        if not self._directory:
+            return
+        for title_id, content, content_type in await asyncio.to_thread(self._read, title_ids):
+            self._remember(title_id, content, content_type)
+
+    def _remember(self, title_id: str, content: bytes, content_type: str) -> None:
+        self._images[title_id] = f"data:{content_type};base64,{base64.b64encode(content).decode()}"
+        self._images.move_to_end(title_id)
+        while len(self._images) > self._capacity:
+            self._images.popitem(last=False)
+
+    def _path(self, title_id: str, content_type: str) -> str:
+        return os.path.join(self._directory, f"{title_id}.{content_type.rpartition('/')[2] or 'img'}")
+
+    def _write(self, title_id: str, content: bytes, content_type: str) -> None:
+        os.makedirs(self._directory, exist_ok=True)
+        with open(self._path(title_id, content_type), "wb") as f:
+            f.write(content)
+
+    def _read(self, title_ids: list[str]) -> list[tuple[str, bytes, str]]:
+        if not os.path.isdir(self._directory):
+            return []
+        files = {name.partition(".")[0]: name for name in os.listdir(self._directory)}
+        found = []
+        for title_id in title_ids:
+            name = files.get(title_id)
+            if name is None or title_id in self._images:
+                continue
+            with open(os.path.join(self._directory, name), "rb") as f:
+                found.append((title_id, f.read(), f"image/{name.partition('.')[2]}"))
+        return found
+
+
+_ARTWORK = ArtworkCache()
+
+
+def artwork_cache() -> ArtworkCache:
+    return _ARTWORK
+
+
+class TitlePrefetcher:
+    """Keeps metadata and artwork of an account's likely next titles warm."""
+
+    def __init__(self, store: GameStore) -> None:
+        self._store = store
+        self._clients: set["XboxClient"] = set()
+        self._task: asyncio.Task | None = None
+        self.cycles = 0
+        self.downloaded_bytes = 0
+
+    def start(self, client: "XboxClient") -> None:
+        self._clients.add(client)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def release(self, client: "XboxClient") -> bool:
+        """Forget a closed client; stops and returns True once no connected client is left."""
+        self._clients.discard(client)
+        if any(other.is_connected for other in self._clients):
+            return False
+        self.stop()
+        return True
+
+    def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._cycle()
+            except Exception as err:
+                _LOG.debug("Title prefetch failed: %s (%s)", err, type(err).__name__)
+            await asyncio.sleep(PREFETCH_INTERVAL)
+
+    def rank(self, history: list[tuple[str, str, str]]) -> list[tuple[str, str]]:
+        """Most recently played first, with titles installed on a console ahead of the rest."""
+        ranked = sorted(
+            enumerate(history),
+            key=lambda item: (self._store.by_title_id(item[1][0]) is None, item[0]),
+        )
+        return [(title_id, image) for _, (title_id, _, image) in ranked if image][:PREFETCH_TITLES]
+
+    async def _cycle(self) -> None:
+        client = next((client for client in self._clients if client.is_connected), None)
+        if client is None:
+            return
+        history = await client.get_title_history(PREFETCH_HISTORY)
+        for title_id, name, image in history:
+            self._store.remember_title(title_id, name, image)
+        candidates = self.rank(history)
+        await _ARTWORK.load([title_id for title_id, _ in candidates])
+
+        budget = PREFETCH_BUDGET_BYTES
+        fetched = 0
+        for title_id, image in candidates:
+            if title_id in _ARTWORK or title_id in _REJECTED:
+                continue
+            await _idle()
+            content, content_type = await client.fetch_artwork(sized_image_url(image))
+            # Rejected downloads still cost their bytes.
+            budget -= len(content)
+            self.downloaded_bytes += len(content)
+            if len(content) > PREFETCH_MAX_IMAGE_BYTES or not content_type.startswith("image/"):
+                # The CDN serves the same thing next time; never download it again.
+                _REJECTED.add(title_id)
+            else:
+                await _ARTWORK.put(title_id, content, content_type)
+                fetched += 1
+            if budget <= 0:
+                break
+            await asyncio.sleep(PREFETCH_SPACING)
+        self.cycles += 1
+        _LOG.debug("Prefetched %d of %d likely titles (%d bytes left in budget)",
+                   fetched, len(candidates), max(budget, 0))
+
+
+async def _idle() -> None:
+    """Wait until no device polls are running; prefetching never competes with them."""
+    scheduler = poll_scheduler()
+    while scheduler.in_flight:
+        await asyncio.sleep(PREFETCH_SPACING)
+
+
+_PREFETCHERS: dict[str, TitlePrefetcher] = {}
+# Titles whose artwork was too large or not an image, shared by every account.
+_REJECTED: set[str] = set()
+
+
+def title_prefetcher(xuid: str, store: GameStore) -> TitlePrefetcher:
+    """Return the TitlePrefetcher shared by all consoles of ``xuid``."""
+    prefetcher = _PREFETCHERS.get(xuid)
+    if prefetcher is None:
+        prefetcher = _PREFETCHERS[xuid] = TitlePrefetcher(store)
+    return prefetcher
+
+
+def release_title_prefetcher(xuid: str, client: "XboxClient") -> None:
+    """Detach a closing client; the account's prefetcher stops with its last connected client."""
+    prefetcher = _PREFETCHERS.get(xuid)
+    if prefetcher and prefetcher.release(client):
+        del _PREFETCHERS[xuid]
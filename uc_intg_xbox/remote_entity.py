@@ -6,25 +6,25 @@ Xbox remote entity with UI pages and button mappings.
 """
 
 import logging
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 from ucapi import StatusCodes, remote
 from ucapi.ui import Buttons, Size, UiPage, create_btn_mapping, create_ui_icon, create_ui_text
 from ucapi_framework import RemoteEntity
 
+from uc_intg_xbox.broadcast import BroadcastResult
 from uc_intg_xbox.config import XboxConfig
+from uc_intg_xbox.const import GROUP_IDENTIFIER, SIMPLE_COMMANDS
 from uc_intg_xbox.device import XboxDevice
+from uc_intg_xbox.tracing import span
 
 _LOG = logging.getLogger(__name__)
 
-SIMPLE_COMMANDS = [
-    "POWER_ON", "POWER_OFF", "POWER_TOGGLE",
-    "DPAD_UP", "DPAD_DOWN", "DPAD_LEFT", "DPAD_RIGHT", "DPAD_CENTER",
-    "A", "B", "X", "Y",
-    "BACK", "HOME", "MENU", "CONTEXT_MENU", "NEXUS",
-    "PLAY", "PAUSE", "PLAY_PAUSE", "NEXT", "PREVIOUS", "FAST_FORWARD", "REWIND",
-    "VOLUME_UP", "VOLUME_DOWN", "MUTE_TOGGLE",
-]
+POWER_COMMANDS = {
+    remote.Commands.ON: "POWER_ON",
+    remote.Commands.OFF: "POWER_OFF",
+    remote.Commands.TOGGLE: "POWER_TOGGLE",
+}
 
 
 def _create_button_mapping() -> list:
@@ -116,25 +116,28 @@ class XboxRemote(RemoteEntity):
 
     async def _handle_command(
         self, entity: Any, cmd_id: str, params: dict[str, Any] | None
+    ) -> StatusCodes:
+        with span("remote.command", entity=entity.id, command=cmd_id, params=str(params or "")) as trace:
+            status = await self._run_command(entity, cmd_id, params)
+            if trace:
+                trace.attributes["status"] = int(status)
+            return status
+
+    async def _run_command(
+        self, entity: Any, cmd_id: str, params: dict[str, Any] | None
     ) -> StatusCodes:
         try:
-            if cmd_id == remote.Commands.ON:
-                await self._device.power_on()
-                return StatusCodes.OK
-            if cmd_id == remote.Commands.OFF:
-                await self._device.power_off()
-                return StatusCodes.OK
-            if cmd_id == remote.Commands.TOGGLE:
-                await self._device.send_command("POWER_TOGGLE")
-                return StatusCodes.OK
+            if cmd_id in POWER_COMMANDS:
+                success = await self._device.submit_command(POWER_COMMANDS[cmd_id])
+                return StatusCodes.OK if success else StatusCodes.SERVER_ERROR
             if cmd_id == remote.Commands.SEND_CMD and params:
                 command = params.get("command", "")
                 if command:
-                    success = await self._device.send_command(command)
+                    success = await self._device.submit_command(command)
                     return StatusCodes.OK if success else StatusCodes.SERVER_ERROR
             if cmd_id == remote.Commands.SEND_CMD_SEQUENCE and params:
                 for command in params.get("sequence", []):
-                    success = await self._device.send_command(command)
+                    success = await self._device.submit_command(command)
                     if not success:
                         return StatusCodes.SERVER_ERROR
                 return StatusCodes.OK
@@ -142,3 +145,44 @@ class XboxRemote(RemoteEntity):
         except Exception as err:
             _LOG.error("[%s] Command %s failed: %s", entity.id, cmd_id, err)
             return StatusCodes.SERVER_ERROR
+
+
+class XboxGroupRemote(RemoteEntity):
+    """Sends every command to all configured consoles at once."""
+
+    def __init__(self, broadcast: Callable[[str], Awaitable[list[BroadcastResult]]]) -> None:
+        self._broadcast = broadcast
+        super().__init__(
+            f"remote.{GROUP_IDENTIFIER}",
+            "All Xbox Consoles",
+            [remote.Features.ON_OFF, remote.Features.TOGGLE, remote.Features.SEND_CMD],
+            {remote.Attributes.STATE: remote.States.ON},
+            simple_commands=SIMPLE_COMMANDS,
+            button_mapping=_create_button_mapping(),
+            ui_pages=_create_ui_pages(),
+            cmd_handler=self._handle_command,
+        )
+
+    async def _handle_command(
+        self, entity: Any, cmd_id: str, params: dict[str, Any] | None
+    ) -> StatusCodes:
+        if cmd_id == remote.Commands.SEND_CMD_SEQUENCE and params:
+            commands = list(params.get("sequence", []))
+        else:
+            command = POWER_COMMANDS.get(cmd_id) or (
+                cmd_id == remote.Commands.SEND_CMD and (params or {}).get("command", "")
+            )
+            if not command:
+                return StatusCodes.NOT_IMPLEMENTED
+            commands = [command]
+        with span("remote.broadcast", entity=entity.id, command=cmd_id, params=str(params or "")) as trace:
+            for command in commands:
+                results = await self._broadcast(command)
+                if not any(result.ok for result in results):
+                    status = StatusCodes.SERVER_ERROR
+                    break
+            else:
+                status = StatusCodes.OK
+            if trace:
+                trace.attributes["status"] = int(status)
+            return status
@@ -0,0 +1,134 @@
+"""
+Xbox Live Real-Time Activity (RTA) subscription.
+
+RTA is the websocket service Xbox Live uses to push presence and title
+changes. Messages are JSON arrays whose first element is the message type.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import json
+import logging
+import ssl
+from typing import Any, Awaitable, Callable
+
+import aiohttp
+import certifi
+
+from uc_intg_xbox.const import RTA_PROTOCOL, RTA_RECONNECT_INTERVAL, RTA_URL
+
+_LOG = logging.getLogger(__name__)
+
+MSG_SUBSCRIBE = 1
+MSG_EVENT = 3
+MSG_RESYNC = 4
+
+AuthHeaderProvider = Callable[[], Awaitable[str]]
+EventCallback = Callable[[str, Any], None]
+
+
+class RtaSubscription:
+    """Keeps an RTA websocket open and forwards events for a set of resources."""
+
+    def __init__(
+        self,
+        auth_header: AuthHeaderProvider,
+        resources: list[str],
+        on_event: EventCallback,
+        url: str = RTA_URL,
+    ):
+        self._auth_header = auth_header
+        self._resources = resources
+        self._on_event = on_event
+        self._url = url
+        self._task: asyncio.Task | None = None
+        self._ws: aiohttp.ClientWebSocketResponse | None = None
+        self._sequence: int = 0
+        self._pending: dict[int, str] = {}
+        self._subscriptions: dict[int, str] = {}
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None and not self._ws.closed and bool(self._subscriptions)
+
+    def start(self) -> None:
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    headers = {"Authorization": await self._auth_header()}
+                    async with session.ws_connect(
+                        self._url, headers=headers, protocols=(RTA_PROTOCOL,), heartbeat=30, ssl=ssl_context
+                    ) as ws:
+                        self._ws = ws
+                        _LOG.debug("RTA connected to %s", self._url)
+                        await self._subscribe_all()
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                await self._handle_message(msg.data)
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                    _LOG.debug("RTA connection closed")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as err:
+                    _LOG.debug("RTA connection error: %s", err)
+                finally:
+                    subscribed = bool(self._subscriptions)
+                    self._ws = None
+                    self._pending.clear()
+                    self._subscriptions.clear()
+                # A dropped subscription may have missed events; a failed attempt missed nothing new.
+                if subscribed:
+                    self._on_event("", None)
+                await asyncio.sleep(RTA_RECONNECT_INTERVAL)
+
+    async def _subscribe_all(self) -> None:
+        for resource in self._resources:
+            self._sequence += 1
+            self._pending[self._sequence] = resource
+            await self._ws.send_str(json.dumps([MSG_SUBSCRIBE, self._sequence, resource]))
+
+    async def _handle_message(self, raw: str) -> None:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            _LOG.debug("RTA ignored non-JSON message")
+            return
+        if not isinstance(message, list) or not message:
+            return
+
+        kind = message[0]
+        if kind == MSG_SUBSCRIBE:
+            sequence, status = message[1], message[2]
+            resource = self._pending.pop(sequence, "")
+            if status != 0:
+                _LOG.warning("RTA subscription to %s failed with status %s", resource, status)
+                return
+            self._subscriptions[message[3]] = resource
+            _LOG.debug("RTA subscribed to %s", resource)
+        elif kind == MSG_EVENT:
+            resource = self._subscriptions.get(message[1])
+            if resource is not None:
+                self._on_event(resource, message[2] if len(message) > 2 else None)
+        elif kind == MSG_RESYNC:
+            _LOG.debug("RTA resync requested")
+            self._subscriptions.clear()
+            await self._subscribe_all()
+            self._on_event("", None)
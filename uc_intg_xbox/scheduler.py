@@ -0,0 +1,171 @@
+"""
+Integration-wide poll scheduler.
+
+Device polls run from one queue instead of a timer per device. Each device
+gets a fixed phase within its poll interval, taken from a low-discrepancy
+sequence, so polls stay evenly spread however many consoles there are and
+fall back into place after a shared reconnect. A global cap bounds how many
+polls run at once; when polls are waiting for a slot, the most overdue goes
+first.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from ucapi_framework import PollingDevice
+
+from uc_intg_xbox import diagnostics
+from uc_intg_xbox.const import POLL_LAG_SAMPLES, POLL_MAX_IN_FLIGHT
+from uc_intg_xbox.watchdog import percentile
+
+_LOG = logging.getLogger(__name__)
+
+# Fractional part of the golden ratio: successive multiples fill [0, 1) evenly.
+PHASE_STEP = 0.6180339887498949
+
+
+@dataclass(order=True)
+class _Entry:
+    due: float
+    seq: int
+    device: PollingDevice = field(compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class PollScheduler:
+    """Runs every registered device's ``poll_device`` on a staggered, capped schedule."""
+
+    def __init__(self, max_in_flight: int = POLL_MAX_IN_FLIGHT, lag_samples: int = POLL_LAG_SAMPLES):
+        self._max_in_flight = max(max_in_flight, 1)
+        self._queue: list[_Entry] = []
+        self._entries: dict[str, _Entry] = {}
+        self._phases: dict[str, int] = {}
+        self._running: dict[str, asyncio.Task] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._lags: deque[float] = deque(maxlen=lag_samples)
+        self._polls = 0
+        self._peak_in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    def add(self, device: PollingDevice) -> None:
+        identifier = device.identifier
+        if identifier not in self._phases:
+            used = set(self._phases.values())
+            self._phases[identifier] = next(index for index in itertools.count() if index not in used)
+        self._push(device, self._next_due(device, time.monotonic()))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def remove(self, device: PollingDevice) -> None:
+        identifier = device.identifier
+        self._phases.pop(identifier, None)
+        entry = self._entries.pop(identifier, None)
+        if entry:
+            entry.cancelled = True
+        running = self._running.pop(identifier, None)
+        if running and running is not asyncio.current_task():
+            running.cancel()
+
+    def _next_due(self, device: PollingDevice, after: float) -> float:
+        """The grid point of the device's phase closest to one interval after ``after``."""
+        interval = max(float(getattr(device, "_poll_interval", 30)), 1.0)
+        offset = (self._phases[device.identifier] * PHASE_STEP % 1.0) * interval
+        return offset + round((after + interval - offset) / interval) * interval
+
+    def _push(self, device: PollingDevice, due: float) -> None:
+        previous = self._entries.get(device.identifier)
+        if previous:
+            previous.cancelled = True
+        entry = _Entry(due, next(self._seq), device)
+        self._entries[device.identifier] = entry
+        heapq.heappush(self._queue, entry)
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            while self._queue and self._queue[0].cancelled:
+                heapq.heappop(self._queue)
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._queue[0].due - time.monotonic()
+            if delay > 0 or len(self._running) >= self._max_in_flight:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay if delay > 0 else None)
+                except TimeoutError:
+                    pass
+                continue
+
+            # Earliest due first, so the most overdue poll takes the free slot.
+            entry = heapq.heappop(self._queue)
+            identifier = entry.device.identifier
+            del self._entries[identifier]
+            self._running[identifier] = asyncio.create_task(self._poll(entry))
+            self._peak_in_flight = max(self._peak_in_flight, len(self._running))
+
+    async def _poll(self, entry: _Entry) -> None:
+        device = entry.device
+        started = time.monotonic()
+        self._lags.append(started - entry.due)
+        self._polls += 1
+        try:
+            await device.poll_device()
+        except asyncio.CancelledError:
+            return
+        except Exception as err:
+            _LOG.error("[%s] Poll error: %s", device.log_id, err)
+        finally:
+            identifier = device.identifier
+            if self._running.get(identifier) is asyncio.current_task():
+                del self._running[identifier]
+            self._wakeup.set()
+        if device.identifier in self._phases and device.identifier not in self._entries:
+            self._push(device, self._next_due(device, started))
+
+    def report(self) -> dict:
+        lags = list(self._lags)
+        return {
+            "devices": len(self._phases),
+            "polls": self._polls,
+            "in_flight": len(self._running),
+            "max_in_flight": self._max_in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "lag_ms": {
+                "p50": round(percentile(lags, 0.50) * 1000, 1),
+                "p95": round(percentile(lags, 0.95) * 1000, 1),
+                "p99": round(percentile(lags, 0.99) * 1000, 1),
+                "max": round(max(lags, default=0.0) * 1000, 1),
+            },
+            "next_due_s": {
+                entry.device.identifier: round(entry.due - time.monotonic(), 1)
+                for entry in sorted(self._entries.values())
+            },
+        }
+
+
+_SCHEDULER: PollScheduler | None = None
+
+
+def poll_scheduler() -> PollScheduler:
+    """Return the process-wide PollScheduler."""
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        _SCHEDULER = PollScheduler()
+        diagnostics.register("polls", _SCHEDULER.report)
+    return _SCHEDULER
@@ -6,16 +6,32 @@ Xbox sensor entities.
 """
 
 import logging
+from datetime import datetime
 
 from ucapi import sensor
 from ucapi_framework import SensorEntity
 
+from uc_intg_xbox.broadcast import BroadcastResult, summarize
 from uc_intg_xbox.config import XboxConfig
+from uc_intg_xbox.const import (
+    ASYNC_ACK,
+    GROUP_IDENTIFIER,
+    HISTORY_RETENTION_DAYS,
+    HISTORY_WINDOW_DAYS,
+)
 from uc_intg_xbox.device import XboxDevice
 
 _LOG = logging.getLogger(__name__)
 
 
+def _local_time(timestamp: str) -> str:
+    """Format an ISO timestamp from Xbox Live in local time; unparseable values are shown as is."""
+    try:
+        return datetime.fromisoformat(timestamp).astimezone().strftime("%Y-%m-%d %H:%M")
+    except ValueError:
+        return timestamp
+
+
 class GamertagSensor(SensorEntity):
     """Displays the Xbox gamertag."""
 
@@ -68,8 +84,290 @@ class CurrentGameSensor(SensorEntity):
         })
 
 
+class CommandTransportSensor(SensorEntity):
+    """Displays which transport carried the last command and its average latency."""
+
+    def __init__(self, device_config: XboxConfig, device: XboxDevice) -> None:
+        self._device = device
+        entity_id = f"sensor.{device_config.identifier}.command_transport"
+        super().__init__(
+            entity_id,
+            f"{device_config.name} Command Transport",
+            [],
+            {sensor.Attributes.STATE: sensor.States.UNKNOWN, sensor.Attributes.VALUE: ""},
+            device_class=sensor.DeviceClasses.CUSTOM,
+            options={sensor.Options.CUSTOM_UNIT: ""},
+        )
+        self.subscribe_to_device(device)
+
+    async def sync_state(self) -> None:
+        if self._device.state == "UNAVAILABLE" or not self._device.client_connected:
+            self.update({sensor.Attributes.STATE: sensor.States.UNAVAILABLE})
+            return
+        transport = self._device.last_transport
+        stats = self._device.transport_stats.get(transport)
+        value = f"{transport} ({stats.average_ms:.0f} ms avg)" if stats else "None"
+        self.update({
+            sensor.Attributes.STATE: sensor.States.ON,
+            sensor.Attributes.VALUE: value,
+        })
+
+
+class CommandStatusSensor(SensorEntity):
+    """Displays whether the last command acknowledged ahead of time went through."""
+
+    def __init__(self, device_config: XboxConfig, device: XboxDevice) -> None:
+        self._device = device
+        entity_id = f"sensor.{device_config.identifier}.command_status"
+        super().__init__(
+            entity_id,
+            f"{device_config.name} Command Status",
+            [],
+            {sensor.Attributes.STATE: sensor.States.UNKNOWN, sensor.Attributes.VALUE: ""},
+            device_class=sensor.DeviceClasses.CUSTOM,
+            options={sensor.Options.CUSTOM_UNIT: ""},
+        )
+        self.subscribe_to_device(device)
+
+    async def sync_state(self) -> None:
+        if self._device.state == "UNAVAILABLE":
+            self.update({sensor.Attributes.STATE: sensor.States.UNAVAILABLE})
+            return
+        self.update({
+            sensor.Attributes.STATE: sensor.States.ON,
+            sensor.Attributes.VALUE: self._device.command_error or "OK",
+        })
+
+
+class GamerscoreSensor(SensorEntity):
+    """Displays the account gamerscore."""
+
+    def __init__(self, device_config: XboxConfig, device: XboxDevice) -> None:
+        self._device = device
+        entity_id = f"sensor.{device_config.identifier}.gamerscore"
+        super().__init__(
+            entity_id,
+            f"{device_config.name} Gamerscore",
+            [],
+            {sensor.Attributes.STATE: sensor.States.UNKNOWN, sensor.Attributes.VALUE: ""},
+            device_class=sensor.DeviceClasses.CUSTOM,
+            options={sensor.Options.CUSTOM_UNIT: "G"},
+        )
+        self.subscribe_to_device(device)
+
+    async def sync_state(self) -> None:
+        if self._device.state == "UNAVAILABLE":
+            self.update({sensor.Attributes.STATE: sensor.States.UNAVAILABLE})
+            return
+        self.update({
+            sensor.Attributes.STATE: sensor.States.ON,
+            sensor.Attributes.VALUE: self._device.gamerscore or "0",
+        })
+
+
+class OnlineStatusSensor(SensorEntity):
+    """Displays the presence text with party and multiplayer details."""
+
+    def __init__(self, device_config: XboxConfig, device: XboxDevice) -> None:
+        self._device = device
+        entity_id = f"sensor.{device_config.identifier}.online_status"
+        super().__init__(
+            entity_id,
+            f"{device_config.name} Online Status",
+            [],
+            {sensor.Attributes.STATE: sensor.States.UNKNOWN, sensor.Attributes.VALUE: ""},
+            device_class=sensor.DeviceClasses.CUSTOM,
+            options={sensor.Options.CUSTOM_UNIT: ""},
+        )
+        self.subscribe_to_device(device)
+
+    async def sync_state(self) -> None:
+        if self._device.state == "UNAVAILABLE":
+            self.update({sensor.Attributes.STATE: sensor.States.UNAVAILABLE})
+            return
+        parts = [self._device.status_text or ("Offline" if self._device.presence_state == "OFF" else "Online")]
+        if self._device.presence_state == "OFF" and self._device.last_seen:
+            parts.append(f"Last seen {_local_time(self._device.last_seen)}")
+        if self._device.in_party:
+            parts.append("In party")
+        if self._device.in_multiplayer:
+            parts.append("In multiplayer")
+        self.update({
+            sensor.Attributes.STATE: sensor.States.ON,
+            sensor.Attributes.VALUE: " · ".join(parts),
+        })
+
+
+class SessionStartSensor(SensorEntity):
+    """Displays when the current game session started."""
+
+    def __init__(self, device_config: XboxConfig, device: XboxDevice) -> None:
+        self._device = device
+        entity_id = f"sensor.{device_config.identifier}.session_start"
+        super().__init__(
+            entity_id,
+            f"{device_config.name} Session Start",
+            [],
+            {sensor.Attributes.STATE: sensor.States.UNKNOWN, sensor.Attributes.VALUE: ""},
+            device_class=sensor.DeviceClasses.CUSTOM,
+            options={sensor.Options.CUSTOM_UNIT: ""},
+        )
+        self.subscribe_to_device(device)
+
+    async def sync_state(self) -> None:
+        if self._device.state == "UNAVAILABLE":
+            self.update({sensor.Attributes.STATE: sensor.States.UNAVAILABLE})
+            return
+        started = self._device.session_started
+        self.update({
+            sensor.Attributes.STATE: sensor.States.ON,
+            sensor.Attributes.VALUE: started.astimezone().strftime("%Y-%m-%d %H:%M") if started else "None",
+        })
+
+
+class PlayTimeSensor(SensorEntity):
+    """Displays how long the current game has been played."""
+
+    def __init__(self, device_config: XboxConfig, device: XboxDevice) -> None:
+        self._device = device
+        entity_id = f"sensor.{device_config.identifier}.play_time"
+        super().__init__(
+            entity_id,
+            f"{device_config.name} Play Time",
+            [],
+            {sensor.Attributes.STATE: sensor.States.UNKNOWN, sensor.Attributes.VALUE: ""},
+            device_class=sensor.DeviceClasses.CUSTOM,
+            options={sensor.Options.CUSTOM_UNIT: "min"},
+        )
+        self.subscribe_to_device(device)
+
+    async def sync_state(self) -> None:
+        if self._device.state == "UNAVAILABLE":
+            self.update({sensor.Attributes.STATE: sensor.States.UNAVAILABLE})
+            return
+        self.update({
+            sensor.Attributes.STATE: sensor.States.ON,
+            sensor.Attributes.VALUE: self._device.play_time_minutes,
+        })
+
+
+class PlayTimeTodaySensor(SensorEntity):
+    """Displays the minutes played on the console today."""
+
+    def __init__(self, device_config: XboxConfig, device: XboxDevice) -> None:
+        self._device = device
+        entity_id = f"sensor.{device_config.identifier}.play_time_today"
+        super().__init__(
+            entity_id,
+            f"{device_config.name} Play Time Today",
+            [],
+            {sensor.Attributes.STATE: sensor.States.UNKNOWN, sensor.Attributes.VALUE: ""},
+            device_class=sensor.DeviceClasses.CUSTOM,
+            options={sensor.Options.CUSTOM_UNIT: "min"},
+        )
+        self.subscribe_to_device(device)
+
+    async def sync_state(self) -> None:
+        if self._device.state == "UNAVAILABLE":
+            self.update({sensor.Attributes.STATE: sensor.States.UNAVAILABLE})
+            return
+        self.update({
+            sensor.Attributes.STATE: sensor.States.ON,
+            sensor.Attributes.VALUE: self._device.played_minutes(1),
+        })
+
+
+class PlayTimeWeekSensor(SensorEntity):
+    """Displays the minutes played on the console over the last seven days."""
+
+    def __init__(self, device_config: XboxConfig, device: XboxDevice) -> None:
+        self._device = device
+        entity_id = f"sensor.{device_config.identifier}.play_time_week"
+        super().__init__(
+            entity_id,
+            f"{device_config.name} Play Time This Week",
+            [],
+            {sensor.Attributes.STATE: sensor.States.UNKNOWN, sensor.Attributes.VALUE: ""},
+            device_class=sensor.DeviceClasses.CUSTOM,
+            options={sensor.Options.CUSTOM_UNIT: "min"},
+        )
+        self.subscribe_to_device(device)
+
+    async def sync_state(self) -> None:
+        if self._device.state == "UNAVAILABLE":
+            self.update({sensor.Attributes.STATE: sensor.States.UNAVAILABLE})
+            return
+        self.update({
+            sensor.Attributes.STATE: sensor.States.ON,
+            sensor.Attributes.VALUE: self._device.played_minutes(HISTORY_WINDOW_DAYS),
+        })
+
+
+class ActivePlayerSensor(SensorEntity):
+    """Displays which household member is playing on the console.
+
+    Presence names the console type (Xbox One, Series X|S), not the console itself, so a member
+    playing on another console in the house can show up here.
+    """
+
+    def __init__(self, device_config: XboxConfig, device: XboxDevice) -> None:
+        self._device = device
+        entity_id = f"sensor.{device_config.identifier}.active_player"
+        super().__init__(
+            entity_id,
+            f"{device_config.name} Active Player",
+            [],
+            {sensor.Attributes.STATE: sensor.States.UNKNOWN, sensor.Attributes.VALUE: ""},
+            device_class=sensor.DeviceClasses.CUSTOM,
+            options={sensor.Options.CUSTOM_UNIT: ""},
+        )
+        self.subscribe_to_device(device)
+
+    async def sync_state(self) -> None:
+        if self._device.state == "UNAVAILABLE":
+            self.update({sensor.Attributes.STATE: sensor.States.UNAVAILABLE})
+            return
+        self.update({
+            sensor.Attributes.STATE: sensor.States.ON,
+            sensor.Attributes.VALUE: self._device.active_player if self._device.presence_state != "OFF" else "None",
+        })
+
+
+class BroadcastSensor(SensorEntity):
+    """Displays the per-console outcome of the last command sent to all consoles."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            f"sensor.{GROUP_IDENTIFIER}.last_broadcast",
+            "All Xbox Consoles Last Command",
+            [],
+            {sensor.Attributes.STATE: sensor.States.ON, sensor.Attributes.VALUE: "None"},
+            device_class=sensor.DeviceClasses.CUSTOM,
+            options={sensor.Options.CUSTOM_UNIT: ""},
+        )
+
+    def show(self, command: str, results: list[BroadcastResult]) -> None:
+        self.update({
+            sensor.Attributes.STATE: sensor.States.ON,
+            sensor.Attributes.VALUE: f"{command}: {summarize(results)}",
+        })
+
+
 def create_sensors(config: XboxConfig, device: XboxDevice) -> list:
-    return [
+    sensors = [
         GamertagSensor(config, device),
         CurrentGameSensor(config, device),
+        GamerscoreSensor(config, device),
+        OnlineStatusSensor(config, device),
+        SessionStartSensor(config, device),
+        PlayTimeSensor(config, device),
     ]
+    if HISTORY_RETENTION_DAYS:
+        sensors += [PlayTimeTodaySensor(config, device), PlayTimeWeekSensor(config, device)]
+    if config.household_xuids:
+        sensors.append(ActivePlayerSensor(config, device))
+    if config.lan_control:
+        sensors.append(CommandTransportSensor(config, device))
+    if ASYNC_ACK:
+        sensors.append(CommandStatusSensor(config, device))
+    return sensors
@@ -40,6 +40,26 @@ class XboxSetupFlow(BaseSetupFlow[XboxConfig]):
                     "label": {"en": "Xbox Live Device ID"},
                     "field": {"text": {"value": ""}},
                 },
+                {
+                    "id": "ip_address",
+                    "label": {"en": "Console IP Address (Optional)"},
+                    "field": {"text": {"value": ""}},
+                },
+                {
+                    "id": "lan_probe",
+                    "label": {"en": "Detect power state on the local network"},
+                    "field": {"checkbox": {"value": False}},
+                },
+                {
+                    "id": "lan_control",
+                    "label": {"en": "Send buttons over the local network when possible"},
+                    "field": {"checkbox": {"value": False}},
+                },
+                {
+                    "id": "household_xuids",
+                    "label": {"en": "Other household XUIDs (Optional, comma separated)"},
+                    "field": {"text": {"value": ""}},
+                },
                 {
                     "id": "client_id",
                     "label": {"en": "Azure App Client ID"},
@@ -57,6 +77,12 @@ class XboxSetupFlow(BaseSetupFlow[XboxConfig]):
                         "label": {
                             "value": {
                                 "en": "Find your Xbox Live Device ID in: Xbox Settings > Devices & connections > Remote features.\n\n"
+                                "Local network power detection (UDP 5050) gives faster, more accurate ON/OFF state. "
+                                "Local network buttons skip the Xbox Live round trip and need the console to allow "
+                                "connections from any device; commands fall back to the cloud when it is unreachable. "
+                                "The console IP is optional; without it the console is found by broadcast.\n\n"
+                                "Add the XUIDs of other people who play on this console to report their games too; "
+                                "all of them are checked in a single request.\n\n"
                                 "You need an Azure App Registration with Xbox Live API permissions.\n"
                                 "Client Secret is optional (required for Web apps, not needed for Mobile/Desktop apps)."
                             }
@@ -71,6 +97,13 @@ class XboxSetupFlow(BaseSetupFlow[XboxConfig]):
     ) -> XboxConfig | RequestUserInput:
         name = input_values.get("name", "Xbox Console").strip()
         liveid = input_values.get("liveid", "").strip()
+        ip_address = input_values.get("ip_address", "").strip()
+        lan_probe = str(input_values.get("lan_probe", "false")).lower() == "true"
+        lan_control = str(input_values.get("lan_control", "false")).lower() == "true"
+        household_xuids = [
+            xuid.strip() for xuid in input_values.get("household_xuids", "").replace(";", ",").split(",")
+            if xuid.strip()
+        ]
         client_id = input_values.get("client_id", "").strip()
         client_secret = input_values.get("client_secret", "").strip()
 
@@ -78,6 +111,8 @@ class XboxSetupFlow(BaseSetupFlow[XboxConfig]):
             raise ValueError("Xbox Live Device ID is required")
         if not client_id:
             raise ValueError("Azure App Client ID is required")
+        if not all(xuid.isdigit() for xuid in household_xuids):
+            raise ValueError("Household XUIDs must be numeric")
 
         identifier = f"xbox_{liveid.replace('.', '_')}"
 
@@ -85,6 +120,10 @@ class XboxSetupFlow(BaseSetupFlow[XboxConfig]):
             identifier=identifier,
             name=name,
             liveid=liveid,
+            ip_address=ip_address,
+            lan_probe=lan_probe,
+            lan_control=lan_control,
+            household_xuids=household_xuids,
             client_id=client_id,
             client_secret=client_secret,
         )
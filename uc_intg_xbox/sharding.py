@@ -0,0 +1,447 @@
+"""
+Sharded multi-process mode.
+
+The main process keeps the Remote websocket and the entities; XboxDevice
+pollers run in worker processes. Workers publish device snapshots over a pipe
+and the coordinator forwards entity commands back as calls.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+from dataclasses import dataclass, field
+from functools import partial
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable
+
+from ucapi_framework import DeviceEvents
+
+from uc_intg_xbox.client import TransportStats
+from uc_intg_xbox.config import XboxConfig
+from uc_intg_xbox.const import (
+    LOG_FORMAT,
+    LOG_RATE_LIMIT,
+    LOG_RING_SIZE,
+    SHARD_CALL_TIMEOUT,
+)
+from uc_intg_xbox.device import XboxDevice
+from uc_intg_xbox.library import GameLibrary, shared_store
+from uc_intg_xbox.logs import configure_logging, configured_level
+from uc_intg_xbox.tracing import current_context, resume
+
+_LOG = logging.getLogger(__name__)
+
+Publisher = Callable[[str, Any], None]
+DeviceFactory = Callable[[XboxConfig, Publisher], Any]
+MessageHandler = Callable[[str, Any], None]
+
+FORWARDED_EVENTS = (DeviceEvents.CONNECTED, DeviceEvents.DISCONNECTED, DeviceEvents.ERROR)
+
+
+class ShardError(Exception):
+    """A call to a shard worker failed."""
+
+
+class WorkerXboxDevice(XboxDevice):
+    """XboxDevice running in a shard worker, publishing its state to the coordinator."""
+
+    def __init__(self, device_config: XboxConfig, publish: Publisher, **kwargs: Any) -> None:
+        super().__init__(device_config, **kwargs)
+        self._publish = publish
+        self._published_games: GameLibrary | None = None
+        for event in FORWARDED_EVENTS:
+            self.events.on(event, partial(self._forward_event, event))
+
+    def _forward_event(self, event: DeviceEvents, _identifier: str, *args: Any) -> None:
+        self._publish("event", (event, args))
+
+    def push_update(self) -> None:
+        snapshot = {
+            "state": self._state,
+            "presence_state": self._presence_state,
+            "media_title": self._media_title,
+            "media_image": self._media_image,
+            "gamertag": self._gamertag,
+            "active_player": self._active_player,
+            "gamerscore": self._gamerscore,
+            "status_text": self._status_text,
+            "last_seen": self._last_seen,
+            "in_party": self._in_party,
+            "in_multiplayer": self._in_multiplayer,
+            "session_started": self._session_started,
+            "session_title_id": self._session_title_id,
+            "session_xuid": self._session_xuid,
+            "client_connected": self.client_connected,
+            "last_transport": self.last_transport,
+            "transport_stats": self.transport_stats,
+        }
+        if self._installed_games is not self._published_games:
+            # The library is replaced, never mutated, when it changes.
+            self._published_games = self._installed_games
+            snapshot["games"] = (
+                self._client.xuid if self._client else None,
+                [(g.product_id, g.title_id, g.name, g.image, g.enriched) for g in self._installed_games],
+            )
+        self._publish("state", snapshot)
+
+    def _persist_tokens(self, tokens: dict) -> None:
+        super()._persist_tokens(tokens)
+        self._publish("tokens", tokens)
+
+
+def create_worker_device(device_config: XboxConfig, publish: Publisher) -> WorkerXboxDevice:
+    return WorkerXboxDevice(device_config, publish, loop=asyncio.get_running_loop())
+
+
+class _WorkerHost:
+    def __init__(self, conn: Connection, factory: DeviceFactory):
+        self._conn = conn
+        self._factory = factory
+        self._devices: dict[str, Any] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._stopped: asyncio.Future | None = None
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._stopped = loop.create_future()
+        loop.add_reader(self._conn.fileno(), self._drain)
+        try:
+            await self._stopped
+        finally:
+            loop.remove_reader(self._conn.fileno())
+            for device in self._devices.values():
+                try:
+                    await device.disconnect()
+                except Exception as err:
+                    _LOG.debug("Worker disconnect failed: %s", err)
+
+    def _drain(self) -> None:
+        try:
+            while self._conn.poll():
+                op, device_id, payload = self._conn.recv()
+                if op == "call":
+                    self._spawn(self._call(device_id, *payload))
+                elif op == "add":
+                    self._add(device_id, payload)
+                elif op == "remove":
+                    device = self._devices.pop(device_id, None)
+                    if device:
+                        self._spawn(device.disconnect())
+                elif op == "stop":
+                    self._stop()
+        except (EOFError, OSError):
+            self._stop()
+
+    def _stop(self) -> None:
+        if not self._stopped.done():
+            self._stopped.set_result(None)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _add(self, device_id: str, device_config: XboxConfig) -> None:
+        previous = self._devices.pop(device_id, None)
+        if previous:
+            self._spawn(previous.disconnect())
+        self._devices[device_id] = self._factory(device_config, partial(self._publish, device_id))
+
+    def _publish(self, device_id: str, kind: str, payload: Any) -> None:
+        try:
+            self._conn.send((kind, device_id, payload))
+        except (BrokenPipeError, OSError):
+            self._stop()
+
+    async def _call(self, device_id: str, request: int, method: str, args: tuple,
+                    trace_context: tuple[str, str] | None) -> None:
+        device = self._devices.get(device_id)
+        try:
+            if device is None:
+                raise ShardError(f"{device_id} is not attached to this worker")
+            with resume(trace_context):
+                result = (True, await getattr(device, method)(*args))
+        except Exception as err:
+            result = (False, str(err))
+        self._publish(request, "result", result)
+
+
+def _worker_main(conn: Connection, factory: DeviceFactory, log_level: int) -> None:
+    configure_logging(
+        log_level,
+        fmt=LOG_FORMAT,
+        rate_limit=LOG_RATE_LIMIT,
+        ring_size=LOG_RING_SIZE,
+        text_format="%(asctime)s | %(levelname)-8s | %(processName)-14s | %(name)-25s | %(message)s",
+    )
+    asyncio.run(_WorkerHost(conn, factory).run())
+
+
+@dataclass
+class _Shard:
+    index: int
+    process: BaseProcess
+    conn: Connection
+    devices: set[str] = field(default_factory=set)
+
+
+class ShardCoordinator:
+    """Runs device pollers in worker processes and routes their traffic."""
+
+    def __init__(self, workers: int, factory: DeviceFactory = create_worker_device):
+        self._size = max(workers, 1)
+        self._factory = factory
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._shards: list[_Shard] = []
+        self._routes: dict[str, _Shard] = {}
+        self._handlers: dict[str, MessageHandler] = {}
+        self._pending: dict[int, tuple[_Shard, asyncio.Future]] = {}
+        self._requests = itertools.count(1)
+
+    @property
+    def workers(self) -> int:
+        return self._size
+
+    @property
+    def device_ids(self) -> list[str]:
+        return list(self._routes)
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._shards:
+            return
+        self._loop = loop
+        context = multiprocessing.get_context("spawn")
+        log_level = configured_level()
+        for index in range(self._size):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker_main,
+                args=(child, self._factory, log_level),
+                name=f"xbox-shard-{index}",
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            shard = _Shard(index, process, parent)
+            self._shards.append(shard)
+            loop.add_reader(parent.fileno(), self._drain, shard)
+        _LOG.info("Started %d shard worker(s)", self._size)
+
+    async def stop(self) -> None:
+        for shard in self._shards:
+            self._loop.remove_reader(shard.conn.fileno())
+            try:
+                shard.conn.send(("stop", "", None))
+            except OSError:
+                pass
+        for shard in self._shards:
+            await self._loop.run_in_executor(None, shard.process.join, 5)
+            if shard.process.is_alive():
+                shard.process.terminate()
+            shard.conn.close()
+        self._shards.clear()
+        self._routes.clear()
+
+    def attach(self, device_id: str, device_config: XboxConfig, handler: MessageHandler,
+               loop: asyncio.AbstractEventLoop) -> None:
+        self.start(loop)
+        shard = self._routes.get(device_id)
+        if shard is None:
+            shard = min((s for s in self._shards if s.process.is_alive()),
+                        key=lambda s: len(s.devices), default=None)
+            if shard is None:
+                raise ShardError("No shard worker is running")
+        shard.devices.add(device_id)
+        self._routes[device_id] = shard
+        self._handlers[device_id] = handler
+        shard.conn.send(("add", device_id, device_config))
+        _LOG.debug("Device %s assigned to shard %d", device_id, shard.index)
+
+    def detach(self, device_id: str) -> None:
+        self._handlers.pop(device_id, None)
+        shard = self._routes.pop(device_id, None)
+        if shard:
+            shard.devices.discard(device_id)
+            try:
+                shard.conn.send(("remove", device_id, None))
+            except OSError:
+                pass
+
+    async def call(self, device_id: str, method: str, *args: Any, timeout: float = SHARD_CALL_TIMEOUT) -> Any:
+        shard = self._routes.get(device_id)
+        if shard is None:
+            raise ShardError(f"{device_id} is not attached to a shard")
+        request = next(self._requests)
+        future = self._loop.create_future()
+        self._pending[request] = (shard, future)
+        try:
+            shard.conn.send(("call", device_id, (request, method, args, current_context())))
+            return await asyncio.wait_for(future, timeout)
+        except OSError as err:
+            raise ShardError(f"Shard {shard.index} is not reachable: {err}") from err
+        finally:
+            self._pending.pop(request, None)
+
+    def _drain(self, shard: _Shard) -> None:
+        try:
+            while shard.conn.poll():
+                kind, key, payload = shard.conn.recv()
+                if kind == "result":
+                    _, future = self._pending.pop(key, (None, None))
+                    if future and not future.done():
+                        ok, value = payload
+                        if ok:
+                            future.set_result(value)
+                        else:
+                            future.set_exception(ShardError(value))
+                    continue
+                handler = self._handlers.get(key)
+                if handler:
+                    handler(kind, payload)
+        except (EOFError, OSError):
+            self._shard_lost(shard)
+
+    def _shard_lost(self, shard: _Shard) -> None:
+        _LOG.error("Shard worker %d exited, %d device(s) unavailable", shard.index, len(shard.devices))
+        self._loop.remove_reader(shard.conn.fileno())
+        for request, (owner, future) in list(self._pending.items()):
+            if owner is shard and not future.done():
+                future.set_exception(ShardError(f"Shard {shard.index} exited"))
+        for device_id in shard.devices:
+            handler = self._handlers.get(device_id)
+            if handler:
+                handler("event", (DeviceEvents.DISCONNECTED, ()))
+
+
+class ShardedXboxDevice(XboxDevice):
+    """Coordinator-side stand-in for an XboxDevice polled by a shard worker."""
+
+    def __init__(self, device_config: XboxConfig, **kwargs: Any) -> None:
+        super().__init__(device_config, **kwargs)
+        self._connected: bool = False
+        self._client_connected: bool = False
+        self._last_transport: str = ""
+        self._transport_stats: dict[str, TransportStats] = {}
+        self._shards: ShardCoordinator = self.driver.shard_coordinator
+        self._shards.attach(self.identifier, device_config, self._on_shard_message, self._loop)
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    @property
+    def client_connected(self) -> bool:
+        return self._client_connected
+
+    @property
+    def last_transport(self) -> str:
+        return self._last_transport
+
+    @property
+    def transport_stats(self) -> dict[str, TransportStats]:
+        return self._transport_stats
+
+    def _on_shard_message(self, kind: str, payload: Any) -> None:
+        if kind == "state":
+            self._apply_snapshot(payload)
+            self.push_update()
+        elif kind == "event":
+            event, args = payload
+            if event == DeviceEvents.CONNECTED:
+                self._connected = True
+            elif event == DeviceEvents.DISCONNECTED:
+                self._connected = False
+                self._client_connected = False
+                self._state = "UNAVAILABLE"
+            self.events.emit(event, self.identifier, *args)
+        elif kind == "tokens":
+            self._persist_tokens(payload)
+
+    def _apply_snapshot(self, snapshot: dict) -> None:
+        self._state = snapshot["state"]
+        self._presence_state = snapshot["presence_state"]
+        self._media_title = snapshot["media_title"]
+        self._media_image = snapshot["media_image"]
+        self._gamertag = snapshot["gamertag"]
+        self._active_player = snapshot["active_player"]
+        self._gamerscore = snapshot["gamerscore"]
+        self._status_text = snapshot["status_text"]
+        self._last_seen = snapshot["last_seen"]
+        self._in_party = snapshot["in_party"]
+        self._in_multiplayer = snapshot["in_multiplayer"]
+        # Sessions are recorded here; shard workers have no history store.
+        self._track_session(snapshot["session_title_id"], snapshot["session_xuid"])
+        self._session_started = snapshot["session_started"]
+        self._client_connected = snapshot["client_connected"]
+        self._last_transport = snapshot["last_transport"]
+        self._transport_stats = snapshot["transport_stats"]
+        if "games" in snapshot:
+            xuid, records = snapshot["games"]
+            store = shared_store(xuid or self.identifier)
+            games = []
+            for product_id, title_id, name, image, enriched in records:
+                game = store.get(product_id, title_id, name)
+                game.name, game.image, game.enriched = name, image, enriched
+                games.append(game)
+            self._installed_games = GameLibrary(games)
+
+    async def connect(self) -> bool:
+        self.events.emit(DeviceEvents.CONNECTING, self.identifier)
+        try:
+            return await self._shards.call(self.identifier, "connect")
+        except (ShardError, asyncio.TimeoutError) as err:
+            _LOG.error("[%s] Connection error: %s", self.log_id, err)
+            self.events.emit(DeviceEvents.ERROR, self.identifier, str(err))
+            return False
+
+    async def disconnect(self) -> None:
+        self._commands.stop()
+        self._track_session("")
+        try:
+            await self._shards.call(self.identifier, "disconnect")
+        except (ShardError, asyncio.TimeoutError) as err:
+            _LOG.debug("[%s] Shard disconnect failed: %s", self.log_id, err)
+        if self._connected:
+            self._connected = False
+            self.events.emit(DeviceEvents.DISCONNECTED, self.identifier)
+
+    async def send_command(self, command: str) -> bool:
+        try:
+            return await self._shards.call(self.identifier, "send_command", command)
+        except (ShardError, asyncio.TimeoutError) as err:
+            _LOG.error("[%s] Command %s failed: %s", self.log_id, command, err)
+            return False
+
+    async def prewarm(self) -> None:
+        await self._shards.call(self.identifier, "prewarm")
+
+    async def power_on(self) -> None:
+        await self._shards.call(self.identifier, "power_on")
+
+    async def power_off(self) -> None:
+        await self._shards.call(self.identifier, "power_off")
+
+    async def launch_app(self, one_store_product_id: str) -> None:
+        await self._shards.call(self.identifier, "launch_app", one_store_product_id)
+
+    async def refresh_game_library(self) -> None:
+        await self._shards.call(self.identifier, "refresh_game_library")
+
+    async def enrich_games(self, product_ids: list[str]) -> list[tuple[str, str, str]]:
+        # Enrichment mutates records in the worker, which snapshots do not carry; apply the result here.
+        updated = await self._shards.call(self.identifier, "enrich_games", product_ids)
+        for product_id, name, image in updated:
+            game = self._installed_games.by_product_id(product_id)
+            if game is not None:
+                game.name, game.image, game.enriched = name, image, True
+        if updated:
+            self.push_update()
+        return updated
+
+    async def refresh_tokens(self) -> None:
+        await self._shards.call(self.identifier, "refresh_tokens")
@@ -0,0 +1,282 @@
+"""
+Lightweight request tracing.
+
+Spans follow a command from the entity handler through the device and client
+down to the individual HTTP phases reported by httpcore. Finished spans are
+batched and written to a JSON-lines file or posted to an OTLP/HTTP collector.
+Tracing is off unless ``UC_XBOX_TRACE`` is set.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+import httpx
+
+from uc_intg_xbox.const import TRACE_EXPORT, TRACE_FLUSH_INTERVAL
+
+_LOG = logging.getLogger(__name__)
+
+SERVICE_NAME = "uc-intg-xbox"
+
+# httpcore trace event prefix -> span name. TCP connect includes DNS resolution.
+HTTP_PHASES = {
+    "connection.connect_tcp": "http.connect",
+    "connection.start_tls": "http.tls",
+    "http11.send_request_headers": "http.send_headers",
+    "http11.send_request_body": "http.send_body",
+    "http11.receive_response_headers": "http.wait",
+    "http11.receive_response_body": "http.receive_body",
+}
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str
+    start_ns: int
+    end_ns: int = 0
+    error: str = ""
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+    def to_otlp(self) -> dict:
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 3 if self.name.startswith("http") else 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            otlp["parentSpanId"] = self.parent_id
+        return otlp
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class _BatchExporter(abc.ABC):
+    def __init__(self) -> None:
+        self._buffer: list[Span] = []
+        self._flush_task: asyncio.Task | None = None
+
+    def export(self, span: Span) -> None:
+        self._buffer.append(span)
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+            except RuntimeError:
+                pass
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(TRACE_FLUSH_INTERVAL)
+        batch, self._buffer = self._buffer, []
+        try:
+            await self._write(batch)
+        except Exception as err:
+            _LOG.debug("Dropped %d span(s): %s", len(batch), err)
+
+    @abc.abstractmethod
+    async def _write(self, batch: list[Span]) -> None:
+        """Deliver one batch of finished spans."""
+
+
+class FileExporter(_BatchExporter):
+    """Appends spans to a JSON-lines file."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self._path = path
+
+    async def _write(self, batch: list[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in batch)
+        await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines: str) -> None:
+        with open(self._path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class OtlpExporter(_BatchExporter):
+    """Posts spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str) -> None:
+        super().__init__()
+        self._endpoint = endpoint if endpoint.endswith("/v1/traces") else endpoint.rstrip("/") + "/v1/traces"
+
+    async def _write(self, batch: list[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [span.to_otlp() for span in batch],
+                }],
+            }]
+        }
+        # Not traced itself: this client has no event hooks.
+        async with httpx.AsyncClient(timeout=10) as client:
+            resp = await client.post(self._endpoint, json=payload)
+            resp.raise_for_status()
+
+
+def create_exporter(target: str) -> _BatchExporter | None:
+    if not target:
+        return None
+    if target.startswith(("http://", "https://")):
+        return OtlpExporter(target)
+    return FileExporter(target)
+
+
+_exporter = create_exporter(TRACE_EXPORT)
+_current: ContextVar[Span | None] = ContextVar("uc_intg_xbox_span", default=None)
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+def _start(name: str, parent: Span | None, attributes: dict[str, Any]) -> Span:
+    return Span(
+        name=name,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else "",
+        start_ns=time.time_ns(),
+        attributes=attributes,
+    )
+
+
+def _finish(span: Span) -> None:
+    span.end_ns = span.end_ns or time.time_ns()
+    _exporter.export(span)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Trace the enclosed block as a child of the current span."""
+    if _exporter is None:
+        yield None
+        return
+    current = _start(name, _current.get(), attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as err:
+        current.error = str(err) or type(err).__name__
+        raise
+    finally:
+        _current.reset(token)
+        _finish(current)
+
+
+def current_context() -> tuple[str, str] | None:
+    """Return ``(trace_id, span_id)`` of the current span for handing to another process."""
+    current = _current.get()
+    return (current.trace_id, current.span_id) if current else None
+
+
+@contextmanager
+def resume(context: tuple[str, str] | None) -> Iterator[None]:
+    """Continue a trace started in another process."""
+    if _exporter is None or not context:
+        yield
+        return
+    remote = Span("remote", context[0], context[1], "", 0)
+    token = _current.set(remote)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class _HttpTrace:
+    def __init__(self, request_span: Span):
+        self._span = request_span
+        self._started: dict[str, int] = {}
+
+    async def __call__(self, event: str, info: dict[str, Any]) -> None:
+        stage, _, phase = event.rpartition(".")
+        name = HTTP_PHASES.get(stage)
+        if name is None:
+            return
+        if phase == "started":
+            self._started[stage] = time.time_ns()
+            return
+        start = self._started.pop(stage, None)
+        if start is None:
+            return
+        phase_span = _start(name, self._span, {})
+        phase_span.start_ns = start
+        if phase == "failed":
+            phase_span.error = str(info.get("exception", "")) or "failed"
+            if not self._span.end_ns:
+                self._span.error = phase_span.error
+                _finish(self._span)
+        _finish(phase_span)
+
+
+async def _on_request(request: httpx.Request) -> None:
+    parent = _current.get()
+    if parent is None:
+        return
+    request_span = _start("http.request", parent, {
+        "http.method": request.method,
+        "http.host": request.url.host,
+        "http.path": request.url.path,
+    })
+    request.extensions["trace"] = _HttpTrace(request_span)
+    request.extensions["uc_intg_xbox_span"] = request_span
+
+
+async def _on_response(response: httpx.Response) -> None:
+    request_span = response.request.extensions.get("uc_intg_xbox_span")
+    if request_span is None or request_span.end_ns:
+        return
+    request_span.attributes["http.status_code"] = response.status_code
+    _finish(request_span)
+
+
+def httpx_event_hooks() -> dict[str, list]:
+    """Event hooks that trace requests made inside a span; empty when tracing is off."""
+    if _exporter is None:
+        return {}
+    return {"request": [_on_request], "response": [_on_response]}
@@ -0,0 +1,165 @@
+"""
+Event-loop lag watchdog.
+
+A timer on the loop measures how late it wakes up. A helper thread notices
+when the loop stops waking at all and samples the loop thread's stack, so a
+blocking callback is reported with the code that was running.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+from uc_intg_xbox.const import (
+    LOOP_LAG_INTERVAL,
+    LOOP_LAG_REPORT_INTERVAL,
+    LOOP_LAG_SAMPLES,
+    SLOW_CALLBACK_HISTORY,
+    SLOW_CALLBACK_THRESHOLD,
+)
+
+_LOG = logging.getLogger(__name__)
+
+STACK_DEPTH = 12
+
+
+@dataclass
+class SlowCallback:
+    at: float
+    duration_ms: float
+    stack: list[str]
+    samples: int = 0
+
+
+@dataclass
+class _Stall:
+    started: float
+    stacks: Counter = field(default_factory=Counter)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LoopWatchdog:
+    """Measures event-loop lag and samples the stack of callbacks that block the loop."""
+
+    def __init__(
+        self,
+        interval: float = LOOP_LAG_INTERVAL,
+        threshold: float = SLOW_CALLBACK_THRESHOLD,
+        samples: int = LOOP_LAG_SAMPLES,
+    ):
+        self._interval = interval
+        self._threshold = threshold
+        self._lags: deque[float] = deque(maxlen=samples)
+        self._slow: deque[SlowCallback] = deque(maxlen=SLOW_CALLBACK_HISTORY)
+        self._heartbeat: float = time.monotonic()
+        self._loop_thread: int = 0
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        if self._task and not self._task.done():
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._thread = threading.Thread(target=self._sample, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def lag_percentiles(self) -> dict[str, float]:
+        lags = list(self._lags)
+        return {
+            "p50": round(percentile(lags, 0.50) * 1000, 2),
+            "p95": round(percentile(lags, 0.95) * 1000, 2),
+            "p99": round(percentile(lags, 0.99) * 1000, 2),
+            "max": round(max(lags, default=0.0) * 1000, 2),
+        }
+
+    def report(self) -> dict:
+        return {
+            "lag_ms": self.lag_percentiles(),
+            "samples": len(self._lags),
+            "interval_ms": self._interval * 1000,
+            "slow_threshold_ms": self._threshold * 1000,
+            "slow_callbacks": [
+                {"at": slow.at, "duration_ms": round(slow.duration_ms, 1),
+                 "samples": slow.samples, "stack": slow.stack}
+                for slow in self._slow
+            ],
+        }
+
+    async def _measure(self) -> None:
+        last_report = time.monotonic()
+        while True:
+            expected = time.monotonic() + self._interval
+            await asyncio.sleep(self._interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self._lags.append(max(0.0, now - expected))
+            if now - last_report >= LOOP_LAG_REPORT_INTERVAL:
+                last_report = now
+                self._log_report()
+
+    def _log_report(self) -> None:
+        lag = self.lag_percentiles()
+        level = logging.INFO if lag["p99"] >= self._threshold * 1000 else logging.DEBUG
+        _LOG.log(level, "Event loop lag p50=%.1f ms p95=%.1f ms p99=%.1f ms max=%.1f ms (%d samples)",
+                 lag["p50"], lag["p95"], lag["p99"], lag["max"], len(self._lags))
+
+    def _sample(self) -> None:
+        stall: _Stall | None = None
+        period = max(self._threshold / 2, 0.01)
+        while not self._stopped.wait(period):
+            due = self._heartbeat + self._interval
+            now = time.monotonic()
+            if now - due >= self._threshold:
+                if stall is not None and stall.started != due:
+                    self._record(stall, due - self._interval)
+                    stall = None
+                if stall is None:
+                    stall = _Stall(due)
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    stack = traceback.format_list(traceback.extract_stack(frame, limit=STACK_DEPTH))
+                    stall.stacks[tuple(line.rstrip() for line in stack)] += 1
+            elif stall is not None:
+                self._record(stall, self._heartbeat)
+                stall = None
+
+    def _record(self, stall: _Stall, resumed: float) -> None:
+        if not stall.stacks:
+            return
+        stack = stall.stacks.most_common(1)[0][0]
+        slow = SlowCallback(
+            at=time.time() - (time.monotonic() - stall.started),
+            duration_ms=(resumed - stall.started) * 1000,
+            stack=list(stack),
+            samples=sum(stall.stacks.values()),
+        )
+        self._slow.append(slow)
+        _LOG.warning("Event loop blocked for %.0f ms in:\n%s", slow.duration_ms, "\n".join(stack[-4:]))